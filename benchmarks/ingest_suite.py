@@ -0,0 +1,543 @@
+"""Offline ingestion benchmark: worker, CLI and repository layer against fake model providers.
+
+A synthetic corpus (text, Markdown and PDF files) is ingested by `run_worker` on a SQLite
+queue and by the `rag-ingest` CLI, through a fake RAG provider whose LLM and embedding calls
+sleep for a configurable, log-normally distributed latency. The repository layer is measured
+alone by draining a queue with the same reserve/log/mark calls the worker makes. The opt-in
+`lightrag` scenario runs the worker with the real `RAGProvider` (parsing excepted) against the
+`rag-model-stub` server, so HTTP clients, rate limits, retries and LightRAG itself are
+exercised. Each scenario runs in its own process so its peak RSS is its own.
+
+Usage: python benchmarks/ingest_suite.py --documents 200 --concurrency 4 --output results.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import math
+import multiprocessing
+import os
+import platform
+import random
+import re
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import sessionmaker
+
+from rag_ingest.entity import IngestionQueueItem, QueueStatus
+from rag_ingest.ingestor import ingest
+from rag_ingest.model_stub import ModelStubServer, StubSettings
+from rag_ingest.orm import Base
+from rag_ingest.repository import IngestionLogRepo, IngestionQueueItemRepo, IngestionStageMetricRepo
+from rag_ingest.services import RAGProvider
+from rag_ingest.services.utils import RetryPolicy, account_model_call, track_stage
+from rag_ingest.worker import run_worker
+
+SCENARIOS = ("worker", "cli", "repository", "lightrag")
+DEFAULT_SCENARIOS = ("worker", "cli", "repository")
+
+WORDS = (
+    "ingestion queue document entity relation graph storage embedding model latency worker "
+    "lease schedule parser chunk vector index archive retry pipeline provider manager"
+).split()
+
+
+# --- Synthetic corpus -------------------------------------------------------------------
+
+
+def _parse_mix(mix: str) -> dict[str, int]:
+    """`txt=5,md=3,pdf=2` -> relative weights per file extension."""
+    weights = {}
+    for part in mix.split(","):
+        extension, _, weight = part.partition("=")
+        weights[extension.strip().lstrip(".")] = int(weight or 1)
+    return weights
+
+
+def _paragraphs(rng: random.Random, size: int) -> list[str]:
+    paragraphs, total = [], 0
+    while total < size:
+        paragraph = " ".join(rng.choice(WORDS) for _ in range(rng.randint(40, 120))) + "."
+        paragraphs.append(paragraph.capitalize())
+        total += len(paragraph) + 2
+    return paragraphs
+
+
+def _pdf(paragraphs: list[str]) -> bytes:
+    """Smallest valid single-page PDF showing `paragraphs` as text lines."""
+    lines = [line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") for line in paragraphs]
+    stream = "BT /F1 10 Tf 40 800 Td 12 TL\n" + "\n".join(f"({line}) Tj T*" for line in lines) + "\nET"
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents 4 0 R "
+        "/Resources << /Font << /F1 5 0 R >> >> >>",
+        f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    body, offsets = "%PDF-1.4\n", []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(body.encode("latin-1")))
+        body += f"{number} 0 obj\n{obj}\nendobj\n"
+    xref = len(body.encode("latin-1"))
+    body += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n"
+    body += "".join(f"{offset:010d} 00000 n \n" for offset in offsets)
+    body += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+    return body.encode("latin-1")
+
+
+def make_corpus(root: Path, documents: int, mix: str = "txt=5,md=3,pdf=2", size_kb: float = 8, seed: int = 0) -> list[Path]:
+    """Write `documents` files under `root`; sizes vary from a quarter to four times `size_kb`."""
+    rng = random.Random(seed)
+    weights = _parse_mix(mix)
+    extensions = rng.choices(list(weights), weights=list(weights.values()), k=documents)
+    root.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for index, extension in enumerate(extensions):
+        size = int(size_kb * 1024 * 2 ** rng.uniform(-2, 2))
+        paragraphs = _paragraphs(rng, size)
+        path = root / f"batch{index // 100:03d}" / f"doc{index:05d}.{extension}"
+        path.parent.mkdir(exist_ok=True)
+        if extension == "pdf":
+            path.write_bytes(_pdf(paragraphs))
+        elif extension == "md":
+            path.write_text(f"# Document {index}\n\n" + "\n\n## Section\n\n".join(paragraphs))
+        else:
+            path.write_text("\n\n".join(paragraphs))
+        paths.append(path)
+    return paths
+
+
+# --- Fake model providers ---------------------------------------------------------------
+
+
+class Latency:
+    """Log-normal latency with the given median; `spread` is the sigma of its logarithm."""
+
+    def __init__(self, median_ms: float, spread: float, rng: random.Random):
+        self.median_ms = median_ms
+        self.spread = spread
+        self.rng = rng
+
+    async def wait(self) -> None:
+        if self.median_ms > 0:
+            await asyncio.sleep(self.median_ms * math.exp(self.rng.gauss(0, self.spread)) / 1000)
+
+
+class FakeRagAnything:
+    """Parses the synthetic corpus and runs one LLM call per chunk plus batched embeddings.
+
+    Model calls go through `track_stage` and `account_model_call` like the real providers,
+    and at most `llm_max_async` of them run at once, like LightRAG's `llm_model_max_async`.
+    """
+
+    def __init__(self, args: argparse.Namespace):
+        rng = random.Random(args.seed)
+        self.llm = Latency(args.llm_latency_ms, args.latency_spread, rng)
+        self.embedding = Latency(args.embedding_latency_ms, args.latency_spread, rng)
+        self.parse = Latency(args.parse_latency_ms, args.latency_spread, rng)
+        self.chunk_chars = args.chunk_chars
+        self.embedding_batch = args.embedding_batch
+        self.llm_slots = asyncio.Semaphore(args.llm_max_async)
+        self.document_seconds: list[float] = []
+
+    async def parse_document(self, file_path: str):
+        await self.parse.wait()
+        data = Path(file_path).read_bytes()
+        if data.startswith(b"%PDF"):
+            text = "\n".join(re.findall(r"\((.*?)\) Tj", data.decode("latin-1")))
+        else:
+            text = data.decode("utf-8")
+        return [{"type": "text", "text": text, "page_idx": 0}], Path(file_path).stem
+
+    async def _complete(self, chunk: str) -> None:
+        async with self.llm_slots:
+            with (
+                track_stage("llm", bytes_processed=len(chunk)),
+                account_model_call("llm", "fake-llm", len(chunk) // 4 + 1) as call,
+            ):
+                await self.llm.wait()
+                call.set_completion(chunk[: len(chunk) // 4])
+
+    async def _embed(self, texts: list[str]) -> None:
+        with (
+            track_stage("embedding", bytes_processed=sum(len(text) for text in texts)),
+            account_model_call("embedding", "fake-embedding", sum(len(text) for text in texts) // 4 + 1),
+        ):
+            await self.embedding.wait()
+
+    async def insert_content_list(self, content_list, file_path: str, doc_id: str | None = None):
+        text = "\n".join(block.get("text", "") for block in content_list)
+        chunks = [text[start:start + self.chunk_chars] for start in range(0, len(text), self.chunk_chars)] or [""]
+        await asyncio.gather(*(self._complete(chunk) for chunk in chunks))
+        batches = [chunks[start:start + self.embedding_batch] for start in range(0, len(chunks), self.embedding_batch)]
+        await asyncio.gather(*(self._embed(batch) for batch in batches))
+
+    async def process_document_complete(self, file_path, doc_id: str | None = None):
+        started = time.perf_counter()
+        content_list, _ = await self.parse_document(str(file_path))
+        await self.insert_content_list(content_list, str(file_path), doc_id)
+        self.document_seconds.append(time.perf_counter() - started)
+
+
+class FakeRagProvider:
+    def __init__(self, args: argparse.Namespace, staged: bool = True):
+        rag_anything = FakeRagAnything(args)
+        if not staged:
+            # Hide the stage methods so the worker calls `process_document_complete`
+            rag_anything = _Unstaged(rag_anything)
+        self.rag_anything = rag_anything
+
+    async def delete_document(self, doc_id: str) -> None:
+        pass
+
+
+class _StubbedParsing:
+    """Real RAGAnything insertion behind the fake parser: no document parser is needed offline."""
+
+    def __init__(self, rag_anything, args: argparse.Namespace):
+        self.parse_document = FakeRagAnything(args).parse_document
+        self.insert_content_list = rag_anything.insert_content_list
+
+    async def process_document_complete(self, file_path, doc_id: str | None = None):
+        content_list, _ = await self.parse_document(str(file_path))
+        await self.insert_content_list(content_list, file_path=str(file_path), doc_id=doc_id)
+
+
+class _Unstaged:
+    def __init__(self, rag_anything: FakeRagAnything):
+        self.process_document_complete = rag_anything.process_document_complete
+        self.document_seconds = rag_anything.document_seconds
+
+
+# --- Measurements -----------------------------------------------------------------------
+
+
+def _percentiles(samples: list[float]) -> dict[str, float]:
+    if not samples:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0}
+    if len(samples) == 1:
+        return {"p50": samples[0], "p95": samples[0], "p99": samples[0]}
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {"p50": cuts[49], "p95": cuts[94], "p99": cuts[98]}
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+
+
+def _sqlite(path: Path):
+    engine = create_engine(f"sqlite:///{path}", future=True)
+    Base.metadata.create_all(engine)
+    round_trips = [0]
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        round_trips[0] += 1
+
+    return engine, sessionmaker(bind=engine, autoflush=False, future=True), round_trips
+
+
+def _result(documents: int, elapsed: float, latencies: list[float], round_trips: int | None) -> dict:
+    return {
+        "documents": documents,
+        "elapsed_seconds": elapsed,
+        "docs_per_minute": documents * 60 / elapsed if elapsed else 0.0,
+        "latency_seconds": _percentiles(latencies),
+        "db_round_trips_per_job": round_trips / documents if round_trips is not None and documents else None,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def _drain_queue(args: argparse.Namespace, provider_factory, retry_policy: RetryPolicy | None = None) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_path = Path(tmp)
+        shared_root = tmp_path / "shared"
+        paths = make_corpus(shared_root, args.documents, args.mix, args.size_kb, args.seed)
+        engine, session_factory, round_trips = _sqlite(tmp_path / "queue.sqlite")
+        with session_factory() as session:
+            session.execute(
+                insert(IngestionQueueItem),
+                [{"storage_path": path.relative_to(shared_root).as_posix()} for path in paths],
+            )
+            session.commit()
+
+        async def drain():
+            # `exit_on_idle` returns while retries wait for their `next_attempt_at`
+            while True:
+                await run_worker(
+                    session_factory=session_factory,
+                    shared_root=shared_root,
+                    rag_storage_dir=tmp_path / "rag",
+                    poll_interval=0.01,
+                    max_concurrency=args.concurrency,
+                    parse_workers=args.parse_workers,
+                    pipeline_queue_size=args.parse_workers,
+                    prune_interval=0,
+                    archive_interval=0,
+                    retry_policy=retry_policy,
+                    exit_on_idle=True,
+                    rag_provider_factory=provider_factory,
+                )
+                with session_factory() as session:
+                    if not session.query(IngestionQueueItem).filter_by(status=QueueStatus.queued).count():
+                        return
+                await asyncio.sleep(0.1)
+
+        round_trips[0] = 0
+        started = time.perf_counter()
+        asyncio.run(drain())
+        elapsed = time.perf_counter() - started
+        trips = round_trips[0]
+
+        with session_factory() as session:
+            items = session.query(IngestionQueueItem).all()
+            latencies = [
+                (item.ended_at - item.started_at).total_seconds()
+                for item in items
+                if item.started_at is not None and item.ended_at is not None
+            ]
+            indexed = sum(item.status == QueueStatus.indexed for item in items)
+            attempts = sum(item.attempt_count or 0 for item in items)
+            stages = IngestionStageMetricRepo(session).aggregate()
+        engine.dispose()
+
+    result = _result(len(paths), elapsed, latencies, trips)
+    result["indexed"] = indexed
+    result["attempts"] = attempts
+    result["stages"] = {row["stage"]: row["total_seconds"] for row in stages}
+    return result
+
+
+def bench_worker(args: argparse.Namespace) -> dict:
+    """Drain a SQLite queue holding the corpus through `run_worker`."""
+    provider = FakeRagProvider(args, staged=not args.unstaged)
+
+    async def provider_factory(_):
+        return provider
+
+    return _drain_queue(args, provider_factory)
+
+
+def bench_lightrag(args: argparse.Namespace) -> dict:
+    """Drain the queue with the real RAGProvider, whose model calls go to the model stub."""
+    providers = {}
+
+    async def provider_factory(rag_storage_dir):
+        if rag_storage_dir not in providers:
+            provider = await RAGProvider(str(rag_storage_dir))
+            provider.rag_anything = _StubbedParsing(provider.rag_anything, args)
+            providers[rag_storage_dir] = provider
+        return providers[rag_storage_dir]
+
+    # Short delays so that injected errors are retried within the run
+    return _drain_queue(args, provider_factory, RetryPolicy(max_attempts=5, base_delay=0.5, max_delay=5))
+
+
+@contextlib.contextmanager
+def _silenced_stderr():
+    # The CLI progress line is bound to the original stderr stream, so redirect the descriptor
+    saved = os.dup(2)
+    with open(os.devnull, "w") as devnull:
+        os.dup2(devnull.fileno(), 2)
+    try:
+        yield
+    finally:
+        os.dup2(saved, 2)
+        os.close(saved)
+
+
+def bench_cli(args: argparse.Namespace) -> dict:
+    """Ingest the corpus directory with the `rag-ingest` CLI entrypoint."""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_path = Path(tmp)
+        paths = make_corpus(tmp_path / "corpus", args.documents, args.mix, args.size_kb, args.seed)
+        provider = FakeRagProvider(args, staged=False)
+
+        async def provider_factory(_):
+            return provider
+
+        argv = [str(tmp_path / "corpus"), "--storage-dir", str(tmp_path / "rag"), "--concurrency", str(args.concurrency)]
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()), _silenced_stderr():
+            exit_code = asyncio.run(ingest(argv, rag_provider_factory=provider_factory))
+        elapsed = time.perf_counter() - started
+
+    result = _result(len(paths), elapsed, provider.rag_anything.document_seconds, None)
+    result["exit_code"] = exit_code
+    return result
+
+
+def bench_repository(args: argparse.Namespace) -> dict:
+    """Reserve, log and mark every item of a queue the size of the corpus, without any model call."""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, session_factory, round_trips = _sqlite(Path(tmp) / "queue.sqlite")
+        with session_factory() as session:
+            session.execute(
+                insert(IngestionQueueItem),
+                [{"storage_path": f"doc{index}.txt"} for index in range(args.documents)],
+            )
+            session.commit()
+
+        round_trips[0] = 0
+        latencies = []
+        started = time.perf_counter()
+        with session_factory() as session:
+            queue_repo = IngestionQueueItemRepo(session)
+            log_repo = IngestionLogRepo(session)
+            while True:
+                batch_started = time.perf_counter()
+                items = queue_repo.reserve_next_batch(args.concurrency, "bench", lease_seconds=300)
+                session.commit()
+                if not items:
+                    break
+                for item in items:
+                    log_repo.add_ingestion_log(item.id, "Ingestion started")
+                    queue_repo.mark_indexed(item, rag_message="ok")
+                    log_repo.add_ingestion_log(item.id, "Ingestion completed")
+                    session.commit()
+                latencies.extend([(time.perf_counter() - batch_started) / len(items)] * len(items))
+        elapsed = time.perf_counter() - started
+        trips = round_trips[0]
+        engine.dispose()
+
+    return _result(args.documents, elapsed, latencies, trips)
+
+
+BENCHMARKS = {"worker": bench_worker, "cli": bench_cli, "repository": bench_repository, "lightrag": bench_lightrag}
+
+
+def _run_scenario(name: str, args: argparse.Namespace) -> dict:
+    logging.disable(logging.WARNING)
+    return BENCHMARKS[name](args)
+
+
+@contextlib.contextmanager
+def _model_stub(args: argparse.Namespace):
+    """Serve the model stub from a background thread, with the environment pointing at it.
+
+    The scenario processes are spawned with this environment, so the providers read it at import.
+    """
+    settings = StubSettings(
+        latency_ms=args.llm_latency_ms,
+        embedding_latency_ms=args.embedding_latency_ms,
+        latency_spread=args.latency_spread,
+        error_rate_429=args.error_rate_429,
+        error_rate_500=args.error_rate_500,
+        requests_per_minute=args.stub_rpm,
+        seed=args.seed,
+    )
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    server = asyncio.run_coroutine_threadsafe(ModelStubServer("127.0.0.1:0", settings).start(), loop).result()
+    saved = dict(os.environ)
+    with tempfile.TemporaryDirectory() as caches:
+        # Embedding and VLM caches default to RAG_STORAGE_DIR: keep them out of the working tree
+        os.environ.update(server.environment(), RAG_STORAGE_DIR=caches)
+        try:
+            yield server
+        finally:
+            os.environ.clear()
+            os.environ.update(saved)
+            asyncio.run_coroutine_threadsafe(server.close(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+
+
+def run(args: argparse.Namespace) -> dict:
+    """Run the selected scenarios, each in a fresh process, and return the JSON-ready results."""
+    results = {}
+    context = multiprocessing.get_context("spawn")
+    for name in args.scenarios:
+        with contextlib.ExitStack() as stack:
+            stub = stack.enter_context(_model_stub(args)) if name == "lightrag" else None
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                results[name] = executor.submit(_run_scenario, name, args).result()
+            if stub is not None:
+                results[name]["model_stub"] = {"requests": dict(stub.requests), "statuses": dict(stub.statuses)}
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "results": results,
+    }
+
+
+def print_results(report: dict, baseline: dict | None = None) -> None:
+    print(f"{'scenario':<12}{'docs/min':>10}{'p50 s':>9}{'p95 s':>9}{'p99 s':>9}{'trips/job':>11}{'RSS MB':>9}")
+    for name, result in report["results"].items():
+        latency = result["latency_seconds"]
+        trips = result["db_round_trips_per_job"]
+        line = (
+            f"{name:<12}{result['docs_per_minute']:>10.1f}{latency['p50']:>9.3f}{latency['p95']:>9.3f}"
+            f"{latency['p99']:>9.3f}{'-' if trips is None else f'{trips:.1f}':>11}{result['peak_rss_mb']:>9.1f}"
+        )
+        previous = (baseline or {}).get("results", {}).get(name)
+        if previous and previous["docs_per_minute"]:
+            change = result["docs_per_minute"] / previous["docs_per_minute"] - 1
+            line += f"  ({change:+.1%} docs/min vs {baseline.get('commit') or 'baseline'})"
+        print(line)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(DEFAULT_SCENARIOS))
+    parser.add_argument("--documents", type=int, default=200)
+    parser.add_argument("--mix", default="txt=5,md=3,pdf=2", help="Relative share of each file type.")
+    parser.add_argument("--size-kb", type=float, default=8, help="Median document size.")
+    parser.add_argument("--concurrency", type=int, default=4, help="Jobs in flight (worker, CLI) or reserved per batch.")
+    parser.add_argument("--parse-workers", type=int, default=1)
+    parser.add_argument("--unstaged", action="store_true", help="Run the worker through process_document_complete.")
+    parser.add_argument("--chunk-chars", type=int, default=4800, help="Text per LLM call (about 1200 tokens).")
+    parser.add_argument("--llm-latency-ms", type=float, default=200)
+    parser.add_argument("--llm-max-async", type=int, default=4)
+    parser.add_argument("--embedding-latency-ms", type=float, default=20)
+    parser.add_argument("--embedding-batch", type=int, default=32)
+    parser.add_argument("--parse-latency-ms", type=float, default=20)
+    parser.add_argument("--latency-spread", type=float, default=0.5, help="Sigma of the log-normal latencies.")
+    parser.add_argument("--error-rate-429", type=float, default=0.0, help="lightrag: share of stub requests answered 429.")
+    parser.add_argument("--error-rate-500", type=float, default=0.0, help="lightrag: share of stub requests answered 500.")
+    parser.add_argument("--stub-rpm", type=float, default=0.0, help="lightrag: stub rate limit in requests per minute.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=None, help="Write the results to this JSON file.")
+    parser.add_argument("--compare", type=Path, default=None, help="Previous results file to compare with.")
+    return parser
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+    report = run(args)
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+    print_results(report, baseline)
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
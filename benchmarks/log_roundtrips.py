@@ -0,0 +1,111 @@
+"""Count DB round-trips per job of the worker with unbuffered vs buffered ingestion logs.
+
+Usage: python benchmarks/log_roundtrips.py --jobs 200 --concurrency 1,4
+
+Each scenario drains the queue through `run_worker` twice, with INGESTOR_LOG_BUFFER_SIZE=1
+(one INSERT per log row, as before buffering) and with the default buffer. `reclaim` starts
+with every job held by a crashed worker whose lease expired, so they are all reset in one
+transaction before being processed. SQLite has a single writer, so keep the concurrency low.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from rag_ingest.entity import IngestionQueueItem, QueueStatus
+from rag_ingest.orm import Base
+from rag_ingest.worker import run_worker
+
+
+class _NoopRagAnything:
+    async def process_document_complete(self, file_path, doc_id=None):
+        await asyncio.sleep(0)
+
+
+class _NoopRagProvider:
+    rag_anything = _NoopRagAnything()
+
+
+async def _provider_factory(_):
+    return _NoopRagProvider()
+
+
+def run(jobs: int, concurrency: int, buffer_size: int, reclaim: bool = False) -> dict[str, float]:
+    """Drain `jobs` queue items through `run_worker` and count the statements sent to the DB."""
+    os.environ["INGESTOR_LOG_BUFFER_SIZE"] = str(buffer_size)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_path = Path(tmp)
+        shared_root = tmp_path / "shared"
+        shared_root.mkdir()
+
+        # Concurrent jobs contend for SQLite's single writer lock: wait for it instead of failing
+        engine = create_engine(
+            f"sqlite:///{tmp_path / 'bench.sqlite'}", future=True, connect_args={"timeout": 60}
+        )
+        Base.metadata.create_all(engine)
+        session_factory = sessionmaker(bind=engine, autoflush=False, future=True)
+
+        expired = datetime.now(timezone.utc) - timedelta(minutes=5)
+        with session_factory() as session:
+            for index in range(jobs):
+                (shared_root / f"doc{index}.txt").write_text(f"content {index}")
+                item = IngestionQueueItem(storage_path=f"doc{index}.txt")
+                if reclaim:
+                    item.status = QueueStatus.processing
+                    item.claimed_by = "crashed-worker"
+                    item.started_at = item.lease_expires_at = expired
+                session.add(item)
+            session.commit()
+
+        counts = {"statements": 0, "log_inserts": 0}
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def _count(conn, cursor, statement, parameters, context, executemany):
+            counts["statements"] += 1
+            if statement.startswith("INSERT INTO ingestion_log"):
+                counts["log_inserts"] += 1
+
+        asyncio.run(
+            run_worker(
+                session_factory=session_factory,
+                shared_root=shared_root,
+                rag_storage_dir=tmp_path / "rag",
+                poll_interval=0.01,
+                max_concurrency=concurrency,
+                exit_on_idle=True,
+                rag_provider_factory=_provider_factory,
+            )
+        )
+        engine.dispose()
+
+    return {key: value / jobs for key, value in counts.items()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=200)
+    parser.add_argument("--concurrency", default="1,4", help="Comma-separated max_concurrency values.")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    print(f"{'scenario':<16}{'mode':<12}{'statements/job':>16}{'log INSERTs/job':>18}")
+    scenarios = [(f"drain x{value}", int(value), False) for value in args.concurrency.split(",")]
+    scenarios += [(f"reclaim x{value}", int(value), True) for value in args.concurrency.split(",")]
+    for name, concurrency, reclaim in scenarios:
+        for mode, buffer_size in (("unbuffered", 1), ("buffered", 100)):
+            result = run(args.jobs, concurrency, buffer_size, reclaim)
+            print(f"{name:<16}{mode:<12}{result['statements']:>16.2f}{result['log_inserts']:>18.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Measure poll/recovery query latency against the number of historical jobs in the queue table.
+
+Each size is measured three ways: without the composite indexes, with them, and with them
+after the finished jobs were archived to the history tables.
+
+Usage: python benchmarks/queue_query_latency.py --sizes 10000 100000 1000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session, sessionmaker
+
+from rag_ingest.entity import IngestionLog, IngestionQueueItem, QueueStatus
+from rag_ingest.orm import Base
+from rag_ingest.repository import IngestionQueueItemRepo
+from rag_ingest.worker import archive_finished_items
+
+QUEUED_JOBS = 50
+INSERT_CHUNK = 50_000
+
+
+def _seed(session_factory: sessionmaker, historical: int) -> None:
+    now = datetime.now(timezone.utc)
+    old = now - timedelta(days=30)
+    with session_factory() as session:
+        for start in range(0, historical, INSERT_CHUNK):
+            rows = [
+                {
+                    "storage_path": f"archive/doc{index}.pdf",
+                    "status": QueueStatus.failed if index % 20 == 0 else QueueStatus.indexed,
+                    "created_at": old,
+                    "started_at": old,
+                    "ended_at": old,
+                    "scheduled_at": old,
+                    "priority": 0,
+                }
+                for index in range(start, min(start + INSERT_CHUNK, historical))
+            ]
+            session.execute(insert(IngestionQueueItem), rows)
+        session.flush()
+        first_ids = session.query(IngestionQueueItem.id).order_by(IngestionQueueItem.id).limit(INSERT_CHUNK).all()
+        session.execute(
+            insert(IngestionLog),
+            [{"ingestion_queue_item_id": row.id, "message": "done"} for row in first_ids],
+        )
+        session.execute(
+            insert(IngestionQueueItem),
+            [
+                {"storage_path": f"new/doc{index}.pdf", "created_at": now, "scheduled_at": now, "priority": 0}
+                for index in range(QUEUED_JOBS)
+            ],
+        )
+        session.commit()
+
+
+def _measure(session: Session, repeat: int) -> dict[str, float]:
+    repo = IngestionQueueItemRepo(session)
+    queries = {
+        "reserve": lambda: repo.find_next_queued_item(),
+        "has_processing": lambda: repo.has_processing_item(),
+        "stale_reset": lambda: repo.reset_stale_processing_items(3600),
+        "lease_reset": lambda: repo.reset_expired_leases(),
+    }
+    timings = {}
+    for name, query in queries.items():
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            query()
+            samples.append((time.perf_counter() - started) * 1000)
+            session.rollback()
+        timings[name] = statistics.median(samples)
+    return timings
+
+
+def run(historical: int, repeat: int) -> list[tuple[str, dict[str, float]]]:
+    """Return median latencies in ms per query for the three table layouts."""
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{Path(tmp) / 'queue.sqlite'}", future=True)
+        Base.metadata.create_all(engine)
+        session_factory = sessionmaker(bind=engine, autoflush=False, future=True)
+        _seed(session_factory, historical)
+
+        queue_indexes = list(IngestionQueueItem.__table__.indexes)
+        with engine.begin() as connection:
+            for index in queue_indexes:
+                index.drop(connection)
+        with session_factory() as session:
+            results.append(("no index", _measure(session, repeat)))
+
+        with engine.begin() as connection:
+            for index in queue_indexes:
+                index.create(connection)
+            connection.exec_driver_sql("ANALYZE")
+        with session_factory() as session:
+            results.append(("indexed", _measure(session, repeat)))
+
+        archive_finished_items(session_factory, retention_seconds=24 * 3600, batch_size=10_000)
+        with engine.begin() as connection:
+            connection.exec_driver_sql("ANALYZE")
+        with session_factory() as session:
+            results.append(("archived", _measure(session, repeat)))
+        engine.dispose()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    header = ("historical jobs", "layout", "reserve ms", "has_processing ms", "stale_reset ms", "lease_reset ms")
+    print(f"{header[0]:>15}  {header[1]:<9}" + "".join(f"{column:>19}" for column in header[2:]))
+    for size in args.sizes:
+        for layout, timings in run(size, args.repeat):
+            print(f"{size:>15}  {layout:<9}" + "".join(f"{value:>19.3f}" for value in timings.values()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Compare VLM image payload size and preparation latency with and without preprocessing.
+
+Usage: python benchmarks/vlm_image_payload.py --bandwidth-mbps 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import io
+import time
+
+from PIL import Image, ImageDraw
+
+from rag_ingest.services.image_preprocess import ImagePreprocessor
+
+
+def _encode(image, image_format: str, **params) -> str:
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format, **params)
+    return base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+def _dimensions(payload: str) -> str:
+    with Image.open(io.BytesIO(base64.b64decode(payload))) as image:
+        return f"{image.width}x{image.height}"
+
+
+def synthetic_images() -> dict[str, str]:
+    """Base64 payloads resembling what RAGAnything extracts from documents."""
+    scan = Image.effect_noise((2480, 3508), 24).convert("RGB")  # A4 page scanned at 300 dpi
+    screenshot = Image.new("RGBA", (2880, 1800), (250, 250, 250, 255))
+    draw = ImageDraw.Draw(screenshot)
+    for row in range(0, 1800, 24):
+        draw.text((40, row), "Lorem ipsum dolor sit amet, consectetur adipiscing elit " * 3, fill=(20, 20, 20, 255))
+    figure = Image.effect_noise((1600, 1200), 48).convert("RGB")
+    return {
+        "scan (JPEG q95)": _encode(scan, "JPEG", quality=95),
+        "screenshot (PNG)": _encode(screenshot, "PNG"),
+        "figure (PNG)": _encode(figure, "PNG"),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--max-edge", type=int, default=1568)
+    parser.add_argument("--quality", type=int, default=85)
+    parser.add_argument("--bandwidth-mbps", type=float, default=20.0, help="Uplink used to estimate upload time.")
+    args = parser.parse_args()
+
+    bytes_per_second = args.bandwidth_mbps * 1_000_000 / 8
+    print(
+        f"{'image':<20}{'pixels before/after':>24}{'before KiB':>12}{'after KiB':>12}{'ratio':>8}"
+        f"{'prep ms':>10}{'upload ms before/after':>26}"
+    )
+    for name, payload in synthetic_images().items():
+        preprocessor = ImagePreprocessor(max_edge=args.max_edge, quality=args.quality)
+        started = time.perf_counter()
+        processed, _ = preprocessor.prepare(payload)
+        prep_ms = (time.perf_counter() - started) * 1000
+
+        before, after = len(payload), len(processed)
+        pixels = f"{_dimensions(payload)} / {_dimensions(processed)}"
+        upload_before = before / bytes_per_second * 1000
+        upload_after = after / bytes_per_second * 1000
+        print(
+            f"{name:<20}{pixels:>24}{before / 1024:>12.0f}{after / 1024:>12.0f}{before / after:>8.1f}"
+            f"{prep_ms:>10.0f}{upload_before:>14.0f} / {upload_after:<10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -4,10 +4,22 @@ from .queue_status import QueueStatus
 from .document_node import DocumentNode
 from .ingestion_queue_item import IngestionQueueItem
 from .ingestion_log import IngestionLog
+from .indexed_content import IndexedContent
+from .source_file_state import SourceFileState
+from .ingestion_queue_item_history import IngestionQueueItemHistory
+from .ingestion_log_history import IngestionLogHistory
+from .ingestion_stage_metric import IngestionStageMetric
+from .model_call_record import ModelCallRecord
 
 __all__ = [
     QueueStatus,
     DocumentNode,
     IngestionQueueItem,
-    IngestionLog
+    IngestionLog,
+    IndexedContent,
+    SourceFileState,
+    IngestionQueueItemHistory,
+    IngestionLogHistory,
+    IngestionStageMetric,
+    ModelCallRecord
 ]
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+"""SQLAlchemy model remembering the content hashes already ingested into LightRAG."""
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..orm import Base
+
+class IndexedContent(Base):
+    """One row per distinct file content successfully indexed, keyed by its SHA-256 digest."""
+    __tablename__ = "indexed_content"
+
+    content_hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    ingestion_queue_item_id: Mapped[int | None] = mapped_column(
+        ForeignKey("ingestion_queue_item.id", ondelete="SET NULL"), nullable=True
+    )
+    storage_path: Mapped[str] = mapped_column(String(1024), nullable=False)
+    size_bytes: Mapped[int] = mapped_column(nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
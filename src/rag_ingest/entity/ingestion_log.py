@@ -32,3 +32,6 @@ class IngestionLog(Base):
     ingestion_queue_item: Mapped[IngestionQueueItem] = relationship(
         "IngestionQueueItem", back_populates="logs"
     )
+
+
+Index("ix_ingestion_log_queue_item", IngestionLog.ingestion_queue_item_id, IngestionLog.created_at)
@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+"""SQLAlchemy model holding the logs of archived queue items."""
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, Index, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..orm import Base
+
+
+class IngestionLogHistory(Base):
+    """Archived copy of an `IngestionLog`, keeping its original id."""
+    __tablename__ = "ingestion_log_history"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    ingestion_queue_item_id: Mapped[int] = mapped_column(nullable=False)
+    level: Mapped[str] = mapped_column(String(50), nullable=False)
+    message: Mapped[str] = mapped_column(Text, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+
+Index("ix_ingestion_log_history_queue_item", IngestionLogHistory.ingestion_queue_item_id, IngestionLogHistory.created_at)
@@ -5,7 +5,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import TYPE_CHECKING
 
-from sqlalchemy import DateTime, Enum, ForeignKey, String, Text, func
+from sqlalchemy import BigInteger, DateTime, Enum, ForeignKey, Index, String, Text, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from ..orm import Base
@@ -29,11 +29,24 @@ class IngestionQueueItem(Base):
         Enum(QueueStatus), default=QueueStatus.queued, nullable=False
     )
     rag_message: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Higher values are reserved first
+    priority: Mapped[int] = mapped_column(default=0, server_default="0", nullable=False)
+    # Estimated size of the job (file size in bytes unless the manager provides its own estimate)
+    estimated_cost: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    # Order within a priority: created_at deferred in proportion to the estimated cost, capped
+    scheduled_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    # Number of times the item was reserved; transient failures re-queue it until a maximum
+    attempt_count: Mapped[int] = mapped_column(default=0, server_default="0", nullable=False)
+    # Retry backoff: the item is not reserved again before this time
+    next_attempt_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    claimed_by: Mapped[str | None] = mapped_column(String(255), nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
     started_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     ended_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    lease_expires_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    heartbeat_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
 
     document: Mapped[DocumentNode | None] = relationship(
         "DocumentNode", back_populates="ingestion_queue_items"
@@ -41,3 +54,25 @@ class IngestionQueueItem(Base):
     logs: Mapped[list["IngestionLog"]] = relationship(
         "IngestionLog", back_populates="ingestion_queue_item", cascade="all, delete-orphan"
     )
+
+
+# Poll, recovery and archival queries all filter on status first
+Index("ix_ingestion_queue_item_status_created_at", IngestionQueueItem.status, IngestionQueueItem.created_at)
+Index("ix_ingestion_queue_item_status_started_at", IngestionQueueItem.status, IngestionQueueItem.started_at)
+Index("ix_ingestion_queue_item_status_lease", IngestionQueueItem.status, IngestionQueueItem.lease_expires_at)
+Index("ix_ingestion_queue_item_status_ended_at", IngestionQueueItem.status, IngestionQueueItem.ended_at)
+
+# Covers the reservation query (filter, sort, retry due date and selected id) so it never
+# touches the table rows. Items not scheduled yet sort by their creation time instead of
+# ahead of every scheduled item; the trailing columns of that expression keep the index
+# covering on SQLite versions that do not match expressions for it.
+Index(
+    "ix_ingestion_queue_item_run_order",
+    IngestionQueueItem.status,
+    IngestionQueueItem.priority.desc(),
+    func.coalesce(IngestionQueueItem.scheduled_at, IngestionQueueItem.created_at),
+    IngestionQueueItem.id,
+    IngestionQueueItem.next_attempt_at,
+    IngestionQueueItem.scheduled_at,
+    IngestionQueueItem.created_at,
+)
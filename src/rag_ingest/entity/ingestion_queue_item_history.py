@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+"""SQLAlchemy model holding finished queue items moved out of the hot queue table."""
+
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, Enum, Index, String, Text, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..orm import Base
+from .queue_status import QueueStatus
+
+
+class IngestionQueueItemHistory(Base):
+    """Archived copy of an indexed or failed `IngestionQueueItem`, keeping its original id."""
+    __tablename__ = "ingestion_queue_item_history"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    document_node_id: Mapped[int | None] = mapped_column(nullable=True)
+    storage_path: Mapped[str] = mapped_column(String(1024), nullable=False)
+    status: Mapped[QueueStatus] = mapped_column(Enum(QueueStatus), nullable=False)
+    rag_message: Mapped[str | None] = mapped_column(Text, nullable=True)
+    priority: Mapped[int] = mapped_column(nullable=False)
+    estimated_cost: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    scheduled_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    attempt_count: Mapped[int] = mapped_column(default=0, server_default="0", nullable=False)
+    next_attempt_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    claimed_by: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    lease_expires_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    heartbeat_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    started_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    ended_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    archived_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+
+Index("ix_ingestion_queue_item_history_document_node", IngestionQueueItemHistory.document_node_id)
+Index("ix_ingestion_queue_item_history_ended_at", IngestionQueueItemHistory.ended_at)
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+"""SQLAlchemy model storing how long each stage of a queue item attempt took."""
+
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, Float, Index, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..orm import Base
+
+
+class IngestionStageMetric(Base):
+    """Duration, call count and bytes processed by one stage (hash, parse, insert, llm, ...) of an attempt.
+
+    Rows are not tied to the queue item by a foreign key, so they outlive its archival.
+    """
+    __tablename__ = "ingestion_stage_metric"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    ingestion_queue_item_id: Mapped[int] = mapped_column(nullable=False)
+    attempt: Mapped[int] = mapped_column(default=1, server_default="1", nullable=False)
+    stage: Mapped[str] = mapped_column(String(32), nullable=False)
+    duration_seconds: Mapped[float] = mapped_column(Float, nullable=False)
+    call_count: Mapped[int] = mapped_column(default=1, server_default="1", nullable=False)
+    bytes_processed: Mapped[int] = mapped_column(BigInteger, default=0, server_default="0", nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+
+Index("ix_ingestion_stage_metric_queue_item", IngestionStageMetric.ingestion_queue_item_id)
+Index("ix_ingestion_stage_metric_stage_created_at", IngestionStageMetric.stage, IngestionStageMetric.created_at)
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+"""SQLAlchemy model accounting the tokens, latency and cost of each model call made for a queue item."""
+
+from datetime import datetime
+
+from sqlalchemy import Boolean, DateTime, Float, Index, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..orm import Base
+
+
+class ModelCallRecord(Base):
+    """One LLM, VLM or embedding call made while ingesting a queue item.
+
+    Token counts come from the provider usage when it reports one, and are estimated from
+    the text length otherwise (`tokens_estimated`). Like stage metrics, rows are not tied to
+    the queue item by a foreign key so they outlive its archival.
+    """
+    __tablename__ = "model_call_record"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    ingestion_queue_item_id: Mapped[int] = mapped_column(nullable=False)
+    attempt: Mapped[int] = mapped_column(default=1, server_default="1", nullable=False)
+    kind: Mapped[str] = mapped_column(String(16), nullable=False)
+    model: Mapped[str] = mapped_column(String(255), nullable=False, default="")
+    prompt_tokens: Mapped[int] = mapped_column(default=0, server_default="0", nullable=False)
+    completion_tokens: Mapped[int] = mapped_column(default=0, server_default="0", nullable=False)
+    tokens_estimated: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
+    latency_seconds: Mapped[float] = mapped_column(Float, nullable=False)
+    cache_hit: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    # Price from MODEL_PRICES; NULL for models without a configured price
+    cost: Mapped[float | None] = mapped_column(Float, nullable=True)
+    error: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+
+Index("ix_model_call_record_queue_item", ModelCallRecord.ingestion_queue_item_id)
+Index("ix_model_call_record_created_at", ModelCallRecord.created_at)
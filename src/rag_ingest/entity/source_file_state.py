@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+"""SQLAlchemy model recording the last ingested state of each shared storage file."""
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, Double, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..orm import Base
+
+class SourceFileState(Base):
+    """Size, mtime, content digest and LightRAG document id of a file as it was last ingested."""
+    __tablename__ = "source_file_state"
+
+    storage_path: Mapped[str] = mapped_column(String(768), primary_key=True)
+    size_bytes: Mapped[int] = mapped_column(nullable=False)
+    # Double precision: MySQL FLOAT keeps ~7 digits, not enough for an epoch with sub-second precision
+    mtime: Mapped[float] = mapped_column(Double, nullable=False)
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=False, index=True)
+    doc_id: Mapped[str] = mapped_column(String(128), nullable=False, index=True)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
+    )
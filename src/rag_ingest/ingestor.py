@@ -1,10 +1,20 @@
-"""CLI entrypoint to ingest a single source into the LightRAG store."""
+"""CLI entrypoint to ingest a file or a whole directory tree into the LightRAG store."""
 
 import argparse
 import asyncio
+import sys
+import time
+from fnmatch import fnmatch
 from pathlib import Path
+from typing import Awaitable, Callable, Optional, TextIO
 
+from .manifest import IngestManifest
 from .services import llm_model_func, embedding_func, vision_model_func, RAGProvider
+from .services.description_cache import close_image_description_cache
+from .services.embedding_cache import close_embedding_cache
+from .services.model_client import close_gateways
+from .services.parser_pool import close_parser_pool
+from .services.utils import compute_content_hash, document_id_for
 
 def build_parser() -> argparse.ArgumentParser:
     """Define CLI arguments for ingesting files or directories."""
@@ -22,26 +32,239 @@ def build_parser() -> argparse.ArgumentParser:
         default=Path("rag_storage"),
         help="Target directory for LightRAG storage (default: rag_storage).",
     )
+    parser.add_argument(
+        "--include",
+        action="append",
+        default=None,
+        metavar="GLOB",
+        help="Only ingest files whose path relative to the source matches this glob (repeatable, default: all files).",
+    )
+    parser.add_argument(
+        "--exclude",
+        action="append",
+        default=[],
+        metavar="GLOB",
+        help="Skip files whose path relative to the source matches this glob (repeatable).",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Number of documents processed at the same time when ingesting a directory (default: 1).",
+    )
+    parser.add_argument(
+        "--keep-missing",
+        action="store_true",
+        help="Keep the documents of previously ingested files that no longer exist in the source directory.",
+    )
+    parser.add_argument(
+        "--manifest",
+        type=Path,
+        default=None,
+        help="File-state manifest enabling incremental runs (default: <storage-dir>/ingest_manifest.jsonl).",
+    )
     return parser
 
-async def ingest(argv: list[str] | None = None) -> int:
-    """Run the ingestion flow for a provided filesystem path."""
+
+def _matches(relative_path: str, patterns: list[str]) -> bool:
+    # `*.pdf` should match at any depth, not only at the root of the source directory
+    name = relative_path.rsplit("/", 1)[-1]
+    return any(fnmatch(relative_path, pattern) or fnmatch(name, pattern) for pattern in patterns)
+
+
+def collect_files(source_dir: Path, include: Optional[list[str]] = None, exclude: Optional[list[str]] = None) -> list[Path]:
+    """Walk `source_dir` and return the files selected by the include/exclude globs, sorted."""
+    selected = []
+    for path in sorted(source_dir.rglob("*")):
+        if not path.is_file():
+            continue
+        relative_path = path.relative_to(source_dir).as_posix()
+        if include and not _matches(relative_path, include):
+            continue
+        if exclude and _matches(relative_path, exclude):
+            continue
+        selected.append(path)
+    return selected
+
+
+class ProgressReporter:
+    """Single status line showing processed/unchanged/failed counts and throughput in documents per minute."""
+
+    def __init__(self, total: int, stream: TextIO = sys.stderr):
+        """Start the throughput clock for `total` documents."""
+        self.total = total
+        self.stream = stream
+        self.done = 0
+        self.unchanged = 0
+        self.failed = 0
+        self.removed = 0
+        self.started_at = time.monotonic()
+
+    @property
+    def docs_per_minute(self) -> float:
+        elapsed = time.monotonic() - self.started_at
+        return (self.done + self.failed) * 60 / elapsed if elapsed > 0 else 0.0
+
+    def update(self, status: str) -> None:
+        """Account for one finished document (`done`, `unchanged` or `failed`) and refresh the status line."""
+        setattr(self, status, getattr(self, status) + 1)
+        self.stream.write(
+            f"\r[{self.done + self.unchanged + self.failed}/{self.total}] "
+            f"{self.unchanged} unchanged, {self.failed} failed, {self.docs_per_minute:.1f} docs/min"
+        )
+        self.stream.flush()
+
+    def finish(self) -> None:
+        self.stream.write("\n")
+        self.stream.flush()
+
+
+async def _release_document(rag: RAGProvider, manifest: IngestManifest, key: str) -> None:
+    """Delete the document built from a file unless another tracked file still uses it."""
+    doc_id = manifest.entries.get(key, {}).get("doc_id")
+    if doc_id and not manifest.references(doc_id, exclude_path=key):
+        await rag.delete_document(doc_id)
+
+
+async def ingest_directory(
+    rag: RAGProvider,
+    source_dir: Path,
+    files: list[Path],
+    manifest: IngestManifest,
+    concurrency: int = 1,
+    progress: Optional[ProgressReporter] = None,
+    prune: bool = True,
+) -> ProgressReporter:
+    """Ingest `files` with up to `concurrency` documents in flight on the shared RAG provider.
+
+    Files whose size and mtime (or content hash) match their manifest entry are skipped;
+    modified files replace the document built from their previous version. With `prune`,
+    documents of tracked files under `source_dir` that no longer exist are deleted. Every
+    outcome is appended to the manifest as soon as it is known so an interrupted run
+    resumes where it stopped.
+    """
+    progress = progress or ProgressReporter(len(files))
+    queue: asyncio.Queue[Path] = asyncio.Queue()
+    for path in files:
+        queue.put_nowait(path)
+
+    async def _run_one() -> None:
+        while True:
+            try:
+                path = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            key = str(path.resolve())
+            previous = manifest.entries.get(key)
+            try:
+                file_stat = path.stat()
+                unchanged = manifest.is_unchanged(key, file_stat.st_size, file_stat.st_mtime)
+                content_hash = None if unchanged else await asyncio.to_thread(compute_content_hash, path)
+            except Exception as exc:
+                # Removed or unreadable since it was listed
+                print(f"\nFailed to read {path}: {exc}", file=progress.stream)
+                manifest.record(key, "failed", error=str(exc), doc_id=previous.get("doc_id") if previous else None)
+                progress.update("failed")
+                continue
+            if unchanged:
+                progress.update("unchanged")
+                continue
+
+            state = {"size": file_stat.st_size, "mtime": file_stat.st_mtime, "content_hash": content_hash}
+            if manifest.is_done(key) and previous.get("content_hash") == content_hash:
+                # Touched but identical: refresh the mtime so the next run skips hashing
+                manifest.record(key, "done", **state, doc_id=previous.get("doc_id"))
+                progress.update("unchanged")
+                continue
+
+            doc_id = document_id_for(content_hash)
+            stale_doc_id = previous.get("doc_id") if previous is not None else None
+            try:
+                if stale_doc_id is not None and stale_doc_id != doc_id:
+                    await _release_document(rag, manifest, key)
+                stale_doc_id = None
+                await rag.rag_anything.process_document_complete(file_path=path, doc_id=doc_id)
+            except Exception as exc:
+                print(f"\nFailed to ingest {path}: {exc}", file=progress.stream)
+                # Keep a document that could not be deleted tracked so the next run retries
+                manifest.record(key, "failed", error=str(exc), **state, doc_id=stale_doc_id)
+                progress.update("failed")
+            else:
+                manifest.record(key, "done", **state, doc_id=doc_id)
+                progress.update("done")
+
+    await asyncio.gather(*(_run_one() for _ in range(max(1, min(concurrency, len(files))))))
+
+    root = source_dir.resolve()
+    if prune and not any(root.iterdir()):
+        # An empty source is more likely an unmounted share than a deliberate removal of everything
+        print(f"\n{root} is empty, not deleting the documents of its tracked files", file=progress.stream)
+    elif prune:
+        missing = [
+            key
+            for key in list(manifest.entries)
+            if Path(key).is_relative_to(root) and not Path(key).is_file()
+        ]
+        for key in missing:
+            try:
+                await _release_document(rag, manifest, key)
+            except Exception as exc:
+                # Stays tracked, the next run retries
+                print(f"\nFailed to delete the document of removed file {key}: {exc}", file=progress.stream)
+                progress.failed += 1
+                continue
+            manifest.remove(key)
+            progress.removed += 1
+    return progress
+
+
+async def ingest(
+    argv: list[str] | None = None,
+    rag_provider_factory: Optional[Callable[[Path], Awaitable[RAGProvider]]] = None,
+) -> int:
+    """Run the ingestion flow for a provided file or directory."""
     parser = build_parser()
     args = parser.parse_args(argv)
 
     source_path: Path = args.source
     storage_dir: Path = args.storage_dir
+    rag_provider_factory = rag_provider_factory or (lambda path: RAGProvider(path))
 
     if not source_path.exists():
         parser.error(f"Source '{source_path}' does not exist.")
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1.")
 
-    rag = await RAGProvider(storage_dir)
-    
-    await rag.rag_anything.process_document_complete(
-        file_path=source_path,
-    )
+    if source_path.is_dir():
+        source_dir, files = source_path, collect_files(source_path, args.include, args.exclude)
+    else:
+        source_dir, files = source_path.parent, [source_path]
+
+    rag = await rag_provider_factory(storage_dir)
+    manifest = IngestManifest(args.manifest or storage_dir / "ingest_manifest.jsonl")
 
-    print('Great Success')
+    try:
+        progress = await ingest_directory(
+            rag,
+            source_dir,
+            files,
+            manifest,
+            args.concurrency,
+            prune=source_path.is_dir() and not args.keep_missing,
+        )
+    finally:
+        manifest.close()
+        await close_gateways()
+        close_parser_pool()
+        close_embedding_cache()
+        close_image_description_cache()
+
+    progress.finish()
+    print(
+        f"{progress.done} ingested, {progress.unchanged} unchanged, "
+        f"{progress.failed} failed, {progress.removed} removed"
+    )
+    return 1 if progress.failed else 0
 
 def main() -> int:
     """Synchronous wrapper to launch the async ingest coroutine."""
@@ -0,0 +1,89 @@
+"""Append-only JSONL manifest recording the state of each file ingested by the CLI."""
+
+import json
+from pathlib import Path
+from typing import Optional
+
+
+class IngestManifest:
+    """Remember which files were ingested, and in which state, across runs.
+
+    Entries are keyed by absolute path and carry the size, mtime, content hash and LightRAG
+    document id of the ingested version, so later runs can skip unchanged files and replace
+    or delete the documents of modified or removed ones.
+
+    Every change is appended as one JSON line and flushed immediately; when the manifest
+    is reloaded the last line recorded for a path wins. A crash can therefore lose at most
+    the entry being written.
+    """
+
+    def __init__(self, path: Path):
+        """Load the existing entries (if any) and open the file for appending."""
+        self.path = Path(path)
+        self.entries: dict[str, dict] = {}
+        line_count = 0
+        if self.path.exists():
+            with self.path.open("r", encoding="utf-8") as handle:
+                for line in handle:
+                    line_count += 1
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Partial last line of an interrupted run
+                        continue
+                    if entry.get("status") == "deleted":
+                        self.entries.pop(entry["path"], None)
+                    else:
+                        self.entries[entry["path"]] = entry
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if line_count > 2 * len(self.entries) + 100:
+            self._compact()
+        self._handle = self.path.open("a", encoding="utf-8")
+
+    def is_done(self, path: str) -> bool:
+        """Whether the file was already ingested successfully."""
+        entry = self.entries.get(path)
+        return entry is not None and entry.get("status") == "done"
+
+    def is_unchanged(self, path: str, size: int, mtime: float) -> bool:
+        """Whether the file was ingested successfully with this exact size and mtime."""
+        entry = self.entries.get(path)
+        return self.is_done(path) and entry.get("size") == size and entry.get("mtime") == mtime
+
+    def references(self, doc_id: str, exclude_path: Optional[str] = None) -> int:
+        """Number of ingested files (other than `exclude_path`) whose document is `doc_id`."""
+        return sum(
+            1
+            for path, entry in self.entries.items()
+            if path != exclude_path and entry.get("status") == "done" and entry.get("doc_id") == doc_id
+        )
+
+    def record(self, path: str, status: str, error: Optional[str] = None, **fields) -> dict:
+        """Append the outcome of a file and return the stored entry."""
+        entry = {"path": path, "status": status, **fields}
+        if error is not None:
+            entry["error"] = error
+        self.entries[path] = entry
+        self._write(entry)
+        return entry
+
+    def remove(self, path: str) -> None:
+        """Forget a file, e.g. once the document built from it was deleted."""
+        self.entries.pop(path, None)
+        self._write({"path": path, "status": "deleted"})
+
+    def _compact(self) -> None:
+        """Rewrite the file with one line per live entry, replacing it atomically."""
+        compacted = self.path.with_name(self.path.name + ".tmp")
+        with compacted.open("w", encoding="utf-8") as handle:
+            for entry in self.entries.values():
+                handle.write(json.dumps(entry) + "\n")
+        compacted.replace(self.path)
+
+    def _write(self, entry: dict) -> None:
+        self._handle.write(json.dumps(entry) + "\n")
+        self._handle.flush()
+
+    def close(self) -> None:
+        """Close the underlying file."""
+        self._handle.close()
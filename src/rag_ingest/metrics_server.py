@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+"""Local HTTP endpoint serving the worker metrics in Prometheus text format."""
+
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+from .orm.db import TimedQueuePool
+from .services.utils.prometheus import (
+    DB_POOL_CHECKED_OUT,
+    DB_POOL_CHECKOUT,
+    DB_POOL_OVERFLOW,
+    DB_ROUND_TRIP,
+    REGISTRY,
+    Registry,
+)
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def parse_address(address: str) -> tuple[str, int]:
+    """Turn `host:port` or `:port` into a (host, port) pair, binding to localhost by default."""
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+class MetricsServer:
+    """Minimal HTTP server answering `GET /metrics`; anything else gets a 404."""
+
+    def __init__(self, address: str, registry: Registry = REGISTRY):
+        """Store the `host:port` to bind; call `start` from within the running loop."""
+        self.address = address
+        self.registry = registry
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> "MetricsServer":
+        """Bind the listening socket on the running event loop."""
+        host, port = parse_address(self.address)
+        self._server = await asyncio.start_server(self._handle, host, port)
+        logger.info("Serving Prometheus metrics on http://%s:%s/metrics", host, port)
+        return self
+
+    @property
+    def port(self) -> int:
+        """Port actually bound, useful when the address asked for port 0."""
+        return self._server.sockets[0].getsockname()[1]
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+            # Drain the headers; the request has no body
+            while (await asyncio.wait_for(reader.readline(), timeout=5)) not in (b"\r\n", b"\n", b""):
+                pass
+            method, path, *_ = request_line.decode("latin-1").split() + ["", ""]
+            if method == "GET" and path.split("?", 1)[0] == "/metrics":
+                # Collectors may query the database: keep them off the event loop
+                await asyncio.to_thread(self.registry.collect)
+                status, body = "200 OK", self.registry.render().encode("utf-8")
+            else:
+                status, body = "404 Not Found", b"Not Found\n"
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: {CONTENT_TYPE}\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body
+            )
+            await writer.drain()
+        except Exception:
+            logger.exception("Failed to serve a metrics request")
+        finally:
+            writer.close()
+
+    async def close(self) -> None:
+        """Stop listening."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("rag_ingest_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    DB_ROUND_TRIP.observe(time.perf_counter() - conn.info["rag_ingest_query_start"].pop())
+
+
+def _handle_error(exception_context):
+    # Failed statements never reach after_cursor_execute
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("rag_ingest_query_start"):
+        connection.info["rag_ingest_query_start"].pop()
+
+
+def _observe_checkout(seconds: float) -> None:
+    DB_POOL_CHECKOUT.observe(seconds)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Observe the duration of every statement `engine` sends in `rag_ingest_db_round_trip_seconds`.
+
+    The connections in use and in overflow of its pool are read at scrape time, and the
+    checkouts of a `TimedQueuePool` are timed in `rag_ingest_db_pool_checkout_seconds`.
+    """
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+    if isinstance(engine.pool, QueuePool):
+        # `engine.pool` is replaced when the engine is disposed: look it up on every scrape
+        DB_POOL_CHECKED_OUT.set_function(lambda: engine.pool.checkedout())
+        # Negative while the pool still has room below pool_size
+        DB_POOL_OVERFLOW.set_function(lambda: max(0, engine.pool.overflow()))
+    if isinstance(engine.pool, TimedQueuePool) and _observe_checkout not in engine.pool.checkout_listeners:
+        engine.pool.checkout_listeners.append(_observe_checkout)
@@ -0,0 +1,118 @@
+"""CLI entrypoint bringing an existing database up to the current ingestion schema.
+
+`create_all` only creates missing tables: the columns and indexes added to tables that
+already exist (e.g. the leases, retries and scheduling columns of the shared
+`ingestion_queue_item` table and of its `ingestion_queue_item_history` archive) have to
+be added with `ALTER TABLE` / `CREATE INDEX`.
+The migration compares the database with the mapped schema, so it is idempotent: running
+it again on an up-to-date database does nothing.
+"""
+
+import argparse
+from typing import Optional
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateColumn, CreateIndex
+
+from . import entity  # noqa: F401 - registers every table on Base.metadata
+from .orm import Base, get_engine
+
+# Columns whose type changed after their table shipped, as (table, column)
+WIDENED_COLUMNS = {("source_file_state", "mtime")}
+
+# Indexes superseded by a mapped index under another name, as (table, index)
+REPLACED_INDEXES = {("ingestion_queue_item", "ix_ingestion_queue_item_schedule")}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Define CLI arguments for the schema migration."""
+    parser = argparse.ArgumentParser(
+        description="Add the missing ingestion tables, columns and indexes to the configured database."
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Print the statements that would be run on existing tables without running them.",
+    )
+    return parser
+
+
+def existing_index_names(engine: Engine, table_name: str) -> set[str]:
+    """Names of the indexes of `table_name`, expression-based ones included.
+
+    SQLAlchemy's reflection skips expression indexes on SQLite and MySQL, so the catalog
+    is read directly there.
+    """
+    if engine.dialect.name == "sqlite":
+        query = "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :table AND name IS NOT NULL"
+    elif engine.dialect.name in ("mysql", "mariadb"):
+        query = (
+            "SELECT DISTINCT index_name FROM information_schema.statistics "
+            "WHERE table_schema = DATABASE() AND table_name = :table"
+        )
+    else:
+        return {index["name"] for index in inspect(engine).get_indexes(table_name)}
+    with engine.connect() as connection:
+        return set(connection.execute(text(query), {"table": table_name}).scalars())
+
+
+def pending_statements(engine: Engine) -> list[str]:
+    """DDL statements bringing the existing tables of the database up to the mapped schema.
+
+    Missing tables are left to `create_all`, which creates them with their indexes.
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    dialect = engine.dialect
+    statements = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        table_name = dialect.identifier_preparer.format_table(table)
+        columns = {column["name"]: column for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            definition = CreateColumn(column).compile(dialect=dialect)
+            if column.name not in columns:
+                statements.append(f"ALTER TABLE {table_name} ADD COLUMN {definition}")
+            elif (
+                (table.name, column.name) in WIDENED_COLUMNS
+                and dialect.name in ("mysql", "mariadb")
+                and columns[column.name]["type"].compile(dialect=dialect) != column.type.compile(dialect=dialect)
+            ):
+                # SQLite stores every float as an 8-byte REAL already
+                statements.append(f"ALTER TABLE {table_name} MODIFY {definition}")
+        # Added after the columns they cover
+        index_names = existing_index_names(engine, table.name)
+        for replaced_table, index_name in sorted(REPLACED_INDEXES):
+            if replaced_table == table.name and index_name in index_names:
+                drop = f"DROP INDEX {dialect.identifier_preparer.quote(index_name)}"
+                if dialect.name in ("mysql", "mariadb"):
+                    drop += f" ON {table_name}"
+                statements.append(drop)
+        for index in table.indexes:
+            if index.name not in index_names:
+                statements.append(str(CreateIndex(index).compile(dialect=dialect)))
+    return statements
+
+
+def upgrade_schema(url: Optional[str] = None) -> list[str]:
+    """Alter the existing tables, then create the missing ones. Returns the statements run on existing tables."""
+    engine = get_engine(url)
+    statements = pending_statements(engine)
+    with engine.begin() as connection:
+        for statement in statements:
+            connection.execute(text(statement))
+    Base.metadata.create_all(engine)
+    return statements
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Run (or print, with `--dry-run`) the schema migration."""
+    args = build_parser().parse_args(argv)
+    statements = pending_statements(get_engine()) if args.dry_run else upgrade_schema()
+    for statement in statements:
+        print(f"{statement};")
+    if not statements:
+        print("Existing tables are up to date.")
+    return 0
@@ -0,0 +1,413 @@
+from __future__ import annotations
+
+"""Local stand-in for the OpenAI and Ollama model APIs, used to load-test ingestion offline."""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import random
+import re
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from .metrics_server import parse_address
+from .services.model_client import TokenBucket, estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+TUPLE_DELIMITER = "<|#|>"
+COMPLETION_DELIMITER = "<|COMPLETE|>"
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 429: "Too Many Requests", 500: "Internal Server Error"}
+
+
+@dataclass
+class StubSettings:
+    """Behaviour of the stand-in models; latencies are log-normal around their median."""
+
+    latency_ms: float = 500.0
+    ms_per_output_token: float = 0.0
+    embedding_latency_ms: float = 20.0
+    latency_spread: float = 0.5
+    error_rate_429: float = 0.0
+    error_rate_500: float = 0.0
+    requests_per_minute: float = 0.0
+    max_concurrency: int = 0
+    embedding_dim: int = 768
+    entities_per_chunk: int = 4
+    seed: int = 0
+
+
+def canned_completion(messages: list[dict], json_mode: bool = False, entities: int = 4) -> str:
+    """Deterministic answer shaped like what LightRAG expects for the prompt it sent."""
+    prompt = "\n".join(_message_text(message) for message in messages)
+    if json_mode or "high_level_keywords" in prompt:
+        words = _top_words(prompt, 4)
+        return json.dumps({"high_level_keywords": words[:2], "low_level_keywords": words[2:]})
+    if "missed or incorrectly formatted" in prompt:
+        # Gleaning pass: nothing was missed
+        return COMPLETION_DELIMITER
+    if "<Input Text>" in prompt and TUPLE_DELIMITER in prompt:
+        return _extraction(_between(prompt, "<Input Text>\n```", "```"), entities)
+    if "Description List:" in prompt:
+        return _between(prompt, "Description List:", "---Output---").strip(" \n`")[:400]
+    return "Stub answer: " + " ".join(_top_words(prompt, 8))
+
+
+def _message_text(message: dict) -> str:
+    content = message.get("content") or ""
+    if isinstance(content, list):
+        # Vision messages: keep the text parts, images only count as a placeholder
+        return "\n".join(part.get("text", "[image]") for part in content if isinstance(part, dict))
+    return str(content)
+
+
+def _between(text: str, start: str, end: str) -> str:
+    _, found, tail = text.rpartition(start)
+    return tail.split(end, 1)[0] if found else text
+
+
+def _top_words(text: str, count: int) -> list[str]:
+    words = Counter(word.lower() for word in re.findall(r"[A-Za-z][A-Za-z-]{4,}", text))
+    return [word for word, _ in sorted(words.items(), key=lambda item: (-item[1], item[0]))[:count]]
+
+
+def _extraction(text: str, count: int) -> str:
+    names = [word.title() for word in _top_words(text, count)]
+    lines = [
+        TUPLE_DELIMITER.join(("entity", name, "Concept", f"{name} is discussed in the input text."))
+        for name in names
+    ]
+    lines += [
+        TUPLE_DELIMITER.join(("relation", source, target, "related", f"{source} is mentioned with {target}."))
+        for source, target in zip(names, names[1:])
+    ]
+    return "\n".join(lines + [COMPLETION_DELIMITER])
+
+
+def stub_embedding(text: str, dim: int) -> list[float]:
+    """Unit vector of `dim` floats derived from the text hash: identical texts, identical vectors."""
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+    vector = np.random.default_rng(seed).standard_normal(dim)
+    return (vector / np.linalg.norm(vector)).round(6).tolist()
+
+
+class ModelStubServer:
+    """HTTP/1.1 keep-alive server answering the endpoints the providers call.
+
+    - `POST /v1/chat/completions` and `POST /api/chat`: canned completions with token usage
+    - `POST /v1/embeddings` and `POST /api/embed` (`/api/embeddings`): fixed-dimension vectors
+    - `GET /v1/models`, `GET /api/tags`: the models seen so far
+    - `GET /stats`: request and status counts, for checking a load test
+
+    Errors are injected before the simulated latency, like a gateway rejecting a request.
+    """
+
+    def __init__(self, address: str = "127.0.0.1:0", settings: Optional[StubSettings] = None):
+        """Store the `host:port` to bind and the stub behaviour; call `start` from the running loop."""
+        self.address = address
+        self.settings = settings or StubSettings()
+        self.requests: Counter[str] = Counter()
+        self.statuses: Counter[int] = Counter()
+        self.models: set[str] = set()
+        self._rng = random.Random(self.settings.seed)
+        self._bucket = (
+            TokenBucket(self.settings.requests_per_minute) if self.settings.requests_per_minute > 0 else None
+        )
+        self._slots = asyncio.Semaphore(self.settings.max_concurrency) if self.settings.max_concurrency > 0 else None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: set[asyncio.StreamWriter] = set()
+
+    async def start(self) -> "ModelStubServer":
+        """Bind the listening socket on the running event loop."""
+        host, port = parse_address(self.address)
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return self
+
+    @property
+    def port(self) -> int:
+        """Port actually bound, useful when the address asked for port 0."""
+        return self._server.sockets[0].getsockname()[1]
+
+    @property
+    def base_url(self) -> str:
+        host = self._server.sockets[0].getsockname()[0]
+        return f"http://{host}:{self.port}"
+
+    def environment(self, llm_model: str = "stub-llm", embedding_model: str = "stub-embedding") -> dict[str, str]:
+        """Environment variables pointing the LLM, VLM and embedding providers at this server."""
+        return {
+            "OPENAI_API_KEY": "stub",
+            "OPENAI_BASE_URL": f"{self.base_url}/v1",
+            "OPENAI_API_BASE": f"{self.base_url}/v1",
+            "OLLAMA_HOST": self.base_url,
+            "LLM_MODEL": llm_model,
+            "EMBEDDING_MODEL": embedding_model,
+            "EMBEDDING_DIM": str(self.settings.embedding_dim),
+        }
+
+    async def close(self) -> None:
+        """Stop listening."""
+        if self._server is not None:
+            self._server.close()
+            # Pooled clients keep their connections open; drop them so the server can shut down
+            for writer in list(self._connections):
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._connections.add(writer)
+        try:
+            while True:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                status, payload, extra_headers = await self.dispatch(method, path, body)
+                data = json.dumps(payload).encode("utf-8")
+                head = [f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}", "Content-Type: application/json"]
+                head += [f"{name}: {value}" for name, value in extra_headers.items()]
+                head.append(f"Content-Length: {len(data)}")
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + data)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception:
+            logger.exception("Model stub failed to serve a request")
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+    async def dispatch(self, method: str, path: str, body: bytes) -> tuple[int, dict, dict[str, str]]:
+        """Answer one request: (status, JSON payload, extra headers)."""
+        path = path.split("?", 1)[0].rstrip("/")
+        self.requests[f"{method} {path}"] += 1
+        if method == "GET":
+            if path in ("/v1/models", "/api/tags"):
+                models = sorted(self.models)
+                return self._reply(
+                    200,
+                    {
+                        "object": "list",
+                        "data": [{"id": model, "object": "model"} for model in models],
+                        "models": [{"name": model, "model": model} for model in models],
+                    },
+                )
+            if path == "/stats":
+                return self._reply(200, {"requests": dict(self.requests), "statuses": dict(self.statuses)})
+            return self._reply(404, {"error": {"message": f"Unknown path {path}"}})
+
+        handlers = {
+            "/v1/chat/completions": self._openai_chat,
+            "/v1/embeddings": self._openai_embeddings,
+            "/api/chat": self._ollama_chat,
+            "/api/embed": self._ollama_embed,
+            "/api/embeddings": self._ollama_embed,
+        }
+        handler = handlers.get(path) if method == "POST" else None
+        if handler is None:
+            return self._reply(404, {"error": {"message": f"Unknown endpoint {method} {path}"}})
+        try:
+            request = json.loads(body or b"{}")
+        except ValueError:
+            return self._reply(400, {"error": {"message": "Body is not valid JSON"}})
+        if request.get("model"):
+            self.models.add(request["model"])
+
+        rejected = self._inject_error()
+        if rejected is not None:
+            return rejected
+        if self._slots is None:
+            return self._reply(200, await handler(request))
+        async with self._slots:
+            return self._reply(200, await handler(request))
+
+    def _reply(self, status: int, payload: dict, headers: Optional[dict[str, str]] = None):
+        self.statuses[status] += 1
+        return status, payload, headers or {}
+
+    def _inject_error(self):
+        if self._bucket is not None:
+            wait = self._bucket.try_acquire(1)
+            if wait > 0:
+                return self._reply(
+                    429,
+                    {"error": {"message": "Rate limit reached", "type": "rate_limit_exceeded"}},
+                    {"Retry-After": str(math.ceil(wait))},
+                )
+        draw = self._rng.random()
+        if draw < self.settings.error_rate_429:
+            return self._reply(
+                429, {"error": {"message": "Injected rate limit", "type": "rate_limit_exceeded"}}, {"Retry-After": "1"}
+            )
+        if draw < self.settings.error_rate_429 + self.settings.error_rate_500:
+            return self._reply(500, {"error": {"message": "Injected server error", "type": "server_error"}})
+        return None
+
+    async def _sleep(self, median_ms: float, extra_ms: float = 0.0) -> None:
+        delay = median_ms * math.exp(self._rng.gauss(0, self.settings.latency_spread)) if median_ms > 0 else 0.0
+        if delay + extra_ms > 0:
+            await asyncio.sleep((delay + extra_ms) / 1000)
+
+    async def _complete(self, request: dict) -> tuple[str, int, int]:
+        messages = request.get("messages") or []
+        content = canned_completion(
+            messages, json_mode=bool(request.get("response_format")), entities=self.settings.entities_per_chunk
+        )
+        prompt_tokens = estimate_tokens([_message_text(message) for message in messages])
+        completion_tokens = estimate_tokens(content)
+        await self._sleep(self.settings.latency_ms, completion_tokens * self.settings.ms_per_output_token)
+        return content, prompt_tokens, completion_tokens
+
+    async def _openai_chat(self, request: dict) -> dict:
+        content, prompt_tokens, completion_tokens = await self._complete(request)
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", ""),
+            "choices": [
+                {"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    async def _ollama_chat(self, request: dict) -> dict:
+        content, prompt_tokens, completion_tokens = await self._complete(request)
+        return {
+            "model": request.get("model", ""),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "message": {"role": "assistant", "content": content},
+            "done": True,
+            "done_reason": "stop",
+            "prompt_eval_count": prompt_tokens,
+            "eval_count": completion_tokens,
+        }
+
+    async def _embed(self, texts: list[str]) -> list[list[float]]:
+        await self._sleep(self.settings.embedding_latency_ms)
+        return [stub_embedding(text, self.settings.embedding_dim) for text in texts]
+
+    async def _openai_embeddings(self, request: dict) -> dict:
+        texts = request.get("input") or []
+        texts = [texts] if isinstance(texts, str) else texts
+        vectors = await self._embed(texts)
+        tokens = estimate_tokens(texts)
+        return {
+            "object": "list",
+            "model": request.get("model", ""),
+            "data": [
+                {"object": "embedding", "index": index, "embedding": vector} for index, vector in enumerate(vectors)
+            ],
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        }
+
+    async def _ollama_embed(self, request: dict) -> dict:
+        texts = request.get("input", request.get("prompt")) or []
+        single = isinstance(texts, str)
+        vectors = await self._embed([texts] if single else texts)
+        if "prompt" in request and "input" not in request:
+            # Legacy /api/embeddings answers a single `embedding`
+            return {"embedding": vectors[0]}
+        return {"model": request.get("model", ""), "embeddings": vectors, "prompt_eval_count": estimate_tokens(texts)}
+
+
+async def _read_request(reader: asyncio.StreamReader):
+    """Read one request from a keep-alive connection; None once the client hung up."""
+    request_line = await reader.readline()
+    if not request_line.strip():
+        return None
+    method, path, *_ = request_line.decode("latin-1").split() + ["", ""]
+    headers = {}
+    while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length") or 0)
+    body = await reader.readexactly(length) if length else b""
+    return method, path, headers, body
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Define CLI arguments for the model stand-in server."""
+    defaults = StubSettings()
+    parser = argparse.ArgumentParser(
+        description="Serve stand-in OpenAI/Ollama chat and embedding endpoints for offline load tests."
+    )
+    parser.add_argument("--address", default="127.0.0.1:11435", help="host:port to listen on (default: 127.0.0.1:11435).")
+    parser.add_argument("--latency-ms", type=float, default=defaults.latency_ms, help="Median chat completion latency.")
+    parser.add_argument(
+        "--ms-per-output-token",
+        type=float,
+        default=defaults.ms_per_output_token,
+        help="Extra chat latency per completion token, to mimic generation speed.",
+    )
+    parser.add_argument(
+        "--embedding-latency-ms", type=float, default=defaults.embedding_latency_ms, help="Median embedding latency."
+    )
+    parser.add_argument(
+        "--latency-spread",
+        type=float,
+        default=defaults.latency_spread,
+        help="Sigma of the log-normal latency distribution (0 for fixed latencies).",
+    )
+    parser.add_argument("--error-rate-429", type=float, default=0.0, help="Share of requests rejected with 429.")
+    parser.add_argument("--error-rate-500", type=float, default=0.0, help="Share of requests failed with 500.")
+    parser.add_argument("--rpm", type=float, default=0.0, help="Requests per minute before answering 429 (0: unlimited).")
+    parser.add_argument(
+        "--max-concurrency", type=int, default=0, help="Requests served at once, the others wait (0: unlimited)."
+    )
+    parser.add_argument(
+        "--entities", type=int, default=defaults.entities_per_chunk, help="Entities in each canned extraction."
+    )
+    parser.add_argument("--embedding-dim", type=int, default=defaults.embedding_dim)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    return parser
+
+
+async def serve(args: argparse.Namespace) -> None:
+    """Run the server until interrupted, printing the environment to point the providers at it."""
+    settings = StubSettings(
+        latency_ms=args.latency_ms,
+        ms_per_output_token=args.ms_per_output_token,
+        embedding_latency_ms=args.embedding_latency_ms,
+        latency_spread=args.latency_spread,
+        error_rate_429=args.error_rate_429,
+        error_rate_500=args.error_rate_500,
+        requests_per_minute=args.rpm,
+        max_concurrency=args.max_concurrency,
+        embedding_dim=args.embedding_dim,
+        entities_per_chunk=args.entities,
+        seed=args.seed,
+    )
+    server = await ModelStubServer(args.address, settings).start()
+    print(f"Model stub listening on {server.base_url}; point the providers at it with:")
+    for name, value in server.environment().items():
+        print(f"export {name}={value}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Synchronous wrapper to launch the stand-in server."""
+    args = build_parser().parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
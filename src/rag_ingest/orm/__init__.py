@@ -1,12 +1,15 @@
 """Convenience imports for ORM primitives and configuration helpers."""
 
-from .db import Base, get_engine, get_session_maker, create_schema
+from .db import Base, get_engine, get_session_maker, create_schema, dispose_engines
 from .config import Config
+from .db_executor import DbExecutor
 
 __all__ = [
     Base,
     get_engine,
     get_session_maker,
     create_schema,
-    Config
+    dispose_engines,
+    Config,
+    DbExecutor
 ]
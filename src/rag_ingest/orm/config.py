@@ -3,6 +3,7 @@ from __future__ import annotations
 """Environment-backed configuration helpers for database and storage paths."""
 
 import os
+import socket
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -22,6 +23,31 @@ class Config():
         return f"mysql+pymysql://{user}:{password}@{host}:{port}/{database}"
 
 
+    def get_db_pool_size() -> int:
+        """Connections kept open in the pool of each database engine."""
+        return max(1, int(os.getenv("DB_POOL_SIZE", 5)))
+
+
+    def get_db_max_overflow() -> int:
+        """Extra connections an engine may open beyond `DB_POOL_SIZE` under load (-1 for no limit)."""
+        return int(os.getenv("DB_MAX_OVERFLOW", 10))
+
+
+    def get_db_pool_timeout_seconds() -> float:
+        """Time in seconds a checkout waits for a free connection before failing."""
+        return float(os.getenv("DB_POOL_TIMEOUT", 30))
+
+
+    def get_db_pool_recycle_seconds() -> int:
+        """Age in seconds after which a pooled connection is replaced, below MySQL's `wait_timeout` (-1 to disable)."""
+        return int(os.getenv("DB_POOL_RECYCLE", 3600))
+
+
+    def get_db_pool_pre_ping() -> bool:
+        """Whether connections are checked with a ping before being handed out by the pool."""
+        return os.getenv("DB_POOL_PRE_PING", "true").strip().lower() in ("1", "true", "yes")
+
+
     def get_shared_storage_dir() -> Path:
         """Absolute path to the shared storage directory used to read source files."""
         return Path(os.getenv("SHARED_STORAGE_DIR", "shared_storage")).resolve()
@@ -37,6 +63,131 @@ class Config():
         return float(os.getenv("INGESTOR_POLL_INTERVAL", 5))
 
 
+    def get_max_poll_interval_seconds() -> float:
+        """Ceiling in seconds of the idle polling backoff of the ingestion worker loop."""
+        return float(os.getenv("INGESTOR_POLL_MAX_INTERVAL", 60))
+
+
+    def get_wakeup_address() -> str | None:
+        """Optional `host:port` (UDP) or `unix:/path` datagram address workers listen on for wake-up pings."""
+        return os.getenv("INGESTOR_WAKEUP_ADDRESS") or None
+
+
+    def get_metrics_address() -> str | None:
+        """Optional `host:port` on which the worker serves Prometheus metrics at `/metrics`."""
+        return os.getenv("INGESTOR_METRICS_ADDRESS") or None
+
+
     def get_processing_timeout_seconds() -> float:
         """Maximum time in seconds a job may remain in processing before being reset."""
         return float(os.getenv("INGESTOR_PROCESSING_TIMEOUT", 3600))
+
+
+    def get_max_concurrency() -> int:
+        """Maximum number of queue items a single worker process ingests at the same time."""
+        return max(1, int(os.getenv("INGESTOR_MAX_CONCURRENCY", 1)))
+
+
+    def get_db_threads() -> int:
+        """Number of threads running the worker's blocking database calls off the event loop."""
+        return max(1, int(os.getenv("INGESTOR_DB_THREADS", 4)))
+
+
+    def get_worker_id() -> str:
+        """Identifier recorded on the queue items claimed by this worker process."""
+        return os.getenv("INGESTOR_WORKER_ID") or f"{socket.gethostname()}:{os.getpid()}"
+
+
+    def get_exclusive_worker() -> bool:
+        """Whether the worker exits when another worker already has a job in processing."""
+        return os.getenv("INGESTOR_EXCLUSIVE_WORKER", "true").strip().lower() in ("1", "true", "yes")
+
+
+    def get_lease_seconds() -> float:
+        """Duration in seconds of the lease a worker holds on each claimed job."""
+        return float(os.getenv("INGESTOR_LEASE_SECONDS", 30))
+
+
+    def get_heartbeat_interval_seconds() -> float:
+        """Interval in seconds between two lease renewals of the in-flight jobs."""
+        return float(os.getenv("INGESTOR_HEARTBEAT_INTERVAL", 10))
+
+
+    def get_log_buffer_size() -> int:
+        """Number of buffered ingestion log rows that triggers a bulk INSERT before commit."""
+        return max(1, int(os.getenv("INGESTOR_LOG_BUFFER_SIZE", 100)))
+
+
+    def get_log_buffer_max_age_seconds() -> float:
+        """Age in seconds of the oldest buffered ingestion log row that triggers a bulk INSERT before commit."""
+        return float(os.getenv("INGESTOR_LOG_BUFFER_MAX_AGE", 5))
+
+
+    def get_deduplicate() -> bool:
+        """Whether the worker skips files whose content hash is already indexed."""
+        return os.getenv("INGESTOR_DEDUPLICATE", "true").strip().lower() in ("1", "true", "yes")
+
+
+    def get_incremental() -> bool:
+        """Whether the worker tracks source file states to skip unchanged files and replace modified ones."""
+        return os.getenv("INGESTOR_INCREMENTAL", "true").strip().lower() in ("1", "true", "yes")
+
+
+    def get_prune_interval_seconds() -> float:
+        """Interval in seconds between two sweeps deleting documents whose source file disappeared (0, the default, disables)."""
+        return float(os.getenv("INGESTOR_PRUNE_INTERVAL", 0))
+
+
+    def get_parse_workers() -> int:
+        """Number of documents the worker parses at the same time ahead of LLM extraction."""
+        return max(1, int(os.getenv("INGESTOR_PARSE_WORKERS", 1)))
+
+
+    def get_pipeline_queue_size() -> int:
+        """Capacity of each bounded queue between the parse and extraction stages of the worker."""
+        return max(1, int(os.getenv("INGESTOR_PIPELINE_QUEUE_SIZE", 1)))
+
+
+    def get_prefetch() -> int:
+        """Number of jobs reserved beyond the extraction slots to be parsed ahead (0, the default, disables)."""
+        return max(0, int(os.getenv("INGESTOR_PREFETCH", 0)))
+
+
+    def get_sjf_defer_per_mb_seconds() -> float:
+        """Seconds a queued job is deferred behind smaller ones per MiB of estimated cost."""
+        return float(os.getenv("INGESTOR_SJF_DEFER_PER_MB", 5))
+
+
+    def get_sjf_max_defer_seconds() -> float:
+        """Cap of that deferral, after which a large job runs before any newer job of its priority."""
+        return float(os.getenv("INGESTOR_SJF_MAX_DEFER", 900))
+
+
+    def get_archive_interval_seconds() -> float:
+        """Interval in seconds between two archival runs of finished queue items (0 disables)."""
+        return float(os.getenv("INGESTOR_ARCHIVE_INTERVAL", 3600))
+
+
+    def get_archive_after_seconds() -> float:
+        """Age in seconds after which indexed or failed queue items are moved to the history tables."""
+        return float(os.getenv("INGESTOR_ARCHIVE_AFTER", 7 * 24 * 3600))
+
+
+    def get_archive_batch_size() -> int:
+        """Number of queue items moved to the history tables per transaction."""
+        return max(1, int(os.getenv("INGESTOR_ARCHIVE_BATCH_SIZE", 1000)))
+
+
+    def get_max_attempts() -> int:
+        """Number of attempts a queue item gets before a transient failure marks it failed."""
+        return max(1, int(os.getenv("INGESTOR_MAX_ATTEMPTS", 5)))
+
+
+    def get_retry_base_delay_seconds() -> float:
+        """Delay in seconds before the first retry, doubled after each further failed attempt."""
+        return float(os.getenv("INGESTOR_RETRY_BASE_DELAY", 30))
+
+
+    def get_retry_max_delay_seconds() -> float:
+        """Cap in seconds of the delay between two attempts of a queue item."""
+        return float(os.getenv("INGESTOR_RETRY_MAX_DELAY", 1800))
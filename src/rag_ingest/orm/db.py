@@ -2,20 +2,97 @@ from __future__ import annotations
 
 """Database engine/session utilities shared across repositories."""
 
+import threading
+import time
+from typing import Callable
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.pool import QueuePool
 
 from .config import Config
 
 Base = declarative_base()
 
-def get_engine(url: str | None = None):
-    """Create a SQLAlchemy engine using the provided URL or the default config."""
-    return create_engine(url or Config.get_database_url(), pool_pre_ping=True, future=True)
+# One engine, hence one connection pool, per database URL in the process
+_engines: dict[str, Engine] = {}
+_engines_lock = threading.Lock()
+
+
+class TimedQueuePool(QueuePool):
+    """`QueuePool` reporting how long each checkout took to the callables in `checkout_listeners`.
+
+    The time covers waiting for a free connection, opening an overflow one and the
+    pre-ping; it is reported for checkouts that time out too.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkout_listeners: list[Callable[[float], None]] = []
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            seconds = time.perf_counter() - started
+            for listener in self.checkout_listeners:
+                listener(seconds)
+
+    def recreate(self) -> "TimedQueuePool":
+        # `Engine.dispose` swaps in a new pool: keep reporting to the same listeners
+        pool = super().recreate()
+        pool.checkout_listeners = self.checkout_listeners
+        return pool
+
+
+def _pool_options(url: str) -> dict:
+    """Pool arguments of `create_engine` for `url`, from the DB_POOL_* configuration."""
+    options = {"pool_pre_ping": Config.get_db_pool_pre_ping()}
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        # In-memory SQLite lives in its single connection: keep SQLAlchemy's default pool
+        return options
+    return {
+        **options,
+        "poolclass": TimedQueuePool,
+        "pool_size": Config.get_db_pool_size(),
+        "max_overflow": Config.get_db_max_overflow(),
+        "pool_timeout": Config.get_db_pool_timeout_seconds(),
+        "pool_recycle": Config.get_db_pool_recycle_seconds(),
+    }
+
+
+def get_engine(url: str | None = None) -> Engine:
+    """Return the process-wide engine of `url` (default: the configured database), creating it on first use.
+
+    Every caller shares its connection pool, sized by DB_POOL_SIZE and DB_MAX_OVERFLOW, so
+    the number of connections a process opens stays bounded whatever the number of
+    sessions, jobs and threads.
+    """
+    url = url or Config.get_database_url()
+    with _engines_lock:
+        engine = _engines.get(url)
+        if engine is None:
+            engine = _engines[url] = create_engine(url, future=True, **_pool_options(url))
+    return engine
+
+
+def dispose_engines() -> None:
+    """Close the pooled connections of every registered engine.
+
+    Connections still checked out are closed when returned. The engines stay registered
+    and reconnect on their next use.
+    """
+    with _engines_lock:
+        engines = list(_engines.values())
+    for engine in engines:
+        engine.dispose()
 
 
 def get_session_maker(url: str | None = None):
-    """Return a configured sessionmaker bound to a fresh engine."""
+    """Return a configured sessionmaker bound to the shared engine of `url`."""
     engine = get_engine(url)
     return sessionmaker(bind=engine, autoflush=False, future=True)
 
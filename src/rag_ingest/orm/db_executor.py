@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+"""Dedicated threads running the blocking SQLAlchemy calls of the async worker."""
+
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+T = TypeVar("T")
+
+
+class DbExecutor:
+    """Run synchronous database work off the event loop, on a small pool of dedicated threads.
+
+    The repositories are synchronous (PyMySQL); awaiting their calls through `run` keeps
+    the loop free to serve LLM streams, heartbeats and metrics scrapes while MySQL is
+    slow. The pool is kept separate from the default executor so hashing and parsing
+    threads never delay a lease renewal. With `max_workers=0` calls run inline on the
+    loop, the behaviour of callers that do not provide an executor.
+
+    A session must only be used by one call at a time: a job awaits each of its DB calls
+    before issuing the next one, so its session never runs on two threads at once.
+    """
+
+    def __init__(self, max_workers: int = 1):
+        """Start `max_workers` DB threads, or none to run calls inline."""
+        self.max_workers = max_workers
+        self._executor = (
+            ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="rag-db") if max_workers > 0 else None
+        )
+
+    async def run(self, fn: Callable[..., T], /, *args: Any, **kwargs: Any) -> T:
+        """Call `fn(*args, **kwargs)` on a DB thread and return its result.
+
+        Context variables (e.g. the metrics of the current job) are visible in the call,
+        as with `asyncio.to_thread`.
+        """
+        if self._executor is None:
+            return fn(*args, **kwargs)
+        call = functools.partial(contextvars.copy_context().run, fn, *args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, call)
+
+    def shutdown(self) -> None:
+        """Wait for the running calls and stop the DB threads."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
@@ -2,8 +2,20 @@
 
 from .ingestion_log_repo import IngestionLogRepo
 from .ingestion_queue_item_repo import IngestionQueueItemRepo
+from .indexed_content_repo import IndexedContentRepo
+from .source_file_state_repo import SourceFileStateRepo
+from .ingestion_archive_repo import IngestionArchiveRepo
+from .ingestion_stage_metric_repo import IngestionStageMetricRepo
+from .model_call_record_repo import ModelCallRecordRepo
+from .async_repository import AsyncRepository
 
 __all__ = [
     IngestionLogRepo,
-    IngestionQueueItemRepo
+    IngestionQueueItemRepo,
+    IndexedContentRepo,
+    SourceFileStateRepo,
+    IngestionArchiveRepo,
+    IngestionStageMetricRepo,
+    ModelCallRecordRepo,
+    AsyncRepository
 ]
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+"""Awaitable facade over the synchronous repositories."""
+
+import functools
+from typing import Any, Generic, TypeVar
+
+from sqlalchemy.orm import Session
+
+from ..orm import DbExecutor
+
+R = TypeVar("R")
+
+
+class AsyncRepository(Generic[R]):
+    """Expose the methods of a synchronous repository as coroutines running on a `DbExecutor`.
+
+    `AsyncRepository(IngestionQueueItemRepo(session), executor).mark_indexed(item, ...)` has
+    the signature of the wrapped method and must be awaited. Non-callable attributes are
+    returned as is.
+    """
+
+    def __init__(self, repo: R, executor: DbExecutor):
+        """Wrap `repo`, whose calls are then run on `executor`."""
+        self.repo = repo
+        self.executor = executor
+
+    @property
+    def session(self) -> Session:
+        """Session of the wrapped repository."""
+        return self.repo.session
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self.repo, name)
+        if not callable(attribute):
+            return attribute
+
+        @functools.wraps(attribute)
+        async def call(*args, **kwargs):
+            return await self.executor.run(attribute, *args, **kwargs)
+
+        return call
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+"""Repository for looking up and recording already indexed file contents."""
+
+from typing import Optional
+
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session
+
+from ..entity import IndexedContent
+
+class IndexedContentRepo:
+    session: Session = None
+
+    def __init__(self, session):
+        """Store the active DB session used for subsequent operations."""
+        self.session = session
+
+    def find_by_hash(self, content_hash: str) -> Optional[IndexedContent]:
+        """Return the indexed content matching the digest or None."""
+        return self.session.get(IndexedContent, content_hash)
+
+    def record(
+        self,
+        content_hash: str,
+        storage_path: str,
+        size_bytes: int,
+        ingestion_queue_item_id: int | None = None,
+    ) -> None:
+        """Remember that this content is indexed; keeps the first row if another job recorded it concurrently."""
+        self.session.execute(
+            insert(IndexedContent)
+            .prefix_with("IGNORE", dialect="mysql")
+            .prefix_with("IGNORE", dialect="mariadb")
+            .prefix_with("OR IGNORE", dialect="sqlite")
+            .values(
+                content_hash=content_hash,
+                storage_path=storage_path,
+                size_bytes=size_bytes,
+                ingestion_queue_item_id=ingestion_queue_item_id,
+            )
+        )
+
+    def remove(self, content_hash: str) -> None:
+        """Forget a content whose LightRAG document was deleted, so it is ingested again next time."""
+        self.session.execute(delete(IndexedContent).where(IndexedContent.content_hash == content_hash))
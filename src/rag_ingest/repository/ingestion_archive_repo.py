@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+"""Repository moving finished queue items and their logs into the history tables."""
+
+from datetime import datetime
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from ..entity import (
+    IngestionLog,
+    IngestionLogHistory,
+    IngestionQueueItem,
+    IngestionQueueItemHistory,
+    QueueStatus,
+)
+
+FINISHED_STATUSES = (QueueStatus.indexed, QueueStatus.failed, QueueStatus.download_failed)
+
+ARCHIVED_ITEM_COLUMNS = (
+    "id",
+    "document_node_id",
+    "storage_path",
+    "status",
+    "rag_message",
+    "priority",
+    "estimated_cost",
+    "scheduled_at",
+    "attempt_count",
+    "next_attempt_at",
+    "claimed_by",
+    "lease_expires_at",
+    "heartbeat_at",
+    "created_at",
+    "started_at",
+    "ended_at",
+)
+
+ARCHIVED_LOG_COLUMNS = ("id", "ingestion_queue_item_id", "level", "message", "created_at", "updated_at")
+
+
+class IngestionArchiveRepo:
+    session: Session = None
+
+    def __init__(self, session):
+        """Store the active DB session used for subsequent operations."""
+        self.session = session
+
+    def archive_finished_batch(self, finished_before: datetime, batch_size: int = 1000) -> int:
+        """Move up to `batch_size` items finished before `finished_before`, with their logs, to history.
+
+        Rows are copied with `INSERT ... SELECT` and deleted from the hot tables in the same
+        transaction; commit after each batch to keep locks and undo logs small. Returns the
+        number of archived items.
+        """
+        item_ids = list(
+            self.session.execute(
+                select(IngestionQueueItem.id)
+                .where(
+                    IngestionQueueItem.status.in_(FINISHED_STATUSES),
+                    IngestionQueueItem.ended_at < finished_before,
+                )
+                .limit(batch_size)
+            ).scalars()
+        )
+        if not item_ids:
+            return 0
+
+        self.session.execute(
+            insert(IngestionQueueItemHistory).from_select(
+                ARCHIVED_ITEM_COLUMNS,
+                select(*(getattr(IngestionQueueItem, column) for column in ARCHIVED_ITEM_COLUMNS)).where(
+                    IngestionQueueItem.id.in_(item_ids)
+                ),
+            )
+        )
+        self.session.execute(
+            insert(IngestionLogHistory).from_select(
+                ARCHIVED_LOG_COLUMNS,
+                select(*(getattr(IngestionLog, column) for column in ARCHIVED_LOG_COLUMNS)).where(
+                    IngestionLog.ingestion_queue_item_id.in_(item_ids)
+                ),
+            )
+        )
+        self.session.execute(
+            delete(IngestionLog)
+            .where(IngestionLog.ingestion_queue_item_id.in_(item_ids))
+            .execution_options(synchronize_session=False)
+        )
+        self.session.execute(
+            delete(IngestionQueueItem)
+            .where(IngestionQueueItem.id.in_(item_ids))
+            .execution_options(synchronize_session=False)
+        )
+        return len(item_ids)
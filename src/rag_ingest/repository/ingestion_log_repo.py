@@ -2,17 +2,42 @@ from __future__ import annotations
 
 """Repository wrapper to persist ingestion log entries."""
 
+import time
 from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import event, insert
 from sqlalchemy.orm import Session
 
 from ..entity import IngestionLog
+from ..orm import Config
 
 class IngestionLogRepo:
+    """Buffer log entries and write them with a single multi-row INSERT.
+
+    Entries are flushed when the session commits, or earlier once the buffer holds
+    `max_buffer_size` rows or its oldest row is older than `max_buffer_age` seconds.
+    A rollback discards the buffered entries, like it would discard flushed rows.
+    """
     session: Session = None
 
-    def __init__(self, session):
-        """Store the active DB session used to write logs."""
+    def __init__(
+        self,
+        session,
+        max_buffer_size: Optional[int] = None,
+        max_buffer_age: Optional[float] = None,
+    ):
+        """Store the active DB session used to write logs and hook the buffer to its transaction."""
         self.session = session
+        self.max_buffer_size = max_buffer_size or Config.get_log_buffer_size()
+        self.max_buffer_age = (
+            Config.get_log_buffer_max_age_seconds() if max_buffer_age is None else max_buffer_age
+        )
+        self._buffer: list[dict] = []
+        self._buffer_started_at: float | None = None
+
+        event.listen(session, "before_commit", self._on_before_commit)
+        event.listen(session, "after_soft_rollback", self._on_after_rollback)
 
     def add_ingestion_log(
         self,
@@ -20,16 +45,49 @@ class IngestionLogRepo:
         message: str,
         level: str = "info",
     ) -> IngestionLog:
-        """Create and persist a new ingestion log row."""
-        log = IngestionLog(
-            ingestion_queue_item_id=ingestion_queue_item_id, 
-            message=message, 
-            level=level, 
-            created_at=datetime.now(), 
-            updated_at=datetime.now()
+        """Queue a new ingestion log row; it is persisted on commit or when a threshold is hit.
+
+        The returned entity is transient and carries no primary key.
+        """
+        now = datetime.now()
+        row = dict(
+            ingestion_queue_item_id=ingestion_queue_item_id,
+            message=message,
+            level=level,
+            created_at=now,
+            updated_at=now,
         )
 
-        self.session.add(log)
-        self.session.flush()
+        if not self.session.in_transaction():
+            # Tie the buffer to a session transaction so a rollback reliably discards it
+            self.session.begin()
+        if not self._buffer:
+            self._buffer_started_at = time.monotonic()
+        self._buffer.append(row)
+
+        if (
+            len(self._buffer) >= self.max_buffer_size
+            or time.monotonic() - self._buffer_started_at >= self.max_buffer_age
+        ):
+            self.flush()
+
+        return IngestionLog(**row)
+
+    def flush(self) -> int:
+        """Write every buffered entry with one multi-row INSERT and return how many were written."""
+        if not self._buffer:
+            return 0
+
+        rows, self._buffer = self._buffer, []
+        self._buffer_started_at = None
+        self.session.execute(insert(IngestionLog), rows)
+        return len(rows)
+
+    def _on_before_commit(self, session) -> None:
+        """Persist the pending entries within the transaction being committed."""
+        self.flush()
 
-        return log
+    def _on_after_rollback(self, session, previous_transaction) -> None:
+        """Drop the pending entries along with the rolled back transaction."""
+        self._buffer = []
+        self._buffer_started_at = None
@@ -2,11 +2,12 @@ from __future__ import annotations
 
 """Repository for querying and mutating ingestion queue items."""
 
-from typing import Optional
+from typing import Iterable, Optional
 
 from datetime import datetime, timedelta, timezone
-from sqlalchemy import asc, select, update
+from sqlalchemy import asc, func, or_, select, update
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
 
 from ..entity import IngestionQueueItem, QueueStatus
 
@@ -17,83 +18,357 @@ class IngestionQueueItemRepo:
         """Store the active DB session used for subsequent operations."""
         self.session = session
 
+    # Priority first, then the cost-deferred creation time (the creation time itself until
+    # the item is scheduled, rather than NULL sorting first), then insertion order
+    SCHEDULE_ORDER = (
+        IngestionQueueItem.priority.desc(),
+        func.coalesce(IngestionQueueItem.scheduled_at, IngestionQueueItem.created_at).asc(),
+        IngestionQueueItem.id.asc(),
+    )
+
+    @staticmethod
+    def _is_due(now: datetime):
+        """Condition excluding queued items still waiting for their retry backoff to elapse."""
+        return or_(IngestionQueueItem.next_attempt_at.is_(None), IngestionQueueItem.next_attempt_at <= now)
+
     def find_next_queued_item(self) -> Optional[IngestionQueueItem]:
-        """Fetch the oldest job still marked as queued."""
+        """Fetch the next due job to run according to the scheduling policy."""
         statement = (
             select(IngestionQueueItem)
-            .where(IngestionQueueItem.status == QueueStatus.queued)
-            .order_by(asc(IngestionQueueItem.created_at))
+            .where(
+                IngestionQueueItem.status == QueueStatus.queued,
+                self._is_due(datetime.now(timezone.utc)),
+            )
+            .order_by(*self.SCHEDULE_ORDER)
             .limit(1)
         )
         return self.session.execute(statement).scalar_one_or_none()
+
+    def find_unscheduled_items(self, limit: int = 100) -> list[IngestionQueueItem]:
+        """Return queued items that have not been given a `scheduled_at` yet."""
+        statement = (
+            select(IngestionQueueItem)
+            .where(
+                IngestionQueueItem.status == QueueStatus.queued,
+                IngestionQueueItem.scheduled_at.is_(None),
+            )
+            .order_by(asc(IngestionQueueItem.id))
+            .limit(limit)
+        )
+        return list(self.session.execute(statement).scalars().all())
+
+    def schedule_item(
+        self,
+        queue_item: IngestionQueueItem,
+        estimated_cost: Optional[int],
+        defer_per_mb: float,
+        max_defer: float,
+    ) -> None:
+        """Record the estimated cost of an item and derive its `scheduled_at`.
+
+        Within a priority, items run by `scheduled_at`: the creation time deferred by
+        `defer_per_mb` seconds per MiB of estimated cost, capped at `max_defer`. Small jobs
+        therefore overtake large ones, while a large job waiting longer than `max_defer`
+        runs before every job of its priority enqueued after that.
+        """
+        defer = min(max_defer, (estimated_cost or 0) / (1 << 20) * defer_per_mb)
+        queue_item.estimated_cost = estimated_cost
+        queue_item.scheduled_at = queue_item.created_at + timedelta(seconds=defer)
+        self.session.flush()
     
+    def reserve_next_batch(
+        self,
+        n: int,
+        worker_id: str,
+        started_at: Optional[datetime] = None,
+        lease_seconds: Optional[float] = None,
+    ) -> list[IngestionQueueItem]:
+        """Atomically claim up to `n` queued items for `worker_id` and return the claimed rows.
+
+        Items are picked by priority, then `scheduled_at` (see `schedule_item`, `created_at`
+        for items not scheduled yet), using the `ix_ingestion_queue_item_run_order` index only. Items whose `next_attempt_at` is still in
+        the future are skipped, and every claim increments `attempt_count`.
+
+        On MySQL/PostgreSQL the candidate rows are locked with `FOR UPDATE SKIP LOCKED`, so
+        concurrent workers never wait on (or pick) the same rows. Other backends such as SQLite
+        fall back to a guarded `UPDATE ... WHERE status = queued`: only rows still queued at
+        update time are claimed, and only those are returned. With `lease_seconds`, each claimed
+        row gets a lease that must be renewed through `renew_leases` before it expires.
+        """
+        if n <= 0:
+            return []
+
+        started_at = started_at or datetime.now(timezone.utc)
+        statement = (
+            select(IngestionQueueItem.id)
+            .where(IngestionQueueItem.status == QueueStatus.queued, self._is_due(started_at))
+            .order_by(*self.SCHEDULE_ORDER)
+            .limit(n)
+        )
+        if self._supports_skip_locked():
+            statement = statement.with_for_update(skip_locked=True)
+
+        candidate_ids = self.session.execute(statement).scalars().all()
+        if not candidate_ids:
+            return []
+
+        self.session.execute(
+            update(IngestionQueueItem)
+            .where(
+                IngestionQueueItem.id.in_(candidate_ids),
+                IngestionQueueItem.status == QueueStatus.queued,
+            )
+            .values(
+                status=QueueStatus.processing,
+                started_at=started_at,
+                ended_at=None,
+                attempt_count=IngestionQueueItem.attempt_count + 1,
+                claimed_by=worker_id,
+                heartbeat_at=started_at,
+                lease_expires_at=(
+                    started_at + timedelta(seconds=lease_seconds) if lease_seconds else None
+                ),
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+        claimed = (
+            self.session.execute(
+                select(IngestionQueueItem)
+                .where(
+                    IngestionQueueItem.id.in_(candidate_ids),
+                    IngestionQueueItem.status == QueueStatus.processing,
+                    IngestionQueueItem.claimed_by == worker_id,
+                )
+                .order_by(*self.SCHEDULE_ORDER)
+                .execution_options(populate_existing=True)
+            )
+            .scalars()
+            .all()
+        )
+        return list(claimed)
+
+    def _supports_skip_locked(self) -> bool:
+        """Whether the bound database understands `SELECT ... FOR UPDATE SKIP LOCKED`."""
+        return self.session.get_bind().dialect.name in ("mysql", "mariadb", "postgresql")
+
+    def renew_leases(
+        self,
+        item_ids: Iterable[int],
+        worker_id: str,
+        lease_seconds: float,
+    ) -> list[int]:
+        """Extend the lease of the given processing items still owned by `worker_id`.
+
+        Returns the ids that were renewed; an id missing from the result means the lease was lost
+        (expired and reclaimed, or the item already left processing).
+        """
+        item_ids = list(item_ids)
+        if not item_ids:
+            return []
+
+        now = datetime.now(timezone.utc)
+        owned = (
+            IngestionQueueItem.id.in_(item_ids),
+            IngestionQueueItem.status == QueueStatus.processing,
+            IngestionQueueItem.claimed_by == worker_id,
+        )
+
+        self.session.execute(
+            update(IngestionQueueItem)
+            .where(*owned)
+            .values(
+                heartbeat_at=now,
+                lease_expires_at=now + timedelta(seconds=lease_seconds),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        return list(self.session.execute(select(IngestionQueueItem.id).where(*owned)).scalars().all())
+
+    def reset_expired_leases(self, exclude_ids: Iterable[int] = ()) -> list[int]:
+        """Reset processing items whose lease has expired back to queued and return their ids."""
+        now = datetime.now(timezone.utc)
+
+        statement = select(IngestionQueueItem.id).where(
+            IngestionQueueItem.status == QueueStatus.processing,
+            IngestionQueueItem.lease_expires_at.is_not(None),
+            IngestionQueueItem.lease_expires_at < now,
+        )
+        exclude_ids = list(exclude_ids)
+        if exclude_ids:
+            statement = statement.where(IngestionQueueItem.id.not_in(exclude_ids))
+
+        expired_ids = self.session.execute(statement).scalars().all()
+        if not expired_ids:
+            return []
+
+        self.session.execute(
+            update(IngestionQueueItem)
+            .where(
+                IngestionQueueItem.id.in_(expired_ids),
+                IngestionQueueItem.status == QueueStatus.processing,
+                IngestionQueueItem.lease_expires_at < now,
+            )
+            .values(
+                status=QueueStatus.queued,
+                started_at=None,
+                ended_at=None,
+                claimed_by=None,
+                lease_expires_at=None,
+                heartbeat_at=None,
+                rag_message="resetted to queued after lease expiry",
+            )
+        )
+
+        return expired_ids
+
+    def count_by_status(self) -> dict[QueueStatus, int]:
+        """Number of queue items per status, zero for statuses without items."""
+        statement = select(IngestionQueueItem.status, func.count()).group_by(IngestionQueueItem.status)
+        counts = {status: 0 for status in QueueStatus}
+        counts.update(dict(self.session.execute(statement).all()))
+        return counts
+
     def find_one_by_id(self, id): 
         """Return a queue item by primary key or None."""
         return self.session.get(IngestionQueueItem, id)
     
-    def has_processing_item(self) -> bool:
-        """Check whether any job is currently marked as processing."""
+    def has_processing_item(self, exclude_ids: Iterable[int] = ()) -> bool:
+        """Check whether any job, other than the excluded ids, is currently marked as processing."""
         statement = select(IngestionQueueItem).where(
             IngestionQueueItem.status == QueueStatus.processing
         )
+        exclude_ids = list(exclude_ids)
+        if exclude_ids:
+            statement = statement.where(IngestionQueueItem.id.not_in(exclude_ids))
         return self.session.execute(statement).first() is not None
 
     def reserve_item_for_processing(
         self,
         item: IngestionQueueItem, 
-        started_at: Optional[datetime] = None
+        started_at: Optional[datetime] = None,
+        claimed_by: Optional[str] = None,
     ) -> IngestionQueueItem:
         """Mark a queued item as processing and set its start time."""
         item.status = QueueStatus.processing
         item.started_at = started_at or datetime.now(timezone.utc)
+        item.attempt_count = (item.attempt_count or 0) + 1
+        item.claimed_by = claimed_by
         self.session.add(item)
         self.session.flush()
         return item
 
+    # Default of the `claimed_by` argument of the mark_* methods: the owner loaded with the item
+    _UNSET = object()
+
+    def _finish(self, item: IngestionQueueItem, owner, **values) -> Optional[IngestionQueueItem]:
+        """Apply `values` to a processing item only if it is still claimed by `owner`.
+
+        `owner` defaults to the `claimed_by` loaded with `item`. Returns None, leaving the row
+        untouched, when the lease was lost meanwhile (reclaimed by another worker or reset).
+        """
+        if owner is self._UNSET:
+            owner = item.claimed_by
+        result = self.session.execute(
+            update(IngestionQueueItem)
+            .where(
+                IngestionQueueItem.id == item.id,
+                IngestionQueueItem.status == QueueStatus.processing,
+                IngestionQueueItem.claimed_by == owner,
+            )
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            return None
+        for key, value in values.items():
+            set_committed_value(item, key, value)
+        return item
+
     def mark_indexed(
         self,
         item: IngestionQueueItem, 
-        rag_message: str | None = None
-    ) -> IngestionQueueItem:
-        """Flag an item as successfully indexed and record a completion timestamp."""
-        item.status = QueueStatus.indexed
-        item.ended_at = datetime.now(timezone.utc)
-        item.rag_message = rag_message
-        self.session.add(item)
-        self.session.flush()
-        return item
+        rag_message: str | None = None,
+        claimed_by=_UNSET,
+    ) -> Optional[IngestionQueueItem]:
+        """Flag an item as successfully indexed, record a completion timestamp and release its lease.
+
+        Returns None and changes nothing when the item is no longer processing for `claimed_by`.
+        """
+        return self._finish(
+            item,
+            claimed_by,
+            status=QueueStatus.indexed,
+            ended_at=datetime.now(timezone.utc),
+            lease_expires_at=None,
+            rag_message=rag_message,
+        )
     
     def mark_failed(
         self,
         item: IngestionQueueItem,
         rag_message: str | None = None,
-    ) -> IngestionQueueItem:
-        """Move an item to failed with an optional error message."""
-        item.status = QueueStatus.failed
-        item.ended_at = datetime.now(timezone.utc)
-        item.rag_message = rag_message
-        self.session.add(item)
-        self.session.flush()
-        return item
+        claimed_by=_UNSET,
+    ) -> Optional[IngestionQueueItem]:
+        """Move an item to failed with an optional error message and release its lease.
+
+        Returns None and changes nothing when the item is no longer processing for `claimed_by`.
+        """
+        return self._finish(
+            item,
+            claimed_by,
+            status=QueueStatus.failed,
+            ended_at=datetime.now(timezone.utc),
+            lease_expires_at=None,
+            rag_message=rag_message,
+        )
     
+    def mark_retry(
+        self,
+        item: IngestionQueueItem,
+        next_attempt_at: datetime,
+        rag_message: str | None = None,
+        claimed_by=_UNSET,
+    ) -> Optional[IngestionQueueItem]:
+        """Put an item that failed transiently back in the queue, not to be reserved before `next_attempt_at`.
+
+        Returns None and changes nothing when the item is no longer processing for `claimed_by`.
+        """
+        return self._finish(
+            item,
+            claimed_by,
+            status=QueueStatus.queued,
+            started_at=None,
+            ended_at=None,
+            claimed_by=None,
+            lease_expires_at=None,
+            heartbeat_at=None,
+            next_attempt_at=next_attempt_at,
+            rag_message=rag_message,
+        )
+
     def reset_stale_processing_items(
         self,
-        timeout_seconds: float
+        timeout_seconds: float,
+        exclude_ids: Iterable[int] = (),
     ) -> list[int]:
-        """Reset processing items older than the timeout back to queued and return their ids."""
+        """Reset lease-less processing items older than the timeout back to queued and return their ids.
+
+        Items claimed with a lease are recovered by `reset_expired_leases` instead.
+        """
         cutoff = datetime.now(timezone.utc) - timedelta(seconds=timeout_seconds)
 
-        stale_ids = (
-            self.session.execute(
-                select(IngestionQueueItem.id).where(
-                    IngestionQueueItem.status == QueueStatus.processing,
-                    IngestionQueueItem.started_at.is_not(None),
-                    IngestionQueueItem.started_at < cutoff,
-                )
-            )
-            .scalars()
-            .all()
+        statement = select(IngestionQueueItem.id).where(
+            IngestionQueueItem.status == QueueStatus.processing,
+            IngestionQueueItem.started_at.is_not(None),
+            IngestionQueueItem.started_at < cutoff,
+            IngestionQueueItem.lease_expires_at.is_(None),
         )
+        exclude_ids = list(exclude_ids)
+        if exclude_ids:
+            statement = statement.where(IngestionQueueItem.id.not_in(exclude_ids))
+
+        stale_ids = self.session.execute(statement).scalars().all()
         if not stale_ids:
             return []
 
@@ -104,6 +379,7 @@ class IngestionQueueItemRepo:
                 status=QueueStatus.queued,
                 started_at=None,
                 ended_at=None,
+                claimed_by=None,
                 rag_message="resetted to queued after timeout",
             )
         )
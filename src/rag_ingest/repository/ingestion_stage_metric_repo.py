@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+"""Repository recording and aggregating the per-stage timings of queue items."""
+
+from datetime import datetime
+from typing import Iterable, Optional
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+from ..entity import IngestionStageMetric
+
+
+class IngestionStageMetricRepo:
+    session: Session = None
+
+    def __init__(self, session):
+        """Store the active DB session used for subsequent operations."""
+        self.session = session
+
+    def record(self, ingestion_queue_item_id: int, attempt: int, rows: Iterable[dict]) -> None:
+        """Store the stage rows of one attempt (see `JobMetrics.rows`) in a single multi-row insert."""
+        rows = [
+            {**row, "ingestion_queue_item_id": ingestion_queue_item_id, "attempt": attempt}
+            for row in rows
+        ]
+        if rows:
+            self.session.execute(insert(IngestionStageMetric), rows)
+
+    def find_by_queue_item(self, ingestion_queue_item_id: int) -> list[IngestionStageMetric]:
+        """Return the stage rows of every attempt of a queue item."""
+        statement = (
+            select(IngestionStageMetric)
+            .where(IngestionStageMetric.ingestion_queue_item_id == ingestion_queue_item_id)
+            .order_by(IngestionStageMetric.attempt, IngestionStageMetric.id)
+        )
+        return list(self.session.execute(statement).scalars().all())
+
+    def aggregate(self, since: Optional[datetime] = None) -> list[dict]:
+        """Per-stage totals across jobs, optionally restricted to attempts recorded after `since`.
+
+        Each row holds the stage, the number of jobs and calls, the total, average and
+        maximum duration per job in seconds, and the bytes processed.
+        """
+        statement = select(
+            IngestionStageMetric.stage,
+            func.count(func.distinct(IngestionStageMetric.ingestion_queue_item_id)).label("jobs"),
+            func.sum(IngestionStageMetric.call_count).label("calls"),
+            func.sum(IngestionStageMetric.duration_seconds).label("total_seconds"),
+            func.avg(IngestionStageMetric.duration_seconds).label("avg_seconds"),
+            func.max(IngestionStageMetric.duration_seconds).label("max_seconds"),
+            func.sum(IngestionStageMetric.bytes_processed).label("bytes_processed"),
+        ).group_by(IngestionStageMetric.stage).order_by(IngestionStageMetric.stage)
+        if since is not None:
+            statement = statement.where(IngestionStageMetric.created_at >= since)
+        return [dict(row._mapping) for row in self.session.execute(statement)]
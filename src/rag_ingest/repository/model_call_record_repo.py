@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+"""Repository writing and summarizing the per-queue-item model call accounting."""
+
+from datetime import datetime
+from typing import Iterable, Optional
+
+from sqlalchemy import case, func, insert, select
+from sqlalchemy.orm import Session
+
+from ..entity import IngestionQueueItem, IngestionQueueItemHistory, ModelCallRecord
+
+INSERT_BATCH_SIZE = 1000
+
+
+class ModelCallRecordRepo:
+    session: Session = None
+
+    def __init__(self, session):
+        """Store the active DB session used for subsequent operations."""
+        self.session = session
+
+    def record_many(self, ingestion_queue_item_id: int, attempt: int, rows: Iterable[dict]) -> int:
+        """Store the accounting rows of one attempt with multi-row inserts of up to 1000 rows.
+
+        Returns the number of rows written.
+        """
+        rows = [
+            {**row, "ingestion_queue_item_id": ingestion_queue_item_id, "attempt": attempt}
+            for row in rows
+        ]
+        for start in range(0, len(rows), INSERT_BATCH_SIZE):
+            self.session.execute(insert(ModelCallRecord), rows[start:start + INSERT_BATCH_SIZE])
+        return len(rows)
+
+    def find_by_queue_item(self, ingestion_queue_item_id: int) -> list[ModelCallRecord]:
+        """Return every accounted call of a queue item, in call order."""
+        statement = (
+            select(ModelCallRecord)
+            .where(ModelCallRecord.ingestion_queue_item_id == ingestion_queue_item_id)
+            .order_by(ModelCallRecord.created_at, ModelCallRecord.id)
+        )
+        return list(self.session.execute(statement).scalars().all())
+
+    def totals_by_queue_item(self, since: Optional[datetime] = None) -> list[dict]:
+        """Per queue item and call kind: calls, cache hits, errors, tokens, latency and cost.
+
+        Rows carry the item `storage_path`, read from the queue or from its archived copy.
+        """
+        statement = (
+            select(
+                ModelCallRecord.ingestion_queue_item_id,
+                func.coalesce(IngestionQueueItem.storage_path, IngestionQueueItemHistory.storage_path).label(
+                    "storage_path"
+                ),
+                ModelCallRecord.kind,
+                func.count().label("calls"),
+                func.sum(case((ModelCallRecord.cache_hit, 1), else_=0)).label("cache_hits"),
+                func.sum(case((ModelCallRecord.error.is_not(None), 1), else_=0)).label("errors"),
+                func.sum(ModelCallRecord.prompt_tokens).label("prompt_tokens"),
+                func.sum(ModelCallRecord.completion_tokens).label("completion_tokens"),
+                func.sum(ModelCallRecord.latency_seconds).label("latency_seconds"),
+                func.sum(ModelCallRecord.cost).label("cost"),
+            )
+            .outerjoin(IngestionQueueItem, IngestionQueueItem.id == ModelCallRecord.ingestion_queue_item_id)
+            .outerjoin(
+                IngestionQueueItemHistory,
+                IngestionQueueItemHistory.id == ModelCallRecord.ingestion_queue_item_id,
+            )
+            .group_by(
+                ModelCallRecord.ingestion_queue_item_id,
+                IngestionQueueItem.storage_path,
+                IngestionQueueItemHistory.storage_path,
+                ModelCallRecord.kind,
+            )
+            .order_by(ModelCallRecord.ingestion_queue_item_id, ModelCallRecord.kind)
+        )
+        if since is not None:
+            statement = statement.where(ModelCallRecord.created_at >= since)
+        return [dict(row._mapping) for row in self.session.execute(statement)]
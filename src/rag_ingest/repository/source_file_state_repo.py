@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+"""Repository for the per-file ingestion manifest used by incremental re-ingestion."""
+
+from typing import Iterator, Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from ..entity import SourceFileState
+
+class SourceFileStateRepo:
+    session: Session = None
+
+    def __init__(self, session):
+        """Store the active DB session used for subsequent operations."""
+        self.session = session
+
+    def find_by_path(self, storage_path: str) -> Optional[SourceFileState]:
+        """Return the recorded state of a shared storage file or None."""
+        return self.session.get(SourceFileState, storage_path)
+
+    def iter_all(self, batch_size: int = 500) -> Iterator[SourceFileState]:
+        """Yield every recorded state ordered by path, loading `batch_size` rows at a time."""
+        last_path = None
+        while True:
+            stmt = select(SourceFileState).order_by(SourceFileState.storage_path).limit(batch_size)
+            if last_path is not None:
+                stmt = stmt.where(SourceFileState.storage_path > last_path)
+            rows = list(self.session.scalars(stmt))
+            yield from rows
+            if len(rows) < batch_size:
+                return
+            last_path = rows[-1].storage_path
+
+    def count_references(self, doc_id: str, exclude_path: str | None = None) -> int:
+        """Number of files (other than `exclude_path`) whose last ingestion produced `doc_id`."""
+        stmt = select(func.count()).select_from(SourceFileState).where(SourceFileState.doc_id == doc_id)
+        if exclude_path is not None:
+            stmt = stmt.where(SourceFileState.storage_path != exclude_path)
+        return self.session.scalar(stmt)
+
+    def upsert(
+        self,
+        storage_path: str,
+        size_bytes: int,
+        mtime: float,
+        content_hash: str,
+        doc_id: str,
+    ) -> SourceFileState:
+        """Create or update the state of a file after it was ingested."""
+        state = self.find_by_path(storage_path)
+        if state is None:
+            state = SourceFileState(storage_path=storage_path)
+            self.session.add(state)
+        state.size_bytes = size_bytes
+        state.mtime = mtime
+        state.content_hash = content_hash
+        state.doc_id = doc_id
+        self.session.flush()
+        return state
+
+    def remove(self, storage_path: str) -> None:
+        """Forget the state of a file."""
+        self.session.execute(delete(SourceFileState).where(SourceFileState.storage_path == storage_path))
+
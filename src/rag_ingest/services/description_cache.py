@@ -0,0 +1,171 @@
+"""Persistent cache of VLM image descriptions with coalescing of identical in-flight requests."""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Awaitable, Callable
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DescriptionCacheStats:
+    """Counters accumulated since the cache was opened."""
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses + self.coalesced
+        return (self.hits + self.coalesced) / lookups if lookups else 0.0
+
+
+class ImageDescriptionCache:
+    """SQLite-backed store of descriptions keyed by (model, prompts, image hash).
+
+    Concurrent requests for the same key share a single model call: the first caller
+    computes the description, the others await its result.
+    """
+
+    def __init__(self, path: Path):
+        """Open (or create) the cache database at `path`."""
+        self.path = Path(path)
+        self.stats = DescriptionCacheStats()
+        self._lock = threading.Lock()
+        self._in_flight: dict[str, asyncio.Future] = {}
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS image_description (
+                cache_key TEXT PRIMARY KEY,
+                model TEXT,
+                description TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self._connection.commit()
+
+    @staticmethod
+    def make_key(model: str | None, prompt: str, system_prompt: str | None, image_data: str) -> str:
+        """Digest identifying a description request; the image enters through its own hash."""
+        image_hash = hashlib.sha256(image_data.encode("ascii")).hexdigest()
+        payload = json.dumps([model, system_prompt, prompt, image_hash])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, cache_key: str) -> str | None:
+        """Return the stored description or None."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT description FROM image_description WHERE cache_key = ?", (cache_key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, cache_key: str, model: str | None, description: str) -> None:
+        """Store a description."""
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO image_description (cache_key, model, description, created_at) VALUES (?, ?, ?, ?)",
+                (cache_key, model, description, time.time()),
+            )
+            self._connection.commit()
+
+    async def get_or_compute(
+        self,
+        cache_key: str,
+        model: str | None,
+        compute: Callable[[], Awaitable[str]],
+    ) -> str:
+        """Serve the description from the cache, an identical in-flight request, or `compute`.
+
+        `compute` runs in a task of its own that every caller awaits through a shield: a
+        cancelled caller, the first one included, stops waiting without failing the others.
+        """
+        in_flight = self._in_flight.get(cache_key)
+        if in_flight is not None:
+            self.stats.coalesced += 1
+            return await asyncio.shield(in_flight)
+
+        cached = await asyncio.to_thread(self.get, cache_key)
+        if cached is not None:
+            self.stats.hits += 1
+            return cached
+
+        # Another caller may have started the same request while we were reading
+        in_flight = self._in_flight.get(cache_key)
+        if in_flight is not None:
+            self.stats.coalesced += 1
+            return await asyncio.shield(in_flight)
+
+        self.stats.misses += 1
+        task = asyncio.ensure_future(self._compute_and_store(cache_key, model, compute))
+        self._in_flight[cache_key] = task
+        task.add_done_callback(lambda _: self._forget(cache_key, task))
+        return await asyncio.shield(task)
+
+    async def _compute_and_store(
+        self,
+        cache_key: str,
+        model: str | None,
+        compute: Callable[[], Awaitable[str]],
+    ) -> str:
+        description = await compute()
+        if isinstance(description, str) and description:
+            await asyncio.to_thread(self.put, cache_key, model, description)
+        return description
+
+    def _forget(self, cache_key: str, task: asyncio.Future) -> None:
+        """Drop a finished request so the next one hits the store, or retries after a failure."""
+        if self._in_flight.get(cache_key) is task:
+            del self._in_flight[cache_key]
+        if not task.cancelled():
+            # Every waiter may have been cancelled: mark the outcome retrieved so it does not warn
+            task.exception()
+
+    def close(self) -> None:
+        """Close the underlying SQLite connection."""
+        logger.info(
+            "Image description cache: %s hits, %s coalesced, %s misses",
+            self.stats.hits,
+            self.stats.coalesced,
+            self.stats.misses,
+        )
+        with self._lock:
+            self._connection.close()
+
+
+_cache: ImageDescriptionCache | None = None
+
+
+def get_image_description_cache() -> ImageDescriptionCache | None:
+    """Return the process-wide description cache, or None when disabled through VLM_CACHE_ENABLED."""
+    global _cache
+    if os.getenv("VLM_CACHE_ENABLED", "true").strip().lower() not in ("1", "true", "yes"):
+        return None
+    if _cache is None:
+        default_path = Path(os.getenv("RAG_STORAGE_DIR", "rag_storage")) / "vlm_cache.sqlite"
+        _cache = ImageDescriptionCache(Path(os.getenv("VLM_CACHE_PATH", default_path)))
+    return _cache
+
+
+def close_image_description_cache() -> None:
+    """Close the process-wide description cache, if opened; the next `get_image_description_cache` reopens it."""
+    global _cache
+    if _cache is not None:
+        _cache.close()
+        _cache = None
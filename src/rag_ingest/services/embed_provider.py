@@ -1,19 +1,141 @@
 """Embedding provider factory for LightRAG using Ollama under the hood."""
 
+import asyncio
 import os
 from dotenv import load_dotenv
 from lightrag.utils import EmbeddingFunc
 from lightrag.llm.ollama import ollama_embed
+import numpy as np
+
+from .embedding_cache import wrap_with_embedding_cache
+from .model_client import estimate_tokens
+from .utils.job_metrics import track_stage, with_passed_job_metrics
+from .utils.model_accounting import account_model_call, mark_cache_miss
+from .utils.prometheus import REGISTRY
 
 load_dotenv()
 
+EMBEDDING_BATCH_SIZE = REGISTRY.histogram(
+    "rag_ingest_embedding_batch_size",
+    "Texts per embedding model call sent by the micro-batching dispatcher.",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512),
+)
+
+# LightRAG >= 1.4 wraps `ollama_embed` in an EmbeddingFunc declaring 1024 dimensions, which
+# rejects any other model size; call the raw function and let our EmbeddingFunc check EMBEDDING_DIM
+_ollama_embed = getattr(ollama_embed, "func", ollama_embed)
+
+class EmbeddingBatcher:
+    """Merge concurrent embedding requests into larger batches sent as one model call.
+
+    Requests are collected until `max_batch_size` texts are pending or the oldest one
+    waited `max_wait` seconds; the batch is then embedded in a single call and the rows
+    are split back to each caller.
+    """
+
+    def __init__(self, func, max_batch_size: int = 64, max_wait: float = 0.005):
+        """Store the wrapped embedding coroutine function and the batching thresholds."""
+        self.func = func
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._pending: list[tuple[list[str], asyncio.Future]] = []
+        self._pending_texts = 0
+        self._timer: asyncio.TimerHandle | None = None
+
+    async def __call__(self, texts: list[str]) -> np.ndarray:
+        """Queue `texts` for the next batch and wait for their embeddings."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((list(texts), future))
+        self._pending_texts += len(texts)
+
+        if self._pending_texts >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        """Dispatch every pending request, in batches of at most `max_batch_size` texts."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        pending, self._pending, self._pending_texts = self._pending, [], 0
+        batch: list[tuple[list[str], asyncio.Future]] = []
+        batch_texts = 0
+        for request in pending:
+            if batch and batch_texts + len(request[0]) > self.max_batch_size:
+                asyncio.ensure_future(self._dispatch(batch))
+                batch, batch_texts = [], 0
+            batch.append(request)
+            batch_texts += len(request[0])
+        if batch:
+            asyncio.ensure_future(self._dispatch(batch))
+
+    async def _dispatch(self, batch: list[tuple[list[str], asyncio.Future]]) -> None:
+        """Embed one batch and resolve the futures of the requests it merged."""
+        texts = [text for request_texts, _ in batch for text in request_texts]
+        EMBEDDING_BATCH_SIZE.observe(len(texts))
+        try:
+            embeddings = np.asarray(await self.func(texts))
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        offset = 0
+        for request_texts, future in batch:
+            if not future.done():
+                future.set_result(embeddings[offset:offset + len(request_texts)])
+            offset += len(request_texts)
+
+
 def embedding_func(max_token_size=2048):
-    """Return an EmbeddingFunc wired to the embedding model defined in env vars."""
+    """Return an EmbeddingFunc wired to the embedding model defined in env vars.
+
+    Unless EMBEDDING_CACHE_ENABLED is false, vectors are served from the on-disk
+    embedding cache; misses go through the micro-batching dispatcher (disabled with
+    EMBEDDING_BATCH_MAX_WAIT_MS=0) before reaching Ollama. Each call is accounted against
+    the current queue item; it counts as a cache hit when no text had to be embedded.
+    """
+    embedding_dim = int(os.getenv("EMBEDDING_DIM"))
+    embed_model = os.getenv("EMBEDDING_MODEL")
+    batch_max_wait = float(os.getenv("EMBEDDING_BATCH_MAX_WAIT_MS", 5)) / 1000
+
+    async def embed(texts):
+        return await _ollama_embed(
+            texts,
+            embed_model=embed_model,
+        )
+
+    if batch_max_wait > 0:
+        embed = EmbeddingBatcher(
+            embed,
+            max_batch_size=int(os.getenv("EMBEDDING_BATCH_SIZE", 64)),
+            max_wait=batch_max_wait,
+        )
+
+    async def embed_misses(texts):
+        # Called in the caller's task for the texts the cache could not serve
+        mark_cache_miss(estimate_tokens(texts))
+        return await embed(texts)
+
+    cached_embed = wrap_with_embedding_cache(embed_misses, embed_model, embedding_dim)
+
+    @with_passed_job_metrics
+    async def timed_embed(texts):
+        # Timed as seen by the job: cache lookups and batching waits included
+        with (
+            track_stage("embedding", bytes_processed=sum(len(text) for text in texts)),
+            account_model_call("embedding", embed_model, estimate_tokens(texts), cache_hit=True),
+        ):
+            return await cached_embed(texts)
+
     return EmbeddingFunc(
-        embedding_dim=int(os.getenv("EMBEDDING_DIM")),
+        embedding_dim=embedding_dim,
         max_token_size=max_token_size,
-        func=lambda texts: ollama_embed(
-            texts,
-            embed_model=os.getenv("EMBEDDING_MODEL"),
-        ),
+        func=timed_embed,
     )
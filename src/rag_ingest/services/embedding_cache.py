@@ -0,0 +1,219 @@
+"""Persistent on-disk cache placed in front of the embedding model calls."""
+
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Awaitable, Callable, Sequence
+
+import numpy as np
+from dotenv import load_dotenv
+
+from .utils.prometheus import REGISTRY
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_CACHE_HITS = REGISTRY.counter(
+    "rag_ingest_embedding_cache_hits_total", "Texts whose embedding was served by the embedding cache."
+)
+EMBEDDING_CACHE_MISSES = REGISTRY.counter(
+    "rag_ingest_embedding_cache_misses_total", "Texts the embedding cache could not serve."
+)
+EMBEDDING_CACHE_EVICTIONS = REGISTRY.counter(
+    "rag_ingest_embedding_cache_evictions_total", "Least recently used entries evicted from the embedding cache."
+)
+
+EmbedCallable = Callable[[list[str]], Awaitable[np.ndarray]]
+
+
+@dataclass
+class EmbeddingCacheStats:
+    """Hit/miss counters accumulated since the cache was opened."""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class EmbeddingCache:
+    """SQLite-backed vector store keyed by (model, dimension, SHA-256 of the text).
+
+    Vectors are stored as raw float32 bytes. When the number of entries exceeds
+    `max_entries`, the least recently used ones are evicted.
+    """
+
+    def __init__(self, path: Path, max_entries: int = 500_000):
+        """Open (or create) the cache database at `path`."""
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.stats = EmbeddingCacheStats()
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embedding (
+                model TEXT NOT NULL,
+                dim INTEGER NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (model, dim, text_hash)
+            )
+            """
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS embedding_last_used ON embedding (last_used)")
+        self._connection.commit()
+        self._entries = self._connection.execute("SELECT COUNT(*) FROM embedding").fetchone()[0]
+
+    @staticmethod
+    def hash_text(text: str) -> str:
+        """Digest used as the cache key for a text."""
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get_many(self, model: str, dim: int, text_hashes: Sequence[str]) -> dict[str, np.ndarray]:
+        """Return the cached vectors found for the given hashes and refresh their LRU timestamp."""
+        if not text_hashes:
+            return {}
+
+        unique_hashes = list(dict.fromkeys(text_hashes))
+        placeholders = ",".join("?" * len(unique_hashes))
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT text_hash, vector FROM embedding WHERE model = ? AND dim = ? AND text_hash IN ({placeholders})",
+                (model, dim, *unique_hashes),
+            ).fetchall()
+            if rows:
+                self._connection.execute(
+                    f"UPDATE embedding SET last_used = ? WHERE model = ? AND dim = ? AND text_hash IN ({placeholders})",
+                    (time.time(), model, dim, *unique_hashes),
+                )
+                self._connection.commit()
+
+        return {text_hash: np.frombuffer(vector, dtype=np.float32) for text_hash, vector in rows}
+
+    def put_many(self, model: str, dim: int, vectors: dict[str, np.ndarray]) -> None:
+        """Store freshly computed vectors and evict the least recently used entries beyond the bound."""
+        if not vectors:
+            return
+
+        now = time.time()
+        rows = [
+            (model, dim, text_hash, np.ascontiguousarray(vector, dtype=np.float32).tobytes(), now)
+            for text_hash, vector in vectors.items()
+        ]
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO embedding (model, dim, text_hash, vector, last_used) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            # Replaced rows make this an upper bound; only pay for an exact count when it overflows
+            self._entries += len(rows)
+            if self._entries > self.max_entries:
+                self._entries = self._connection.execute("SELECT COUNT(*) FROM embedding").fetchone()[0]
+            overflow = self._entries - self.max_entries
+            if overflow > 0:
+                self._connection.execute(
+                    "DELETE FROM embedding WHERE rowid IN (SELECT rowid FROM embedding ORDER BY last_used LIMIT ?)",
+                    (overflow,),
+                )
+                self.stats.evictions += overflow
+                EMBEDDING_CACHE_EVICTIONS.inc(overflow)
+                self._entries -= overflow
+            self._connection.commit()
+
+    def wrap(self, func: EmbedCallable, model: str, dim: int) -> EmbedCallable:
+        """Return an embedding callable that serves cached vectors and only sends misses to `func`."""
+
+        async def cached_func(texts: list[str], **kwargs) -> np.ndarray:
+            text_hashes = [self.hash_text(text) for text in texts]
+            cached = await asyncio.to_thread(self.get_many, model, dim, text_hashes)
+
+            miss_count = sum(1 for text_hash in text_hashes if text_hash not in cached)
+            self.stats.hits += len(texts) - miss_count
+            self.stats.misses += miss_count
+            EMBEDDING_CACHE_HITS.inc(len(texts) - miss_count)
+            EMBEDDING_CACHE_MISSES.inc(miss_count)
+
+            missing = list(dict.fromkeys(h for h in text_hashes if h not in cached))
+
+            if missing:
+                texts_by_hash = dict(zip(text_hashes, texts))
+                computed = await func([texts_by_hash[h] for h in missing], **kwargs)
+                fresh = dict(zip(missing, np.asarray(computed, dtype=np.float32)))
+                await asyncio.to_thread(self.put_many, model, dim, fresh)
+                cached.update(fresh)
+
+            result = np.empty((len(texts), dim), dtype=np.float32)
+            for row, text_hash in enumerate(text_hashes):
+                result[row] = cached[text_hash]
+            return result
+
+        return cached_func
+
+    def close(self) -> None:
+        """Close the underlying SQLite connection."""
+        logger.info(
+            "Embedding cache: %s hits, %s misses (hit rate %.1f%%), %s evictions",
+            self.stats.hits,
+            self.stats.misses,
+            self.stats.hit_rate * 100,
+            self.stats.evictions,
+        )
+        with self._lock:
+            self._connection.close()
+
+
+_cache: EmbeddingCache | None = None
+
+
+def get_embedding_cache() -> EmbeddingCache | None:
+    """Return the process-wide embedding cache, or None when disabled through EMBEDDING_CACHE_ENABLED."""
+    global _cache
+    if os.getenv("EMBEDDING_CACHE_ENABLED", "true").strip().lower() not in ("1", "true", "yes"):
+        return None
+    if _cache is None:
+        default_path = Path(os.getenv("RAG_STORAGE_DIR", "rag_storage")) / "embedding_cache.sqlite"
+        _cache = EmbeddingCache(
+            Path(os.getenv("EMBEDDING_CACHE_PATH", default_path)),
+            max_entries=int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", 500_000)),
+        )
+    return _cache
+
+
+def close_embedding_cache() -> None:
+    """Close the process-wide embedding cache, if opened; the next `get_embedding_cache` reopens it."""
+    global _cache
+    if _cache is not None:
+        _cache.close()
+        _cache = None
+
+
+def wrap_with_embedding_cache(func: EmbedCallable, model: str, dim: int) -> EmbedCallable:
+    """Like `EmbeddingCache.wrap`, but through the process-wide cache looked up on every call.
+
+    The returned callable outlives `close_embedding_cache`: the cache is reopened on the next
+    call, so a provider can be reused by successive worker runs.
+    """
+
+    async def cached_func(texts: list[str], **kwargs) -> np.ndarray:
+        cache = get_embedding_cache()
+        if cache is None:
+            return await func(texts, **kwargs)
+        return await cache.wrap(func, model, dim)(texts, **kwargs)
+
+    return cached_func
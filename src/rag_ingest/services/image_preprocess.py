@@ -0,0 +1,116 @@
+"""Downscale, recompress and strip images before they are sent to the vision model."""
+
+import base64
+import binascii
+import hashlib
+import io
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+from dotenv import load_dotenv
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional: images are then forwarded untouched
+    Image = None
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+_MIME_TYPES = {"JPEG": "image/jpeg", "WEBP": "image/webp", "PNG": "image/png"}
+
+
+class ImagePreprocessor:
+    """Resize to a maximum edge, re-encode and drop metadata, memoizing results by source hash."""
+
+    def __init__(
+        self,
+        max_edge: int = 1568,
+        quality: int = 85,
+        image_format: str = "JPEG",
+        cache_size: int = 256,
+    ):
+        """Store the target geometry/encoding and the size of the in-memory result cache."""
+        self.max_edge = max_edge
+        self.quality = quality
+        self.image_format = image_format.upper()
+        self.cache_size = cache_size
+        self._cache: OrderedDict[str, tuple[str, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def prepare(self, image_data: str) -> tuple[str, str]:
+        """Return `(base64 payload, mime type)` ready to be embedded in an `image_url`."""
+        if Image is None:
+            return image_data, "image/jpeg"
+
+        source_hash = hashlib.sha256(image_data.encode("ascii")).hexdigest()
+        with self._lock:
+            if source_hash in self._cache:
+                self._cache.move_to_end(source_hash)
+                return self._cache[source_hash]
+
+        try:
+            result = self._process(image_data)
+        except (OSError, ValueError, binascii.Error) as exc:
+            logger.warning("Unable to preprocess image, sending it unchanged: %s", exc)
+            result = (image_data, "image/jpeg")
+
+        with self._lock:
+            self._cache[source_hash] = result
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    def _process(self, image_data: str) -> tuple[str, str]:
+        raw = base64.b64decode(image_data, validate=False)
+        with Image.open(io.BytesIO(raw)) as source:
+            source_format = source.format
+            has_metadata = bool(source.info.get("icc_profile") or source.getexif())
+            image = ImageOps.exif_transpose(source)
+            resized = max(image.size) > self.max_edge
+            image.thumbnail((self.max_edge, self.max_edge), Image.LANCZOS)
+            # Encoders such as PNG copy `icc_profile` and other chunks from `info` by default
+            image.info = {}
+
+            candidates = [(self._encode(image, self.image_format), self.image_format)]
+            if source_format == "PNG" and self.image_format != "PNG":
+                # Text-heavy screenshots often stay smaller as PNG than as JPEG
+                candidates.append((self._encode(image, "PNG"), "PNG"))
+
+        encoded, encoded_format = min(candidates, key=lambda candidate: len(candidate[0]))
+        if not resized and not has_metadata and len(encoded) >= len(raw) and source_format in _MIME_TYPES:
+            # Already small enough and metadata-free: keep the original bytes with their real mime type
+            return image_data, _MIME_TYPES[source_format]
+        return base64.b64encode(encoded).decode("ascii"), _MIME_TYPES.get(encoded_format, "image/jpeg")
+
+    def _encode(self, image, image_format: str) -> bytes:
+        if image_format == "JPEG" and image.mode not in ("RGB", "L"):
+            # JPEG has no alpha channel: flatten transparent screenshots on white
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            rgba = image.convert("RGBA")
+            background.paste(rgba, mask=rgba.getchannel("A"))
+            image = background
+
+        output = io.BytesIO()
+        image.save(output, format=image_format, quality=self.quality, optimize=True)
+        return output.getvalue()
+
+
+_preprocessor: ImagePreprocessor | None = None
+
+
+def get_image_preprocessor() -> ImagePreprocessor | None:
+    """Return the process-wide preprocessor, or None when disabled through VLM_IMAGE_PREPROCESS."""
+    global _preprocessor
+    if os.getenv("VLM_IMAGE_PREPROCESS", "true").strip().lower() not in ("1", "true", "yes"):
+        return None
+    if _preprocessor is None:
+        _preprocessor = ImagePreprocessor(
+            max_edge=int(os.getenv("VLM_IMAGE_MAX_EDGE", 1568)),
+            quality=int(os.getenv("VLM_IMAGE_QUALITY", 85)),
+            image_format=os.getenv("VLM_IMAGE_FORMAT", "JPEG"),
+        )
+    return _preprocessor
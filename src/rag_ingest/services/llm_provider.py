@@ -5,18 +5,47 @@ from dotenv import load_dotenv
 from lightrag.llm.openai import openai_complete_if_cache
 from lightrag.llm.ollama import ollama_model_complete
 
+from .model_client import estimate_tokens, get_gateway
+from .utils.job_metrics import track_stage, with_passed_job_metrics
+from .utils.model_accounting import account_model_call
+
 load_dotenv()
 
-def llm_model_func(prompt, system_prompt=None, history_messages=[], **kwargs):
-    """Invoke the configured LLM with optional system prompt and history."""
-    return openai_complete_if_cache(
-        os.getenv("LLM_MODEL"),
-        prompt,
-        system_prompt=system_prompt,
-        history_messages=history_messages,
-        api_key=os.getenv("OPENAI_API_KEY"),
-        **kwargs,
-    )
+LLM_MODEL = os.getenv("LLM_MODEL")
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+
+@with_passed_job_metrics
+async def llm_model_func(prompt, system_prompt=None, history_messages=[], **kwargs):
+    """Invoke the configured LLM with optional system prompt and history.
+
+    Calls go through the `llm` gateway: they reuse pooled keep-alive connections and
+    wait for the LLM_RPM / LLM_TPM budgets instead of bursting into 429 errors. The call
+    (throttling excluded) is timed as the `llm` stage of the current job, and its tokens,
+    latency and cost are accounted against the queue item being processed.
+    """
+    gateway = get_gateway("llm")
+    prompt_tokens = estimate_tokens(prompt, system_prompt, history_messages)
+    await gateway.throttle(prompt_tokens)
+    kwargs["openai_client_configs"] = {
+        **gateway.client_configs(kwargs.get("base_url")),
+        **kwargs.get("openai_client_configs", {}),
+    }
+    with (
+        track_stage("llm", bytes_processed=len(prompt)),
+        account_model_call("llm", LLM_MODEL, prompt_tokens) as call,
+    ):
+        call.forward_usage_to(kwargs.pop("token_tracker", None))
+        result = await openai_complete_if_cache(
+            LLM_MODEL,
+            prompt,
+            system_prompt=system_prompt,
+            history_messages=history_messages,
+            api_key=OPENAI_API_KEY,
+            token_tracker=call,
+            **kwargs,
+        )
+        call.set_completion(result)
+        return result
     #return ollama_model_complete(
     #    prompt,
     #    system_prompt=system_prompt,
@@ -0,0 +1,164 @@
+"""Shared keep-alive HTTP clients and token-bucket rate limiting for remote model calls."""
+
+import asyncio
+import os
+import time
+from typing import Any
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DEFAULT_OPENAI_BASE_URL = "https://api.openai.com/v1"
+
+
+class TokenBucket:
+    """Token bucket that makes callers wait for capacity instead of failing.
+
+    Each `acquire` reserves its amount immediately, possibly driving the balance
+    negative, then sleeps until the refill covers it; callers are therefore served
+    in arrival order without needing a loop-bound lock.
+    """
+
+    def __init__(self, per_minute: float):
+        """Allow `per_minute` units per minute with a burst of one minute worth of units."""
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self, amount: float = 1.0) -> None:
+        """Wait until `amount` units are available and consume them."""
+        self._refill()
+        self.tokens -= amount
+        if self.tokens < 0:
+            await asyncio.sleep(-self.tokens / self.rate)
+
+    def try_acquire(self, amount: float = 1.0) -> float:
+        """Consume `amount` units if available and return 0, else return the seconds to wait."""
+        self._refill()
+        if self.tokens < amount:
+            return (amount - self.tokens) / self.rate
+        self.tokens -= amount
+        return 0.0
+
+
+class _SharedAsyncClient(httpx.AsyncClient):
+    """httpx client that survives the per-call `close()` LightRAG issues on its OpenAI clients."""
+
+    async def aclose(self) -> None:
+        """Keep the pooled connections open; use `shutdown` to really close them."""
+
+    async def shutdown(self) -> None:
+        await super().aclose()
+
+
+class ModelGateway:
+    """Per-provider access point owning the pooled HTTP clients and the rate limits."""
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: float = 0,
+        tokens_per_minute: float = 0,
+        max_connections: int = 20,
+        timeout: float | None = None,
+    ):
+        """Build the gateway; a limit of 0 disables the corresponding bucket."""
+        self.name = name
+        self.request_bucket = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self.token_bucket = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=60,
+        )
+        self.timeout = timeout
+        self._clients: dict[tuple[str, int], _SharedAsyncClient] = {}
+
+    @classmethod
+    def from_env(cls, name: str) -> "ModelGateway":
+        """Read `<NAME>_RPM`, `<NAME>_TPM`, `<NAME>_MAX_CONNECTIONS` and `<NAME>_TIMEOUT` once."""
+        prefix = name.upper()
+        timeout = os.getenv(f"{prefix}_TIMEOUT")
+        return cls(
+            name,
+            requests_per_minute=float(os.getenv(f"{prefix}_RPM", 0)),
+            tokens_per_minute=float(os.getenv(f"{prefix}_TPM", 0)),
+            max_connections=int(os.getenv(f"{prefix}_MAX_CONNECTIONS", 20)),
+            timeout=float(timeout) if timeout else None,
+        )
+
+    def http_client(self, base_url: str | None = None) -> httpx.AsyncClient:
+        """Return the long-lived client for an endpoint on the running event loop."""
+        base_url = base_url or os.getenv("OPENAI_API_BASE", DEFAULT_OPENAI_BASE_URL)
+        # Pooled connections belong to the event loop that opened them
+        key = (base_url, id(asyncio.get_running_loop()))
+        client = self._clients.get(key)
+        if client is None or client.is_closed:
+            client = _SharedAsyncClient(
+                limits=self.limits,
+                timeout=self.timeout if self.timeout is not None else httpx.Timeout(600, connect=10),
+            )
+            self._clients[key] = client
+        return client
+
+    def client_configs(self, base_url: str | None = None) -> dict[str, Any]:
+        """`openai_client_configs` making LightRAG's OpenAI client reuse the pooled connections."""
+        return {"http_client": self.http_client(base_url)}
+
+    async def throttle(self, estimated_tokens: int) -> None:
+        """Queue the call until both the request and the token budgets allow it."""
+        if self.request_bucket is not None:
+            await self.request_bucket.acquire(1)
+        if self.token_bucket is not None:
+            await self.token_bucket.acquire(estimated_tokens)
+
+    async def aclose(self) -> None:
+        """Close every pooled client of this gateway."""
+        clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            await client.shutdown()
+
+
+IMAGE_TOKEN_ESTIMATE = 1000
+
+
+def _count_characters(part: Any) -> int:
+    if isinstance(part, str):
+        return len(part)
+    if isinstance(part, dict):
+        # Base64 payloads say nothing about vision token cost, charge a flat amount per image
+        if part.get("type") == "image_url":
+            return IMAGE_TOKEN_ESTIMATE * 4
+        return sum(_count_characters(value) for value in part.values())
+    if isinstance(part, (list, tuple)):
+        return sum(_count_characters(value) for value in part)
+    return 0
+
+
+def estimate_tokens(*parts: Any) -> int:
+    """Cheap token estimate (about four characters per token) used to charge the token bucket."""
+    return sum(_count_characters(part) for part in parts) // 4 + 1
+
+
+_gateways: dict[str, ModelGateway] = {}
+
+
+def get_gateway(name: str) -> ModelGateway:
+    """Return the process-wide gateway for a provider name (`llm`, `vlm`, ...)."""
+    if name not in _gateways:
+        _gateways[name] = ModelGateway.from_env(name)
+    return _gateways[name]
+
+
+async def close_gateways() -> None:
+    """Close the pooled clients of every gateway, e.g. on worker shutdown."""
+    for gateway in list(_gateways.values()):
+        await gateway.aclose()
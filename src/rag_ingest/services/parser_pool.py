@@ -0,0 +1,125 @@
+"""Pool of long-lived processes running the RAGAnything document parsers off the event loop process."""
+
+import importlib
+import json
+import logging
+import multiprocessing
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Parser methods RAGAnything dispatches to, depending on the file type
+PARSE_METHODS = ("parse_pdf", "parse_image", "parse_office_doc", "parse_document")
+
+# Parser instance owned by each pool process, built once by `_init_process`
+_process_parser = None
+
+
+def _load_parser(parser_name: str):
+    """Build a parser from a RAGAnything parser name or a `module:factory` import path."""
+    if ":" in parser_name:
+        module_name, attribute = parser_name.split(":", 1)
+        return getattr(importlib.import_module(module_name), attribute)()
+    from raganything.parser import get_parser
+
+    return get_parser(parser_name)
+
+
+def _init_process(parser_name: str) -> None:
+    global _process_parser
+    _process_parser = _load_parser(parser_name)
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def _parse_in_process(method: str, kwargs: dict[str, Any]) -> bytes:
+    """Run one parse in a pool process and return the content list as compressed JSON."""
+    content_list = getattr(_process_parser, method)(**kwargs)
+    payload = json.dumps(content_list, separators=(",", ":"), default=str).encode("utf-8")
+    return zlib.compress(payload, 1)
+
+
+class ParserPool:
+    """Long-lived processes that load the parser (and its models) once and reuse it for every file.
+
+    Content lists travel back as zlib-compressed JSON instead of pickled object graphs.
+    """
+
+    def __init__(self, parser_name: str, max_workers: int):
+        """Start `max_workers` spawned processes each holding their own `parser_name` parser."""
+        self.parser_name = parser_name
+        self.max_workers = max_workers
+        # Spawned rather than forked: the parent runs an event loop and library threads
+        self._executor = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_process,
+            initargs=(parser_name,),
+        )
+        # Start every process now so parser models are loaded before the first document
+        self._warm_up = [self._executor.submit(_ping) for _ in range(max_workers)]
+
+    def parse(self, method: str, **kwargs) -> list[dict[str, Any]]:
+        """Run `parser.<method>(**kwargs)` in a pool process, blocking the calling thread until done."""
+        payload = self._executor.submit(_parse_in_process, method, kwargs).result()
+        return json.loads(zlib.decompress(payload))
+
+    def parser(self) -> "PooledParser":
+        """Parser stand-in to assign to `RAGAnything.doc_parser`."""
+        return PooledParser(self)
+
+    def close(self) -> None:
+        """Stop the pool processes, dropping parses that have not started."""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+class PooledParser:
+    """Drop-in for a RAGAnything parser whose parse methods run in the pool.
+
+    RAGAnything calls the parse methods through `asyncio.to_thread`, so the waiting happens
+    in a thread while the work happens in another process; its parse cache and document id
+    logic are unchanged. Other attributes are served by a local parser built on demand.
+    """
+
+    def __init__(self, pool: ParserPool):
+        self._pool = pool
+        self._local_parser = None
+
+    def __getattr__(self, name: str):
+        if name in PARSE_METHODS:
+            return lambda **kwargs: self._pool.parse(name, **kwargs)
+        if self._local_parser is None:
+            self._local_parser = _load_parser(self._pool.parser_name)
+        return getattr(self._local_parser, name)
+
+
+_pool: ParserPool | None = None
+
+
+def get_parser_pool(parser_name: str) -> ParserPool | None:
+    """Return the process-wide parser pool, or None when PARSER_POOL_SIZE is 0 (parse in-process)."""
+    global _pool
+    max_workers = int(os.getenv("PARSER_POOL_SIZE", 0))
+    if max_workers <= 0:
+        return None
+    if _pool is None:
+        logger.info("Starting %s parser processes (%s)", max_workers, parser_name)
+        _pool = ParserPool(parser_name, max_workers)
+    return _pool
+
+
+def close_parser_pool() -> None:
+    """Stop the parser processes, e.g. on worker shutdown."""
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        _pool = None
@@ -10,10 +10,21 @@ from raganything import RAGAnything
 
 from .embed_provider import embedding_func
 from .llm_provider import llm_model_func
-from .utils import AsyncMixin
+from .parser_pool import get_parser_pool
+from .utils import AsyncMixin, pass_job_metrics
 from .vlm_provider import vision_model_func
 
 
+def bind_model_calls_to_jobs(lightrag_instance) -> None:
+    """Attribute the model calls LightRAG queues to the job that made them (see `pass_job_metrics`).
+
+    Must run before RAGAnything copies `llm_model_func`. The embedding function is updated in
+    place because the storages already hold it.
+    """
+    lightrag_instance.llm_model_func = pass_job_metrics(lightrag_instance.llm_model_func)
+    lightrag_instance.embedding_func.func = pass_job_metrics(lightrag_instance.embedding_func.func)
+
+
 class RAGProvider(AsyncMixin):
     light_rag = None
     rag_anything = None
@@ -32,6 +43,8 @@ class RAGProvider(AsyncMixin):
             embedding_func=embedding_func(),
         )
 
+        bind_model_calls_to_jobs(lightrag_instance)
+
         await lightrag_instance.initialize_storages()
         await initialize_pipeline_status()
 
@@ -40,3 +53,17 @@ class RAGProvider(AsyncMixin):
             lightrag=lightrag_instance,  # Pass existing LightRAG instance
             vision_model_func=vision_model_func,
         )
+
+        parser_pool = get_parser_pool(self.rag_anything.config.parser)
+        if parser_pool is not None:
+            # Parse in the warm pool processes instead of threads of this process
+            self.rag_anything.doc_parser = parser_pool.parser()
+
+    async def delete_document(self, doc_id: str) -> None:
+        """Remove a document with its chunks, entities and relations from the LightRAG store.
+
+        Unknown ids are ignored; a refused or failed deletion raises RuntimeError.
+        """
+        result = await self.light_rag.adelete_by_doc_id(doc_id)
+        if result.status in ("fail", "not_allowed"):
+            raise RuntimeError(f"Unable to delete document {doc_id}: {result.message}")
@@ -1,7 +1,31 @@
 """Utility helpers shared across service modules."""
 
 from .async_mixin import AsyncMixin
+from .content_hash import compute_content_hash, document_id_for
+from .job_metrics import (
+    JobMetrics,
+    current_job_metrics,
+    pass_job_metrics,
+    track_stage,
+    with_passed_job_metrics,
+)
+from .model_accounting import ModelCall, account_model_call, current_model_call, mark_cache_miss
+from .retry import RetryPolicy, is_transient_error, retry_delay
 
 __all__ = [
-    "AsyncMixin"
+    "AsyncMixin",
+    "JobMetrics",
+    "ModelCall",
+    "RetryPolicy",
+    "account_model_call",
+    "compute_content_hash",
+    "current_job_metrics",
+    "current_model_call",
+    "document_id_for",
+    "is_transient_error",
+    "mark_cache_miss",
+    "pass_job_metrics",
+    "retry_delay",
+    "track_stage",
+    "with_passed_job_metrics",
 ]
@@ -0,0 +1,29 @@
+"""Streaming content digest used to detect files whose content is already indexed."""
+
+import hashlib
+import mmap
+import os
+from pathlib import Path
+
+CHUNK_SIZE = 1 << 20
+MMAP_THRESHOLD = 16 << 20
+
+def compute_content_hash(path: Path, chunk_size: int = CHUNK_SIZE, mmap_threshold: int = MMAP_THRESHOLD) -> str:
+    """Return the SHA-256 hex digest of a file, memory-mapping it when larger than `mmap_threshold`."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        size = os.fstat(handle.fileno()).st_size
+        if size >= mmap_threshold:
+            with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                with memoryview(mapped) as view:
+                    for offset in range(0, size, chunk_size):
+                        digest.update(view[offset:offset + chunk_size])
+        else:
+            for chunk in iter(lambda: handle.read(chunk_size), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def document_id_for(content_hash: str) -> str:
+    """Deterministic LightRAG document id for a content digest, so the document can be deleted later."""
+    return f"doc-{content_hash}"
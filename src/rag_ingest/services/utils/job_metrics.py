@@ -0,0 +1,127 @@
+"""Per-job stage timings, collected through a context variable set by the worker for each job."""
+
+import functools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Iterator, Optional
+
+from .prometheus import STAGE_DURATION, STAGE_ERRORS
+
+
+@dataclass
+class StageStats:
+    """Accumulated duration, number of calls and bytes handled by one stage of a job."""
+
+    seconds: float = 0.0
+    calls: int = 0
+    bytes_processed: int = 0
+
+
+class JobMetrics:
+    """Stage timings of one queue item attempt.
+
+    Model call stages (`llm`, `vlm`, `embedding`) add up the duration of every call, so with
+    concurrent calls their total can exceed the wall time of the `insert` stage they run in.
+    """
+
+    def __init__(self):
+        self.stages: dict[str, StageStats] = {}
+        # Accounting rows of the model calls made for the job (see `account_model_call`)
+        self.model_calls: list[dict] = []
+
+    def add(self, stage: str, seconds: float, calls: int = 1, bytes_processed: int = 0) -> None:
+        """Account `calls` calls of `stage` that took `seconds` in total."""
+        stats = self.stages.setdefault(stage, StageStats())
+        stats.seconds += seconds
+        stats.calls += calls
+        stats.bytes_processed += bytes_processed
+
+    @contextmanager
+    def time(self, stage: str, bytes_processed: int = 0) -> Iterator[None]:
+        """Time the enclosed block as one call of `stage`, whether it succeeds or raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - started, bytes_processed=bytes_processed)
+
+    def rows(self) -> list[dict]:
+        """Stage timings as rows for `IngestionStageMetricRepo.record`."""
+        return [
+            {
+                "stage": stage,
+                "duration_seconds": stats.seconds,
+                "call_count": stats.calls,
+                "bytes_processed": stats.bytes_processed,
+            }
+            for stage, stats in self.stages.items()
+        ]
+
+    def summary(self) -> str:
+        """One-line rendering for logs, e.g. `parse=1.20s insert=8.41s llm=22.03s/14`."""
+        return " ".join(
+            f"{stage}={stats.seconds:.2f}s" + (f"/{stats.calls}" if stats.calls > 1 else "")
+            for stage, stats in self.stages.items()
+        )
+
+
+# Metrics of the job running in the current task; tasks spawned by the job inherit it
+current_job_metrics: ContextVar[Optional[JobMetrics]] = ContextVar("current_job_metrics", default=None)
+
+# Keyword argument carrying the metrics of the calling job through LightRAG's call queues
+JOB_METRICS_KWARG = "_job_metrics"
+
+AsyncFunc = Callable[..., Awaitable[Any]]
+
+
+def pass_job_metrics(func: AsyncFunc) -> AsyncFunc:
+    """Wrap a LightRAG-queued model function so each call carries the metrics of the calling job.
+
+    LightRAG runs `llm_model_func` and `embedding_func` through `priority_limit_async_func_call`,
+    in long-lived worker tasks whose context was copied once, from the job that started them:
+    `current_job_metrics` read there would charge every later call to that first job. This
+    wrapper runs in the caller's task and hands its metrics over with the call arguments, to be
+    restored by `with_passed_job_metrics` around the queued function.
+    """
+
+    @functools.wraps(func)
+    async def call_with_job_metrics(*args, **kwargs):
+        kwargs[JOB_METRICS_KWARG] = current_job_metrics.get()
+        return await func(*args, **kwargs)
+
+    return call_with_job_metrics
+
+
+def with_passed_job_metrics(func: AsyncFunc) -> AsyncFunc:
+    """Run `func` with the job metrics passed by `pass_job_metrics`, when called through it."""
+
+    @functools.wraps(func)
+    async def run_with_job_metrics(*args, **kwargs):
+        if JOB_METRICS_KWARG not in kwargs:
+            return await func(*args, **kwargs)
+        token = current_job_metrics.set(kwargs.pop(JOB_METRICS_KWARG))
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            current_job_metrics.reset(token)
+
+    return run_with_job_metrics
+
+
+@contextmanager
+def track_stage(stage: str, bytes_processed: int = 0) -> Iterator[None]:
+    """Time the enclosed block into the metrics of the current job, if any, and the process-wide histograms."""
+    metrics = current_job_metrics.get()
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        seconds = time.perf_counter() - started
+        STAGE_DURATION.observe(seconds, stage=stage)
+        if metrics is not None:
+            metrics.add(stage, seconds, bytes_processed=bytes_processed)
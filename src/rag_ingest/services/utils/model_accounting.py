@@ -0,0 +1,146 @@
+"""Token, latency and cost accounting of model calls, attributed to the queue item being processed."""
+
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Iterator, Optional
+
+from dotenv import load_dotenv
+
+from .job_metrics import current_job_metrics
+from .prometheus import REGISTRY
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+MODEL_TOKENS = REGISTRY.counter(
+    "rag_ingest_model_tokens_total", "Tokens sent to and received from models.", ["kind", "direction"]
+)
+
+
+def _load_prices() -> dict[str, tuple[float, float]]:
+    """Parse MODEL_PRICES: JSON mapping a model name to [input, output] prices per million tokens."""
+    raw = os.getenv("MODEL_PRICES")
+    if not raw:
+        return {}
+    try:
+        return {model: (float(prices[0]), float(prices[1])) for model, prices in json.loads(raw).items()}
+    except (ValueError, TypeError, IndexError, AttributeError):
+        logger.warning("Ignoring malformed MODEL_PRICES: %s", raw)
+        return {}
+
+
+MODEL_PRICES = _load_prices()
+
+
+class ModelCall:
+    """One model call being accounted; also a LightRAG `token_tracker` receiving the real usage."""
+
+    def __init__(self, kind: str, model: Optional[str], prompt_tokens: int, cache_hit: bool = False):
+        self.kind = kind
+        self.model = model or ""
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = 0
+        # Until the provider reports usage, token counts are estimated from the text length
+        self.tokens_estimated = True
+        self.cache_hit = cache_hit
+        self.error: Optional[str] = None
+        self.started_at = datetime.now(timezone.utc)
+        self.latency_seconds = 0.0
+        self._forward_to = None
+
+    def forward_usage_to(self, token_tracker: Any) -> None:
+        """Also report usage to a tracker the caller passed in."""
+        self._forward_to = token_tracker
+
+    def add_usage(self, token_counts: dict) -> None:
+        """LightRAG `token_tracker` protocol: record the usage returned by the provider."""
+        self.prompt_tokens = int(token_counts.get("prompt_tokens") or 0)
+        self.completion_tokens = int(token_counts.get("completion_tokens") or 0)
+        self.tokens_estimated = False
+        if self._forward_to is not None:
+            self._forward_to.add_usage(token_counts)
+
+    def set_completion(self, completion: Any) -> None:
+        """Estimate the completion tokens from the returned text when no usage was reported."""
+        if self.tokens_estimated and isinstance(completion, str):
+            self.completion_tokens = len(completion) // 4 + 1
+
+    def mark_cache_miss(self, prompt_tokens: Optional[int] = None) -> None:
+        """Record that the call actually reached the model, optionally with the tokens really sent."""
+        self.cache_hit = False
+        if prompt_tokens is not None:
+            self.prompt_tokens = prompt_tokens
+
+    @property
+    def cost(self) -> Optional[float]:
+        """Price of the call from MODEL_PRICES, 0 when served from a cache, None for unpriced models."""
+        if self.cache_hit:
+            return 0.0
+        prices = MODEL_PRICES.get(self.model)
+        if prices is None:
+            return None
+        return (self.prompt_tokens * prices[0] + self.completion_tokens * prices[1]) / 1_000_000
+
+    def row(self) -> dict:
+        """Accounting row for `ModelCallRecordRepo.record_many`."""
+        return {
+            "kind": self.kind,
+            "model": self.model[:255],
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "tokens_estimated": self.tokens_estimated,
+            "latency_seconds": self.latency_seconds,
+            "cache_hit": self.cache_hit,
+            "cost": self.cost,
+            "error": self.error,
+            "created_at": self.started_at,
+        }
+
+
+# Model call in progress in the current task, so cache layers below it can report misses
+current_model_call: ContextVar[Optional[ModelCall]] = ContextVar("current_model_call", default=None)
+
+
+@contextmanager
+def account_model_call(
+    kind: str,
+    model: Optional[str],
+    prompt_tokens: int,
+    cache_hit: bool = False,
+) -> Iterator[ModelCall]:
+    """Account the enclosed model call against the current job, if any.
+
+    The call is kept in memory with the job metrics and written with them, in one batch,
+    when the job ends. Calls queued by LightRAG only see the right job when the queued
+    function restores it (see `pass_job_metrics`).
+    """
+    call = ModelCall(kind, model, prompt_tokens, cache_hit)
+    token = current_model_call.set(call)
+    started = time.perf_counter()
+    try:
+        yield call
+    except Exception as exc:
+        call.error = type(exc).__name__
+        raise
+    finally:
+        call.latency_seconds = time.perf_counter() - started
+        current_model_call.reset(token)
+        if not call.cache_hit:
+            MODEL_TOKENS.inc(call.prompt_tokens, kind=kind, direction="prompt")
+            MODEL_TOKENS.inc(call.completion_tokens, kind=kind, direction="completion")
+        metrics = current_job_metrics.get()
+        if metrics is not None:
+            metrics.model_calls.append(call.row())
+
+
+def mark_cache_miss(prompt_tokens: Optional[int] = None) -> None:
+    """Flag the model call in progress, if any, as having reached the model."""
+    call = current_model_call.get()
+    if call is not None:
+        call.mark_cache_miss(prompt_tokens)
@@ -0,0 +1,240 @@
+"""Minimal in-process metrics rendered in the Prometheus text exposition format.
+
+Updating a metric is a lock-protected dict update, cheap enough for the worker hot loop;
+everything that needs I/O (queue depth) is computed by collectors at scrape time only.
+"""
+
+import math
+import threading
+from bisect import bisect_left
+from typing import Callable, Iterable, Optional
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def samples(self) -> list[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        return "\n".join(
+            [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}", *self.samples()]
+        )
+
+
+class Counter(_Metric):
+    """Monotonic count, optionally split by labels."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        """Add `amount` to the series selected by `labels`."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            values = dict(self._values)
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in values.items()]
+
+
+class Gauge(_Metric):
+    """Value that goes up and down; `set_function` reads it lazily at scrape time instead."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float, **labels: str) -> None:
+        """Replace the value of the series selected by `labels`."""
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def set_function(self, function: Optional[Callable[[], float]]) -> None:
+        """Read the (unlabelled) value from `function` on every scrape."""
+        self._function = function
+
+    def value(self, **labels: str) -> float:
+        if self._function is not None:
+            return self._function()
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> list[str]:
+        if self._function is not None:
+            return [f"{self.name} {_format_value(self._function())}"]
+        with self._lock:
+            values = dict(self._values)
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in values.items()]
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets, with their sum and count."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket (last one is +Inf), sum]
+        self._values: dict[tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        """Count `value` in its bucket of the series selected by `labels`."""
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def count(self, **labels: str) -> int:
+        state = self._values.get(self._key(labels))
+        return sum(state[0]) if state else 0
+
+    def sum(self, **labels: str) -> float:
+        state = self._values.get(self._key(labels))
+        return state[1] if state else 0.0
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            values = {key: (list(state[0]), state[1]) for key, state in self._values.items()}
+        lines = []
+        for key, (counts, total) in values.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Set of metrics plus collectors refreshing the scrape-time ones."""
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._collectors: list[Callable[[], None]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        """Run `collector` (blocking I/O allowed, it runs in a thread) before every scrape."""
+        self._collectors.append(collector)
+
+    def remove_collector(self, collector: Callable[[], None]) -> None:
+        if collector in self._collectors:
+            self._collectors.remove(collector)
+
+    def collect(self) -> None:
+        for collector in list(self._collectors):
+            collector()
+
+    def render(self) -> str:
+        """Every metric in the Prometheus text format (version 0.0.4)."""
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+REGISTRY = Registry()
+
+# Series exposed by rag-worker; stage durations are also fed by `track_stage` in any process
+QUEUE_ITEMS = REGISTRY.gauge("rag_ingest_queue_items", "Queue items per status.", ["status"])
+JOBS_STARTED = REGISTRY.counter("rag_ingest_jobs_started_total", "Queue items reserved by this worker.")
+JOBS_FINISHED = REGISTRY.counter(
+    "rag_ingest_jobs_finished_total", "Jobs that ended, by resulting status (indexed, failed, queued for retry).", ["status"]
+)
+JOBS_FAILED = REGISTRY.counter("rag_ingest_jobs_failed_total", "Jobs marked failed or download_failed.")
+JOB_DURATION = REGISTRY.histogram(
+    "rag_ingest_job_duration_seconds", "Wall time of a job from reservation to its final commit.", ["status"]
+)
+JOBS_IN_FLIGHT = REGISTRY.gauge("rag_ingest_jobs_in_flight", "Jobs currently held by this worker.")
+STAGE_DURATION = REGISTRY.histogram(
+    "rag_ingest_stage_duration_seconds",
+    "Duration of each job stage and model call (hash, parse, insert, llm, vlm, embedding).",
+    ["stage"],
+)
+STAGE_ERRORS = REGISTRY.counter("rag_ingest_stage_errors_total", "Stage and model calls that raised.", ["stage"])
+DB_ROUND_TRIP = REGISTRY.histogram(
+    "rag_ingest_db_round_trip_seconds",
+    "Duration of each SQL statement sent by the worker.",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+DB_POOL_CHECKED_OUT = REGISTRY.gauge(
+    "rag_ingest_db_pool_checked_out", "Connections of the worker's database pool currently in use."
+)
+DB_POOL_OVERFLOW = REGISTRY.gauge(
+    "rag_ingest_db_pool_overflow", "Connections opened beyond DB_POOL_SIZE, up to DB_MAX_OVERFLOW."
+)
+DB_POOL_CHECKOUT = REGISTRY.histogram(
+    "rag_ingest_db_pool_checkout_seconds",
+    "Time to get a connection from the pool: waiting for a free one, opening one and the pre-ping.",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30),
+)
+STALE_RESETS = REGISTRY.counter(
+    "rag_ingest_stale_resets_total", "Processing jobs reset to queued, by reason (lease, timeout).", ["reason"]
+)
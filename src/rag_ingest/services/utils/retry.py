@@ -0,0 +1,77 @@
+"""Classification of ingestion failures and exponential backoff for the retryable ones."""
+
+import asyncio
+import random
+from dataclasses import dataclass
+
+import httpx
+
+# HTTP statuses meaning "try again later": timeouts, conflicts, throttling and upstream outages
+TRANSIENT_STATUS_CODES = frozenset({408, 409, 425, 429, 500, 502, 503, 504})
+
+# Exception class names raised by the model SDKs (openai, ollama) for transient conditions,
+# matched by name so neither package has to be importable here
+TRANSIENT_ERROR_NAMES = frozenset(
+    {
+        "APIConnectionError",
+        "APITimeoutError",
+        "RateLimitError",
+        "InternalServerError",
+        "ServiceUnavailableError",
+    }
+)
+
+
+def _status_code(exc: BaseException):
+    status_code = getattr(exc, "status_code", None)
+    if status_code is None:
+        status_code = getattr(getattr(exc, "response", None), "status_code", None)
+    return status_code if isinstance(status_code, int) else None
+
+
+def is_transient_error(exc: BaseException) -> bool:
+    """Whether a failure is likely to go away on its own (provider outage, rate limit, timeout).
+
+    The cause chain is inspected too, since LightRAG and RAGAnything often re-raise model
+    errors wrapped in their own exceptions. Anything else (unreadable document, parser
+    error, bad configuration) is permanent.
+    """
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        if isinstance(exc, (TimeoutError, asyncio.TimeoutError, ConnectionError, httpx.TransportError)):
+            return True
+        if type(exc).__name__ in TRANSIENT_ERROR_NAMES:
+            return True
+        status_code = _status_code(exc)
+        if status_code is not None:
+            return status_code in TRANSIENT_STATUS_CODES
+        exc = exc.__cause__ or exc.__context__
+    return False
+
+
+def retry_delay(attempt: int, base_delay: float, max_delay: float) -> float:
+    """Seconds to wait before attempt `attempt + 1`: exponential in `attempt`, capped, with jitter.
+
+    Half of the delay is fixed and half random, so items failing together during an outage
+    spread out instead of hitting the recovered provider at the same instant.
+    """
+    delay = min(max_delay, base_delay * 2 ** max(0, attempt - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """How many times a queue item is attempted and how long it waits between attempts."""
+
+    max_attempts: int = 5
+    base_delay: float = 30.0
+    max_delay: float = 1800.0
+
+    def should_retry(self, exc: BaseException, attempt: int) -> bool:
+        """Whether attempt number `attempt`, which failed with `exc`, deserves another one."""
+        return attempt < self.max_attempts and is_transient_error(exc)
+
+    def delay(self, attempt: int) -> float:
+        """Jittered backoff in seconds after attempt number `attempt` failed."""
+        return retry_delay(attempt, self.base_delay, self.max_delay)
@@ -1,60 +1,125 @@
 """Vision-capable LLM adapters supporting both OpenAI and Ollama backends."""
 
+import asyncio
 import os
 from lightrag.llm.openai import openai_complete
 from lightrag.llm.ollama import ollama_model_complete
 from dotenv import load_dotenv
+from .description_cache import get_image_description_cache
+from .image_preprocess import get_image_preprocessor
 from .llm_provider import llm_model_func
+from .model_client import estimate_tokens, get_gateway
+from .utils.job_metrics import track_stage
+from .utils.model_accounting import account_model_call, current_model_call
 
 load_dotenv()
 
-def vision_model_func(
+LLM_MODEL = os.getenv("LLM_MODEL")
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+
+async def vision_model_func(
+        prompt, system_prompt=None, history_messages=[], image_data=None, messages=None, **kwargs
+    ):
+        """Dispatch vision or text-only prompts, serving single-image descriptions from the cache.
+
+        Descriptions are cached by (model, prompts, image hash) unless VLM_CACHE_ENABLED is
+        false, and identical concurrent requests share one model call. Multimodal calls are
+        accounted against the current queue item, cache hits included.
+        """
+        if not image_data and not messages:
+            # Text-only prompts are accounted by `llm_model_func`
+            return await _vision_complete(prompt, system_prompt, history_messages, image_data, messages, **kwargs)
+
+        cache = get_image_description_cache()
+        cacheable = image_data and not messages and cache is not None and not kwargs.get("stream")
+        prompt_tokens = estimate_tokens(prompt, system_prompt, messages, {"type": "image_url"} if image_data else None)
+        # A cached call only becomes a miss when `_vision_complete` actually reaches the model
+        with account_model_call("vlm", LLM_MODEL, prompt_tokens, cache_hit=bool(cacheable)) as call:
+            if cacheable:
+                result = await cache.get_or_compute(
+                    cache.make_key(LLM_MODEL, prompt, system_prompt, image_data),
+                    LLM_MODEL,
+                    lambda: _vision_complete(prompt, system_prompt, history_messages, image_data, messages, **kwargs),
+                )
+            else:
+                result = await _vision_complete(prompt, system_prompt, history_messages, image_data, messages, **kwargs)
+            call.set_completion(result)
+            return result
+
+async def _vision_complete(
         prompt, system_prompt=None, history_messages=[], image_data=None, messages=None, **kwargs
     ):
-        """Dispatch vision or text-only prompts to the correct model invocation."""
+        """Dispatch vision or text-only prompts to the correct model invocation.
+
+        Multimodal calls go through the `vlm` gateway (pooled connections, VLM_RPM /
+        VLM_TPM budgets) and are timed as the `vlm` stage of the current job; text-only
+        prompts are delegated to `llm_model_func`.
+        """
+        if messages or image_data:
+            call = current_model_call.get()
+            if call is not None:
+                call.mark_cache_miss()
+                call.forward_usage_to(kwargs.pop("token_tracker", None))
+                kwargs["token_tracker"] = call
+            gateway = get_gateway("vlm")
+            await gateway.throttle(
+                estimate_tokens(prompt, system_prompt, messages, {"type": "image_url"} if image_data else None)
+            )
+            kwargs["openai_client_configs"] = {
+                **gateway.client_configs(kwargs.get("base_url")),
+                **kwargs.get("openai_client_configs", {}),
+            }
+
         # If messages format is provided (for multimodal VLM enhanced query), use it directly
         if messages:
-            return openai_complete(
-                os.getenv("LLM_MODEL"),
-                "",
-                system_prompt=None,
-                history_messages=[],
-                messages=messages,
-                api_key=os.getenv("OPENAI_API_KEY"),
-                **kwargs,
-            )
+            with track_stage("vlm"):
+                return await openai_complete(
+                    LLM_MODEL,
+                    "",
+                    system_prompt=None,
+                    history_messages=[],
+                    messages=messages,
+                    api_key=OPENAI_API_KEY,
+                    **kwargs,
+                )
         # Traditional single image format
         elif image_data:
-            return openai_complete(
-                 os.getenv("LLM_MODEL"),
-                "",
-                system_prompt=None,
-                history_messages=[],
-                messages=[
-                    {"role": "system", "content": system_prompt}
-                    if system_prompt
-                    else None,
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "text", "text": prompt},
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/jpeg;base64,{image_data}"
+            image_mime = "image/jpeg"
+            preprocessor = get_image_preprocessor()
+            if preprocessor is not None:
+                image_data, image_mime = await asyncio.to_thread(preprocessor.prepare, image_data)
+
+            with track_stage("vlm", bytes_processed=len(image_data)):
+                return await openai_complete(
+                    LLM_MODEL,
+                    "",
+                    system_prompt=None,
+                    history_messages=[],
+                    messages=[
+                        {"role": "system", "content": system_prompt}
+                        if system_prompt
+                        else None,
+                        {
+                            "role": "user",
+                            "content": [
+                                {"type": "text", "text": prompt},
+                                {
+                                    "type": "image_url",
+                                    "image_url": {
+                                        "url": f"data:{image_mime};base64,{image_data}"
+                                    },
                                 },
-                            },
-                        ],
-                    }
-                    if image_data
-                    else {"role": "user", "content": prompt},
-                ],
-                api_key=os.getenv("OPENAI_API_KEY"),
-                **kwargs,
-            )
+                            ],
+                        }
+                        if image_data
+                        else {"role": "user", "content": prompt},
+                    ],
+                    api_key=OPENAI_API_KEY,
+                    **kwargs,
+                )
         # Pure text format
         else:
-            return llm_model_func(prompt, system_prompt, history_messages, **kwargs)
+            return await llm_model_func(prompt, system_prompt, history_messages, **kwargs)
 
 def vision_model_func_bck(
         prompt, system_prompt=None, history_messages=[], image_data=None, messages=None, **kwargs
@@ -0,0 +1,161 @@
+"""CLI entrypoint printing where ingestion time goes, aggregated per stage from `ingestion_stage_metric`.
+
+With `--models`, reports the model calls accounted in `model_call_record` instead: the
+documents spending the most model time and the totals per document type (file extension).
+"""
+
+import argparse
+import json
+import sys
+from collections import defaultdict
+from pathlib import PurePosixPath
+from datetime import datetime, timedelta, timezone
+from typing import Optional, TextIO
+
+from sqlalchemy.orm import sessionmaker
+
+from .orm import get_session_maker
+from .repository import IngestionStageMetricRepo, ModelCallRecordRepo
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Define CLI arguments for the stage timing report."""
+    parser = argparse.ArgumentParser(
+        description="Report per-stage ingestion timings recorded by the worker."
+    )
+    parser.add_argument(
+        "--since-hours",
+        type=float,
+        default=None,
+        help="Only include attempts recorded during the last N hours (default: all).",
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Print the aggregate as JSON instead of a table.",
+    )
+    parser.add_argument(
+        "--models",
+        action="store_true",
+        help="Report model call tokens, latency and cost per document and per file type.",
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=20,
+        help="Number of documents listed by --models, by model latency (default: 20).",
+    )
+    return parser
+
+
+def stage_report(session_factory: sessionmaker, since: Optional[datetime] = None) -> list[dict]:
+    """Per-stage aggregate rows, with the share of total time and the throughput of each stage."""
+    with session_factory() as session:
+        rows = IngestionStageMetricRepo(session).aggregate(since)
+    # Model call stages overlap the insert stage they run in; the share is relative to job stages
+    job_seconds = sum(row["total_seconds"] for row in rows if row["stage"] not in ("llm", "vlm", "embedding"))
+    for row in rows:
+        total = row["total_seconds"] or 0.0
+        row["share"] = total / job_seconds if job_seconds else 0.0
+        row["bytes_per_second"] = row["bytes_processed"] / total if total else 0.0
+    return rows
+
+
+def model_report(
+    session_factory: sessionmaker, since: Optional[datetime] = None, top: int = 20
+) -> dict[str, list[dict]]:
+    """Model call totals of the `top` documents by model latency, and per file extension."""
+    with session_factory() as session:
+        rows = ModelCallRecordRepo(session).totals_by_queue_item(since)
+
+    fields = ("calls", "cache_hits", "errors", "prompt_tokens", "completion_tokens", "latency_seconds", "cost")
+    documents: dict[int, dict] = {}
+    for row in rows:
+        item_id = row["ingestion_queue_item_id"]
+        if item_id not in documents:
+            documents[item_id] = {
+                "ingestion_queue_item_id": item_id,
+                "storage_path": row["storage_path"],
+                **{field: 0 for field in fields},
+                "llm_seconds": 0.0,
+            }
+        document = documents[item_id]
+        for field in fields:
+            document[field] += row[field] or 0
+        if row["kind"] in ("llm", "vlm"):
+            document["llm_seconds"] += row["latency_seconds"] or 0.0
+
+    extensions: dict[str, dict] = defaultdict(
+        lambda: {"documents": 0, **{field: 0 for field in fields}, "llm_seconds": 0.0}
+    )
+    for document in documents.values():
+        extension = PurePosixPath(document["storage_path"] or "").suffix.lower() or "(none)"
+        totals = extensions[extension]
+        totals["documents"] += 1
+        for field in (*fields, "llm_seconds"):
+            totals[field] += document[field]
+    by_extension = [
+        {"extension": extension, **totals, "llm_seconds_per_document": totals["llm_seconds"] / totals["documents"]}
+        for extension, totals in extensions.items()
+    ]
+    by_extension.sort(key=lambda row: row["llm_seconds_per_document"], reverse=True)
+    slowest = sorted(documents.values(), key=lambda row: row["latency_seconds"], reverse=True)[:top]
+    return {"documents": slowest, "extensions": by_extension}
+
+
+def print_model_report(report: dict[str, list[dict]], out: TextIO = sys.stdout) -> None:
+    """Render the model call report as two aligned text tables."""
+    print(
+        f"{'extension':<12}{'docs':>7}{'calls':>8}{'hits':>7}{'tokens in':>12}{'tokens out':>12}"
+        f"{'llm s/doc':>11}{'cost':>10}",
+        file=out,
+    )
+    for row in report["extensions"]:
+        print(
+            f"{row['extension']:<12}{row['documents']:>7}{row['calls']:>8}{row['cache_hits']:>7}"
+            f"{row['prompt_tokens']:>12}{row['completion_tokens']:>12}{row['llm_seconds_per_document']:>11.1f}"
+            f"{row['cost']:>10.4f}",
+            file=out,
+        )
+    print(file=out)
+    print(f"{'item':>8}  {'calls':>6}{'tokens in':>12}{'tokens out':>12}{'model s':>10}{'cost':>10}  path", file=out)
+    for row in report["documents"]:
+        print(
+            f"{row['ingestion_queue_item_id']:>8}  {row['calls']:>6}{row['prompt_tokens']:>12}"
+            f"{row['completion_tokens']:>12}{row['latency_seconds']:>10.1f}{row['cost']:>10.4f}  {row['storage_path']}",
+            file=out,
+        )
+
+
+def print_report(rows: list[dict], out: TextIO = sys.stdout) -> None:
+    """Render the stage report as an aligned text table."""
+    header = f"{'stage':<14}{'jobs':>8}{'calls':>9}{'total s':>12}{'avg s':>10}{'max s':>10}{'share':>8}{'MB/s':>10}"
+    print(header, file=out)
+    for row in rows:
+        print(
+            f"{row['stage']:<14}{row['jobs']:>8}{row['calls']:>9}{row['total_seconds']:>12.1f}"
+            f"{row['avg_seconds']:>10.2f}{row['max_seconds']:>10.2f}{row['share']:>8.0%}"
+            f"{row['bytes_per_second'] / (1 << 20):>10.2f}",
+            file=out,
+        )
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Print the stage timing report."""
+    args = build_parser().parse_args(argv)
+    since = None
+    if args.since_hours is not None:
+        since = datetime.now(timezone.utc) - timedelta(hours=args.since_hours)
+    if args.models:
+        report = model_report(get_session_maker(), since, args.top)
+        if args.json:
+            print(json.dumps(report, indent=2))
+        else:
+            print_model_report(report)
+        return 0
+    rows = stage_report(get_session_maker(), since)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print_report(rows)
+    return 0
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+"""Local datagram channel used by the enqueuing side to wake sleeping workers immediately."""
+
+import asyncio
+import logging
+import os
+import socket
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+UNIX_PREFIX = "unix:"
+
+
+def parse_address(address: str) -> tuple[int, str | tuple[str, int]]:
+    """Turn `unix:/path/to.sock` or `host:port` into a (socket family, address) pair."""
+    if address.startswith(UNIX_PREFIX):
+        return socket.AF_UNIX, address[len(UNIX_PREFIX):]
+    host, _, port = address.rpartition(":")
+    return socket.AF_INET, (host or "127.0.0.1", int(port))
+
+
+class _WakeupProtocol(asyncio.DatagramProtocol):
+    """Set the listener event whenever any datagram arrives; the payload is ignored."""
+
+    def __init__(self, event: asyncio.Event):
+        self.event = event
+
+    def datagram_received(self, data, addr):
+        self.event.set()
+
+
+class WakeupListener:
+    """Bind a UDP or Unix datagram socket and expose an event set on every ping."""
+
+    def __init__(self, address: str):
+        """Store the address to bind; call `start` from within the running loop."""
+        self.address = address
+        self.event = asyncio.Event()
+        self._transport: Optional[asyncio.DatagramTransport] = None
+
+    async def start(self) -> "WakeupListener":
+        """Bind the socket on the running event loop."""
+        family, address = parse_address(self.address)
+        loop = asyncio.get_running_loop()
+        if family == socket.AF_UNIX:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            try:
+                # Remove a socket file left behind by a previous run
+                os.unlink(address)
+            except FileNotFoundError:
+                pass
+            sock.bind(address)
+            self._transport, _ = await loop.create_datagram_endpoint(
+                lambda: _WakeupProtocol(self.event), sock=sock
+            )
+        else:
+            self._transport, _ = await loop.create_datagram_endpoint(
+                lambda: _WakeupProtocol(self.event), local_addr=address
+            )
+        logger.info("Listening for wake-up pings on %s", self.address)
+        return self
+
+    def close(self) -> None:
+        """Release the socket."""
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+
+
+def notify_workers(address: str) -> None:
+    """Send a wake-up ping to the worker(s) listening on `address`; errors are only logged."""
+    family, target = parse_address(address)
+    try:
+        with socket.socket(family, socket.SOCK_DGRAM) as sock:
+            sock.sendto(b"wake", target)
+    except OSError as exc:
+        logger.warning("Unable to notify workers on %s: %s", address, exc)
@@ -1,11 +1,12 @@
 from __future__ import annotations
 
-"""Background worker that polls the ingestion queue and processes items sequentially."""
+"""Background worker that polls the ingestion queue and processes items with bounded concurrency."""
 
 import asyncio
 import logging
 import signal
-from datetime import datetime, timezone
+import time
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Awaitable, Callable, Optional
 
@@ -13,11 +14,46 @@ from sqlalchemy.orm import sessionmaker
 
 from .orm import (
     Config,
+    DbExecutor,
+    dispose_engines,
     get_session_maker
 )
-from .entity import IngestionQueueItem, QueueStatus
-from .repository import IngestionQueueItemRepo, IngestionLogRepo
+from .entity import IngestionQueueItem, QueueStatus, SourceFileState
+from .repository import (
+    AsyncRepository,
+    IngestionArchiveRepo,
+    IngestionQueueItemRepo,
+    IngestionLogRepo,
+    IndexedContentRepo,
+    IngestionStageMetricRepo,
+    ModelCallRecordRepo,
+    SourceFileStateRepo,
+)
 from .services import RAGProvider
+from .services.description_cache import close_image_description_cache
+from .services.embedding_cache import close_embedding_cache
+from .services.model_client import close_gateways
+from .services.parser_pool import close_parser_pool
+from .services.utils.prometheus import (
+    JOB_DURATION,
+    JOBS_FAILED,
+    JOBS_FINISHED,
+    JOBS_IN_FLIGHT,
+    JOBS_STARTED,
+    QUEUE_ITEMS,
+    REGISTRY,
+    STALE_RESETS,
+)
+from .services.utils import (
+    JobMetrics,
+    RetryPolicy,
+    compute_content_hash,
+    current_job_metrics,
+    document_id_for,
+    track_stage,
+)
+from .metrics_server import MetricsServer, instrument_engine
+from .wakeup import WakeupListener
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
@@ -27,61 +63,586 @@ def resolve_storage_path(shared_root: Path, relative_path: str) -> Path:
     return (shared_root / relative_path).resolve()
 
 
+def content_size(content_list: list[dict]) -> int:
+    """Characters of text and table content in a parsed content list, the payload sent to extraction."""
+    return sum(
+        len(str(item.get("text") or item.get("table_body") or ""))
+        for item in content_list
+        if isinstance(item, dict)
+    )
+
+
+class DocumentPipeline:
+    """Staged ingestion: parsing and LightRAG extraction/insertion run in separate workers.
+
+    Documents flow through a bounded parse queue, `parse_workers` parsers, a bounded queue
+    of parsed content lists and `extract_workers` extractors. While the LLM extracts
+    document k the next documents are already being parsed, so throughput is set by the
+    slowest stage instead of the sum of both. Full queues make the upstream stage wait.
+
+    Providers exposing only `process_document_complete` are run as a single stage.
+    """
+
+    def __init__(
+        self,
+        rag_provider: RAGProvider,
+        parse_workers: int = 1,
+        extract_workers: int = 1,
+        queue_size: int = 1,
+    ):
+        """Size the stages; `queue_size` bounds the documents waiting between two stages."""
+        self.rag_anything = rag_provider.rag_anything
+        self.parse_workers = parse_workers
+        self.extract_workers = extract_workers
+        self.queue_size = queue_size
+        self.staged = hasattr(self.rag_anything, "parse_document") and hasattr(
+            self.rag_anything, "insert_content_list"
+        )
+        self._parse_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._extract_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._tasks: list[asyncio.Task] = []
+
+    @property
+    def depth(self) -> int:
+        """Documents the pipeline can parse ahead of the extraction slots.
+
+        One per parser plus the parsed ones waiting in the extraction queue; documents
+        waiting in the parse queue are not worked on and do not count.
+        """
+        return self.parse_workers + self.queue_size if self.staged else 0
+
+    def start(self) -> "DocumentPipeline":
+        """Spawn the stage workers on the running loop."""
+        if self.staged and not self._tasks:
+            self._tasks = [
+                *(asyncio.create_task(self._parse_loop()) for _ in range(self.parse_workers)),
+                *(asyncio.create_task(self._extract_loop()) for _ in range(self.extract_workers)),
+            ]
+        return self
+
+    async def process(self, file_path: Path, doc_id: Optional[str] = None, size_bytes: int = 0) -> None:
+        """Run a document through both stages and return once it is inserted in LightRAG.
+
+        Stage durations are added to the metrics of the calling job (`current_job_metrics`):
+        `parse`, `insert` and `pipeline_wait` (time spent in the queues between stages), or a
+        single `ingest` stage when the provider is not staged.
+        """
+        if not self.staged:
+            with track_stage("ingest", bytes_processed=size_bytes):
+                await self.rag_anything.process_document_complete(file_path=file_path, doc_id=doc_id)
+            return
+        future = asyncio.get_running_loop().create_future()
+        job = (file_path, doc_id, size_bytes, current_job_metrics.get())
+        await self._parse_queue.put((job, time.perf_counter(), future))
+        await future
+
+    @staticmethod
+    def _enter_job(metrics: Optional[JobMetrics], queued_at: float):
+        """Account the queue wait of a job and make its metrics current in this stage worker."""
+        if metrics is not None:
+            metrics.add("pipeline_wait", time.perf_counter() - queued_at, calls=0)
+        return current_job_metrics.set(metrics)
+
+    async def _parse_loop(self) -> None:
+        while True:
+            job, queued_at, future = await self._parse_queue.get()
+            if future.done():
+                # The job was cancelled while waiting
+                continue
+            file_path, _, size_bytes, metrics = job
+            token = self._enter_job(metrics, queued_at)
+            try:
+                with track_stage("parse", bytes_processed=size_bytes):
+                    content_list, _ = await self.rag_anything.parse_document(str(file_path))
+            except Exception as exc:
+                if not future.done():
+                    future.set_exception(exc)
+                continue
+            finally:
+                current_job_metrics.reset(token)
+            await self._extract_queue.put((job, content_list, time.perf_counter(), future))
+
+    async def _extract_loop(self) -> None:
+        while True:
+            job, content_list, queued_at, future = await self._extract_queue.get()
+            if future.done():
+                continue
+            file_path, doc_id, _, metrics = job
+            token = self._enter_job(metrics, queued_at)
+            try:
+                with track_stage("insert", bytes_processed=content_size(content_list)):
+                    await self.rag_anything.insert_content_list(
+                        content_list, file_path=str(file_path), doc_id=doc_id
+                    )
+            except Exception as exc:
+                if not future.done():
+                    future.set_exception(exc)
+            else:
+                if not future.done():
+                    future.set_result(None)
+            finally:
+                current_job_metrics.reset(token)
+
+    async def close(self) -> None:
+        """Stop the stage workers."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+async def release_document(
+    rag_provider: RAGProvider,
+    source_file_state_repo: AsyncRepository[SourceFileStateRepo],
+    indexed_content_repo: AsyncRepository[IndexedContentRepo],
+    state: SourceFileState,
+) -> bool:
+    """Forget a file state and delete its LightRAG document unless another file still references it.
+
+    Returns True when the document was deleted.
+    """
+    storage_path, doc_id, content_hash = state.storage_path, state.doc_id, state.content_hash
+    await source_file_state_repo.remove(storage_path)
+    if await source_file_state_repo.count_references(doc_id, exclude_path=storage_path):
+        return False
+    await rag_provider.delete_document(doc_id)
+    await indexed_content_repo.remove(content_hash)
+    return True
+
+
+def lost_lease(queue_item: IngestionQueueItem) -> bool:
+    """Log that a job finished after losing its lease, and return False for `process_queue_item`."""
+    logger.warning("Lost lease on queue item %s, leaving its outcome to the new owner", queue_item.id)
+    return False
+
+
 async def process_queue_item(
     ingestion_log_repo: IngestionLogRepo,
     ingestion_queue_item_repo: IngestionQueueItemRepo,
     queue_item: IngestionQueueItem,
     shared_root: Path,
     rag_provider: RAGProvider,
-) -> None:
-    """Handle a single queue item lifecycle: load file, ingest it, and record results."""
-    queue_item = ingestion_queue_item_repo.find_one_by_id(queue_item.id)
+    indexed_content_repo: Optional[IndexedContentRepo] = None,
+    deduplicate: Optional[bool] = None,
+    source_file_state_repo: Optional[SourceFileStateRepo] = None,
+    incremental: Optional[bool] = None,
+    pipeline: Optional[DocumentPipeline] = None,
+    retry_policy: Optional[RetryPolicy] = None,
+    db_executor: Optional[DbExecutor] = None,
+) -> bool:
+    """Handle a single queue item lifecycle: load file, ingest it, and record results.
+
+    When deduplication is enabled, files whose content hash is already indexed are marked
+    indexed as duplicates without going through the LightRAG pipeline again. In incremental
+    mode, files unchanged since their last ingestion are skipped and modified ones replace
+    the LightRAG document built from their previous version. Transient failures (provider
+    outage, rate limit, timeout) re-queue the item with a backoff until `retry_policy`
+    gives up; other failures mark it failed right away.
+
+    Repository calls run on `db_executor` so a slow database does not stall the other
+    jobs; without one they run inline on the event loop.
+
+    Returns False when the item was no longer claimed by its worker once done (lease expired
+    and reclaimed): its status is then left to the new owner and nothing is logged.
+    """
+    indexed_content_repo = indexed_content_repo or IndexedContentRepo(ingestion_queue_item_repo.session)
+    source_file_state_repo = source_file_state_repo or SourceFileStateRepo(ingestion_queue_item_repo.session)
+    deduplicate = Config.get_deduplicate() if deduplicate is None else deduplicate
+    incremental = Config.get_incremental() if incremental is None else incremental
+    retry_policy = retry_policy or get_retry_policy()
+    db_executor = db_executor or DbExecutor(max_workers=0)
+    ingestion_log_repo = AsyncRepository(ingestion_log_repo, db_executor)
+    ingestion_queue_item_repo = AsyncRepository(ingestion_queue_item_repo, db_executor)
+    indexed_content_repo = AsyncRepository(indexed_content_repo, db_executor)
+    source_file_state_repo = AsyncRepository(source_file_state_repo, db_executor)
+    # The worker the item was reserved for: a reload would see whoever reclaimed it meanwhile
+    claimed_by = queue_item.claimed_by
+    queue_item = await ingestion_queue_item_repo.find_one_by_id(queue_item.id)
 
     abs_path = resolve_storage_path(shared_root, queue_item.storage_path)
     if not abs_path.exists() or not abs_path.is_file():
         logger.error("File missing or unreadable: %s", abs_path)
 
-        ingestion_queue_item_repo.mark_failed(
+        if not await ingestion_queue_item_repo.mark_failed(
             queue_item,
             rag_message=f"File not found at {abs_path}",
-        )
+            claimed_by=claimed_by,
+        ):
+            return lost_lease(queue_item)
 
-        ingestion_log_repo.add_ingestion_log(
+        await ingestion_log_repo.add_ingestion_log(
             ingestion_queue_item_id=queue_item.id,
             level="error",
             message=f"Unable to open file at {abs_path}",
         )
 
-        return
+        return True
 
     try:
-        await rag_provider.rag_anything.process_document_complete(file_path=abs_path)
+        file_stat = abs_path.stat()
+        previous_state = await source_file_state_repo.find_by_path(queue_item.storage_path) if incremental else None
+        unchanged = (
+            previous_state is not None
+            and previous_state.size_bytes == file_stat.st_size
+            and previous_state.mtime == file_stat.st_mtime
+        )
+
+        content_hash = None
+        if (deduplicate or incremental) and not unchanged:
+            # Hash off the event loop: large scans would otherwise stall the other jobs
+            with track_stage("hash", bytes_processed=file_stat.st_size):
+                content_hash = await asyncio.to_thread(compute_content_hash, abs_path)
+            if previous_state is not None and previous_state.content_hash == content_hash:
+                # Touched but identical: refresh the mtime so the next run skips hashing
+                await source_file_state_repo.upsert(
+                    queue_item.storage_path,
+                    size_bytes=file_stat.st_size,
+                    mtime=file_stat.st_mtime,
+                    content_hash=content_hash,
+                    doc_id=previous_state.doc_id,
+                )
+                unchanged = True
+
+        if unchanged:
+            if not await ingestion_queue_item_repo.mark_indexed(
+                queue_item,
+                rag_message="Unchanged since last ingestion",
+                claimed_by=claimed_by,
+            ):
+                return lost_lease(queue_item)
+
+            await ingestion_log_repo.add_ingestion_log(
+                ingestion_queue_item_id=queue_item.id,
+                level="info",
+                message=f"Skipped {queue_item.storage_path}: unchanged since last ingestion",
+            )
+
+            return True
+
+        if previous_state is not None:
+            # Modified file: drop the document built from its previous version first
+            previous_doc_id = previous_state.doc_id
+            if await release_document(rag_provider, source_file_state_repo, indexed_content_repo, previous_state):
+                await ingestion_log_repo.add_ingestion_log(
+                    ingestion_queue_item_id=queue_item.id,
+                    level="info",
+                    message=f"Deleted document {previous_doc_id} built from the previous version",
+                )
+
+        doc_id = document_id_for(content_hash) if content_hash is not None else None
+
+        duplicate_of = await indexed_content_repo.find_by_hash(content_hash) if deduplicate else None
+        if duplicate_of is not None:
+            if incremental:
+                await source_file_state_repo.upsert(
+                    queue_item.storage_path,
+                    size_bytes=file_stat.st_size,
+                    mtime=file_stat.st_mtime,
+                    content_hash=content_hash,
+                    doc_id=doc_id,
+                )
+
+            if not await ingestion_queue_item_repo.mark_indexed(
+                queue_item,
+                rag_message=f"Duplicate of already indexed content {duplicate_of.storage_path}",
+                claimed_by=claimed_by,
+            ):
+                return lost_lease(queue_item)
+
+            await ingestion_log_repo.add_ingestion_log(
+                ingestion_queue_item_id=queue_item.id,
+                level="info",
+                message=f"Skipped {queue_item.storage_path}: content {content_hash} already indexed",
+            )
+
+            return True
 
-        ingestion_queue_item_repo.mark_indexed(
+        if pipeline is not None:
+            await pipeline.process(abs_path, doc_id, size_bytes=file_stat.st_size)
+        else:
+            with track_stage("ingest", bytes_processed=file_stat.st_size):
+                await rag_provider.rag_anything.process_document_complete(file_path=abs_path, doc_id=doc_id)
+
+        if content_hash is not None:
+            await indexed_content_repo.record(
+                content_hash,
+                storage_path=queue_item.storage_path,
+                size_bytes=file_stat.st_size,
+                ingestion_queue_item_id=queue_item.id,
+            )
+
+        if incremental:
+            await source_file_state_repo.upsert(
+                queue_item.storage_path,
+                size_bytes=file_stat.st_size,
+                mtime=file_stat.st_mtime,
+                content_hash=content_hash,
+                doc_id=doc_id,
+            )
+
+        if not await ingestion_queue_item_repo.mark_indexed(
             queue_item,
             rag_message="Ingestion completed successfully",
-        )
+            claimed_by=claimed_by,
+        ):
+            return lost_lease(queue_item)
 
-        ingestion_log_repo.add_ingestion_log(
+        await ingestion_log_repo.add_ingestion_log(
             ingestion_queue_item_id=queue_item.id,
             level="info",
             message=f"Successfully ingested {queue_item.storage_path}",
         )
         
     except Exception as exc:
+        attempt = queue_item.attempt_count or 1
+        if retry_policy.should_retry(exc, attempt):
+            delay = retry_policy.delay(attempt)
+            logger.warning(
+                "Transient failure for queue item %s (attempt %s/%s), retrying in %.0fs: %s",
+                queue_item.id,
+                attempt,
+                retry_policy.max_attempts,
+                delay,
+                exc,
+            )
+
+            if not await ingestion_queue_item_repo.mark_retry(
+                queue_item,
+                next_attempt_at=datetime.now(timezone.utc) + timedelta(seconds=delay),
+                rag_message=str(exc),
+                claimed_by=claimed_by,
+            ):
+                return lost_lease(queue_item)
+
+            await ingestion_log_repo.add_ingestion_log(
+                ingestion_queue_item_id=queue_item.id,
+                level="warning",
+                message=(
+                    f"Attempt {attempt}/{retry_policy.max_attempts} of {queue_item.storage_path} "
+                    f"failed transiently, retrying in {delay:.0f}s: {exc}"
+                ),
+            )
+
+            return True
+
         logger.exception("Ingestion failed for queue item %s", queue_item.id)
 
-        ingestion_queue_item_repo.mark_failed(
+        if not await ingestion_queue_item_repo.mark_failed(
             queue_item,
             rag_message=str(exc),
-        )
+            claimed_by=claimed_by,
+        ):
+            return lost_lease(queue_item)
 
-        ingestion_log_repo.add_ingestion_log(
+        await ingestion_log_repo.add_ingestion_log(
             ingestion_queue_item_id=queue_item.id,
             level="error",
             message=f"Failed to ingest {queue_item.storage_path}: {exc}",
         )
 
+    return True
+
+
+def get_retry_policy() -> RetryPolicy:
+    """Retry policy configured through the INGESTOR_MAX_ATTEMPTS / INGESTOR_RETRY_* variables."""
+    return RetryPolicy(
+        max_attempts=Config.get_max_attempts(),
+        base_delay=Config.get_retry_base_delay_seconds(),
+        max_delay=Config.get_retry_max_delay_seconds(),
+    )
+
+
+def estimate_cost(shared_root: Path, queue_item: IngestionQueueItem) -> Optional[int]:
+    """Estimated cost of a job: the manager-provided estimate, else the file size in bytes."""
+    if queue_item.estimated_cost is not None:
+        return queue_item.estimated_cost
+    try:
+        return resolve_storage_path(shared_root, queue_item.storage_path).stat().st_size
+    except OSError:
+        # Missing files fail fast once reserved
+        return None
+
+
+def schedule_queued_items(
+    ingestion_queue_item_repo: IngestionQueueItemRepo,
+    shared_root: Path,
+    defer_per_mb: float,
+    max_defer: float,
+) -> int:
+    """Estimate the cost of newly queued items and give them their `scheduled_at`.
+
+    Blocking (file stats and queries): the worker runs it on its DB executor.
+    """
+    queue_items = ingestion_queue_item_repo.find_unscheduled_items()
+    for queue_item in queue_items:
+        cost = estimate_cost(shared_root, queue_item)
+        ingestion_queue_item_repo.schedule_item(queue_item, cost, defer_per_mb, max_defer)
+    return len(queue_items)
+
+
+async def prune_missing_sources(
+    session_factory: sessionmaker,
+    shared_root: Path,
+    rag_provider: RAGProvider,
+    db_executor: Optional[DbExecutor] = None,
+) -> list[str]:
+    """Delete the LightRAG documents of tracked files that disappeared from the shared storage.
+
+    Nothing is deleted while `shared_root` is missing or empty: an unmounted share must not
+    wipe the index. Returns the storage paths that were pruned.
+    """
+    db_executor = db_executor or DbExecutor(max_workers=0)
+
+    def _find_missing() -> Optional[list[SourceFileState]]:
+        if not shared_root.is_dir() or not any(shared_root.iterdir()):
+            return None
+        states = source_file_state_repo.repo.iter_all()
+        return [state for state in states if not resolve_storage_path(shared_root, state.storage_path).is_file()]
+
+    session = session_factory()
+    session.expire_on_commit = False
+    try:
+        source_file_state_repo = AsyncRepository(SourceFileStateRepo(session), db_executor)
+        indexed_content_repo = AsyncRepository(IndexedContentRepo(session), db_executor)
+        missing = await db_executor.run(_find_missing)
+        if missing is None:
+            logger.warning("Shared storage %s is missing or empty, skipping the prune sweep", shared_root)
+            return []
+
+        pruned = []
+        for state in missing:
+            storage_path = state.storage_path
+            try:
+                await release_document(rag_provider, source_file_state_repo, indexed_content_repo, state)
+            except Exception:
+                logger.exception("Failed to delete the document of removed file %s", storage_path)
+                await db_executor.run(session.rollback)
+                continue
+            # Commit per file: a deleted document must never be left tracked after a later failure
+            await db_executor.run(session.commit)
+            pruned.append(storage_path)
+    finally:
+        await db_executor.run(session.close)
+    return pruned
+
+
+def archive_finished_items(
+    session_factory: sessionmaker,
+    retention_seconds: float,
+    batch_size: int,
+) -> int:
+    """Move items finished more than `retention_seconds` ago to the history tables, one batch per transaction."""
+    finished_before = datetime.now(timezone.utc) - timedelta(seconds=retention_seconds)
+    archived = 0
+    with session_factory() as session:
+        archive_repo = IngestionArchiveRepo(session)
+        while True:
+            count = archive_repo.archive_finished_batch(finished_before, batch_size)
+            session.commit()
+            archived += count
+            if count < batch_size:
+                return archived
+
+
+def recover_crashed_job(
+    session_factory: sessionmaker,
+    queue_item_id: int,
+    worker_id: str,
+    exc: BaseException,
+    retry_policy: RetryPolicy,
+) -> Optional[QueueStatus]:
+    """Requeue or fail a job whose task raised out of `process_queue_item`, releasing its lease.
+
+    Does nothing when the item already left processing or is no longer owned by `worker_id`.
+    Returns the new status of the item, if it was changed.
+    """
+    with session_factory() as session:
+        ingestion_queue_item_repo = IngestionQueueItemRepo(session)
+        queue_item = ingestion_queue_item_repo.find_one_by_id(queue_item_id)
+        if queue_item is None or queue_item.status != QueueStatus.processing or queue_item.claimed_by != worker_id:
+            return None
+        attempt = queue_item.attempt_count or 1
+        if retry_policy.should_retry(exc, attempt):
+            delay = retry_policy.delay(attempt)
+            released = ingestion_queue_item_repo.mark_retry(
+                queue_item,
+                next_attempt_at=datetime.now(timezone.utc) + timedelta(seconds=delay),
+                rag_message=str(exc),
+                claimed_by=worker_id,
+            )
+            level, message = "warning", f"Job crashed on attempt {attempt}, retrying in {delay:.0f}s: {exc!r}"
+        else:
+            released = ingestion_queue_item_repo.mark_failed(queue_item, rag_message=str(exc), claimed_by=worker_id)
+            level, message = "error", f"Job crashed: {exc!r}"
+        if released is None:
+            return None
+        IngestionLogRepo(session).add_ingestion_log(
+            ingestion_queue_item_id=queue_item_id,
+            level=level,
+            message=message,
+        )
+        session.commit()
+        return queue_item.status
+
+
+async def process_queue_item_in_session(
+    session_factory: sessionmaker,
+    queue_item: IngestionQueueItem,
+    shared_root: Path,
+    rag_provider: RAGProvider,
+    pipeline: Optional[DocumentPipeline] = None,
+    retry_policy: Optional[RetryPolicy] = None,
+    db_executor: Optional[DbExecutor] = None,
+    reserved_at: Optional[float] = None,
+) -> None:
+    """Run `process_queue_item` inside a dedicated DB session so concurrent jobs never share one.
+
+    The stages of the job are timed and stored in `ingestion_stage_metric`, and its model
+    calls in `model_call_record`, in the transaction recording its outcome. Nothing is
+    committed for a job that lost its lease. `reserved_at` is the `time.perf_counter()`
+    value at reservation, the start of the job duration (defaults to now).
+    """
+    db_executor = db_executor or DbExecutor(max_workers=0)
+    metrics = JobMetrics()
+    token = current_job_metrics.set(metrics)
+    started = time.perf_counter() if reserved_at is None else reserved_at
+
+    def _record_outcome() -> QueueStatus:
+        attempt = queue_item.attempt_count or 1
+        IngestionStageMetricRepo(session).record(queue_item.id, attempt, metrics.rows())
+        ModelCallRecordRepo(session).record_many(queue_item.id, attempt, metrics.model_calls)
+        session.commit()
+        return ingestion_queue_item_repo.find_one_by_id(queue_item.id).status
+
+    session = session_factory()
+    session.expire_on_commit = False
+    try:
+        ingestion_queue_item_repo = IngestionQueueItemRepo(session)
+        finished = await process_queue_item(
+            IngestionLogRepo(session),
+            ingestion_queue_item_repo,
+            queue_item,
+            shared_root,
+            rag_provider,
+            pipeline=pipeline,
+            retry_policy=retry_policy,
+            db_executor=db_executor,
+        )
+        # A job that lost its lease is accounted by its new owner: drop what it wrote
+        status = await db_executor.run(_record_outcome) if finished else None
+    finally:
+        current_job_metrics.reset(token)
+        # Closing returns the connection to the pool, a ROLLBACK round-trip
+        await db_executor.run(session.close)
+    if status is None:
+        return
+    JOB_DURATION.observe(time.perf_counter() - started, status=status.value)
+    JOBS_FINISHED.inc(status=status.value)
+    if status in (QueueStatus.failed, QueueStatus.download_failed):
+        JOBS_FAILED.inc()
+    if metrics.stages:
+        logger.info("Queue item %s stage timings: %s", queue_item.id, metrics.summary())
+
 
 async def run_worker(
     *,
@@ -89,22 +650,74 @@ async def run_worker(
     shared_root: Optional[Path] = None,
     rag_storage_dir: Optional[Path] = None,
     poll_interval: Optional[float] = None,
+    max_poll_interval: Optional[float] = None,
+    wakeup_address: Optional[str] = None,
     processing_timeout: Optional[float] = None,
+    max_concurrency: Optional[int] = None,
+    worker_id: Optional[str] = None,
+    exclusive: Optional[bool] = None,
+    lease_seconds: Optional[float] = None,
+    heartbeat_interval: Optional[float] = None,
+    prune_interval: Optional[float] = None,
+    parse_workers: Optional[int] = None,
+    pipeline_queue_size: Optional[int] = None,
+    prefetch: Optional[int] = None,
+    sjf_defer_per_mb: Optional[float] = None,
+    sjf_max_defer: Optional[float] = None,
+    archive_interval: Optional[float] = None,
+    retry_policy: Optional[RetryPolicy] = None,
+    metrics_address: Optional[str] = None,
+    db_threads: Optional[int] = None,
     exit_on_idle: bool = False,
     rag_provider_factory: Optional[Callable[[Path], Awaitable[RAGProvider]]] = None,
 ) -> None:
-    """Main worker loop that polls for jobs, reserves one at a time, and ingests it."""
+    """Main worker loop that polls for jobs and keeps up to `max_concurrency` of them in extraction.
+
+    Jobs go through a `DocumentPipeline`: with `prefetch`, additional jobs are reserved so
+    that the next documents are parsed while the current ones are extracted. Database work (polling,
+    lease renewals, job bookkeeping) runs on `db_threads` dedicated threads so that a
+    slow database never blocks the event loop.
+    """
     session_factory = session_factory or get_session_maker()
     shared_root = shared_root or Config.get_shared_storage_dir()
     rag_storage_dir = rag_storage_dir or Config.get_rag_storage_dir()
     poll_interval = poll_interval or Config.get_poll_interval_seconds()
+    max_poll_interval = max(poll_interval, max_poll_interval or Config.get_max_poll_interval_seconds())
+    wakeup_address = wakeup_address or Config.get_wakeup_address()
     processing_timeout = processing_timeout or Config.get_processing_timeout_seconds()
+    max_concurrency = max_concurrency or Config.get_max_concurrency()
+    worker_id = worker_id or Config.get_worker_id()
+    exclusive = Config.get_exclusive_worker() if exclusive is None else exclusive
+    lease_seconds = lease_seconds or Config.get_lease_seconds()
+    heartbeat_interval = heartbeat_interval or Config.get_heartbeat_interval_seconds()
+    prune_interval = Config.get_prune_interval_seconds() if prune_interval is None else prune_interval
+    parse_workers = parse_workers or Config.get_parse_workers()
+    pipeline_queue_size = pipeline_queue_size or Config.get_pipeline_queue_size()
+    prefetch = Config.get_prefetch() if prefetch is None else prefetch
+    sjf_defer_per_mb = Config.get_sjf_defer_per_mb_seconds() if sjf_defer_per_mb is None else sjf_defer_per_mb
+    sjf_max_defer = Config.get_sjf_max_defer_seconds() if sjf_max_defer is None else sjf_max_defer
+    archive_interval = Config.get_archive_interval_seconds() if archive_interval is None else archive_interval
+    retry_policy = retry_policy or get_retry_policy()
+    metrics_address = metrics_address or Config.get_metrics_address()
+    db_threads = db_threads or Config.get_db_threads()
     rag_provider_factory = rag_provider_factory or (lambda path: RAGProvider(path))
 
     shared_root.mkdir(parents=True, exist_ok=True)
     rag_provider = await rag_provider_factory(rag_storage_dir)
+    db_executor = DbExecutor(max_workers=db_threads)
+    pipeline = DocumentPipeline(
+        rag_provider,
+        parse_workers=parse_workers,
+        extract_workers=max_concurrency,
+        queue_size=pipeline_queue_size,
+    ).start()
+    # Jobs parsed ahead are reserved too, so they keep their lease while waiting for extraction;
+    # never reserve more than the pipeline can work on
+    capacity = max_concurrency + min(prefetch, pipeline.depth)
 
     stop_event = asyncio.Event()
+    # Jobs currently handled by this process, keyed by queue item id
+    in_flight: dict[int, asyncio.Task] = {}
 
     def _handle_stop(signame: str):
         """Signal handler to request a graceful shutdown."""
@@ -119,13 +732,139 @@ async def run_worker(
             # Signals may not be available on some platforms (e.g., Windows)
             pass
 
-    while not stop_event.is_set():
+    wakeup_listener = await WakeupListener(wakeup_address).start() if wakeup_address else None
+
+    def _collect_queue_depth() -> None:
+        with session_factory() as session:
+            for status, count in IngestionQueueItemRepo(session).count_by_status().items():
+                QUEUE_ITEMS.set(count, status=status.value)
+
+    metrics_server = None
+    if metrics_address:
+        metrics_server = await MetricsServer(metrics_address).start()
+        # Queue depth and in-flight jobs are read at scrape time only, never in the loop
+        REGISTRY.add_collector(_collect_queue_depth)
+        JOBS_IN_FLIGHT.set_function(lambda: len(in_flight))
+        instrument_engine(session_factory.kw["bind"])
+
+    async def _wait_for_event(timeout: Optional[float] = None) -> bool:
+        """Block until a job completes, a wake-up ping or stop request arrives, or the timeout expires.
+
+        Returns False when the timeout expired without anything happening.
+        """
+        waiters = [asyncio.ensure_future(stop_event.wait())]
+        if wakeup_listener is not None:
+            waiters.append(asyncio.ensure_future(wakeup_listener.event.wait()))
+        done, _ = await asyncio.wait(
+            [*in_flight.values(), *waiters], timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+        )
+        for waiter in waiters:
+            waiter.cancel()
+        if wakeup_listener is not None:
+            wakeup_listener.event.clear()
+
+        for queue_item_id, task in list(in_flight.items()):
+            if task not in done:
+                continue
+            del in_flight[queue_item_id]
+            if not task.cancelled() and task.exception() is not None:
+                await _recover_crashed_job(queue_item_id, task.exception())
+        return bool(done)
+
+    async def _recover_crashed_job(queue_item_id: int, exc: BaseException) -> None:
+        """Take a crashed job out of processing so it is neither renewed nor left orphaned."""
+        logger.error("Job for queue item %s crashed", queue_item_id, exc_info=exc)
+        try:
+            status = await db_executor.run(
+                recover_crashed_job, session_factory, queue_item_id, worker_id, exc, retry_policy
+            )
+        except Exception:
+            logger.exception("Failed to release crashed job %s", queue_item_id)
+            return
+        if status is not None:
+            JOBS_FINISHED.inc(status=status.value)
+            if status == QueueStatus.failed:
+                JOBS_FAILED.inc()
+
+    def _renew_leases(owned_ids: list[int]) -> list[int]:
+        with session_factory() as session:
+            renewed_ids = IngestionQueueItemRepo(session).renew_leases(owned_ids, worker_id, lease_seconds)
+            session.commit()
+        return renewed_ids
+
+    async def _heartbeat() -> None:
+        """Periodically renew the leases of in-flight jobs so other workers do not reclaim them."""
+        while True:
+            await asyncio.sleep(heartbeat_interval)
+            if not in_flight:
+                continue
+            owned_ids = list(in_flight.keys())
+            try:
+                renewed_ids = await db_executor.run(_renew_leases, owned_ids)
+            except Exception:
+                logger.exception("Failed to renew job leases")
+                continue
+            # Jobs that finished meanwhile are no longer processing, only stop live ones
+            lost_ids = [item_id for item_id in owned_ids if item_id not in renewed_ids and item_id in in_flight]
+            if lost_ids:
+                # Another worker may already run them: stop instead of indexing them twice
+                logger.warning("Lost lease on jobs %s, cancelling them", lost_ids)
+                for item_id in lost_ids:
+                    in_flight[item_id].cancel()
+
+    async def _prune() -> None:
+        """Periodically delete the documents of files removed from the shared storage."""
+        while True:
+            try:
+                pruned = await prune_missing_sources(session_factory, shared_root, rag_provider, db_executor)
+            except Exception:
+                logger.exception("Failed to prune documents of removed files")
+            else:
+                if pruned:
+                    logger.info("Deleted documents of %s removed files", len(pruned))
+            await asyncio.sleep(prune_interval)
+
+    async def _archive() -> None:
+        """Periodically move old finished jobs out of the hot queue tables."""
+        retention_seconds = Config.get_archive_after_seconds()
+        batch_size = Config.get_archive_batch_size()
+        while True:
+            try:
+                archived = await db_executor.run(
+                    archive_finished_items, session_factory, retention_seconds, batch_size
+                )
+            except Exception:
+                logger.exception("Failed to archive finished jobs")
+            else:
+                if archived:
+                    logger.info("Archived %s finished jobs", archived)
+            await asyncio.sleep(archive_interval)
+
+    def _poll_queue(in_flight_ids: list[int], free_slots: int) -> Optional[list[IngestionQueueItem]]:
+        """Recover abandoned jobs, schedule new ones and reserve up to `free_slots` of them.
+
+        Runs on the DB executor. Returns None when exclusive and another worker is busy.
+        """
         with session_factory() as session:
             session.expire_on_commit=False
             ingestion_queue_item_repo = IngestionQueueItemRepo(session)
             ingestion_log_repo = IngestionLogRepo(session)
 
-            reset_ids = ingestion_queue_item_repo.reset_stale_processing_items(processing_timeout)
+            expired_ids = ingestion_queue_item_repo.reset_expired_leases(exclude_ids=in_flight_ids)
+            if expired_ids:
+                for queue_item_id in expired_ids:
+                    ingestion_log_repo.add_ingestion_log(
+                        ingestion_queue_item_id=queue_item_id,
+                        level="warning",
+                        message="job resetted to queued after its worker lease expired",
+                    )
+                session.commit()
+                STALE_RESETS.inc(len(expired_ids), reason="lease")
+                logger.warning("Reclaimed %s jobs with expired leases", expired_ids)
+
+            reset_ids = ingestion_queue_item_repo.reset_stale_processing_items(
+                processing_timeout, exclude_ids=in_flight_ids
+            )
 
             if reset_ids:
                 for queue_item_id in reset_ids:
@@ -135,30 +874,109 @@ async def run_worker(
                         message="job resetted to queued after exceeding processing timeout",
                     )
                 session.commit()
+                STALE_RESETS.inc(len(reset_ids), reason="timeout")
                 logger.warning("Reset %s stale jobs to queued", reset_ids)
 
-            if ingestion_queue_item_repo.has_processing_item():
+            if exclusive and ingestion_queue_item_repo.has_processing_item(exclude_ids=in_flight_ids):
+                return None
+
+            schedule_queued_items(ingestion_queue_item_repo, shared_root, sjf_defer_per_mb, sjf_max_defer)
+
+            queue_items = ingestion_queue_item_repo.reserve_next_batch(
+                free_slots,
+                worker_id,
+                started_at=datetime.now(timezone.utc),
+                lease_seconds=lease_seconds,
+            )
+            for queue_item in queue_items:
+                ingestion_log_repo.add_ingestion_log(
+                    ingestion_queue_item_id=queue_item.id,
+                    level="info",
+                    message=f"Job reserved for processing by {worker_id}",
+                )
+            session.commit()
+        return queue_items
+
+    heartbeat_task = asyncio.create_task(_heartbeat())
+    prune_task = asyncio.create_task(_prune()) if prune_interval > 0 else None
+    archive_task = asyncio.create_task(_archive()) if archive_interval > 0 else None
+
+    # Idle sleep grows exponentially from poll_interval up to max_poll_interval
+    idle_delay = poll_interval
+
+    try:
+        while not stop_event.is_set():
+            if len(in_flight) >= capacity:
+                await _wait_for_event()
+                idle_delay = poll_interval
+                continue
+
+            queue_items = await db_executor.run(_poll_queue, list(in_flight.keys()), capacity - len(in_flight))
+            # Job durations run from the reservation commit, whenever their processing starts
+            reserved_at = time.perf_counter()
+            if queue_items is None:
                 logger.info("Another worker is already processing a job; exiting")
                 return
+            JOBS_STARTED.inc(len(queue_items))
 
-            queue_item = ingestion_queue_item_repo.find_next_queued_item()
-            if queue_item is None:
-                session.commit()
-                if exit_on_idle:
+            if not queue_items:
+                if exit_on_idle and not in_flight:
                     return
-                await asyncio.sleep(poll_interval)
+                # A finished job or a wake-up ping means new work is likely: re-poll at once
+                if await _wait_for_event(timeout=idle_delay):
+                    idle_delay = poll_interval
+                else:
+                    idle_delay = min(idle_delay * 2, max_poll_interval)
                 continue
 
-            ingestion_queue_item_repo.reserve_item_for_processing(queue_item, started_at=datetime.now(timezone.utc))
-            ingestion_log_repo.add_ingestion_log(
-                ingestion_queue_item_id=queue_item.id,
-                level="info",
-                message="Job reserved for processing",
-            )
-            session.commit()
-
-            await process_queue_item(ingestion_log_repo, ingestion_queue_item_repo, queue_item, shared_root, rag_provider)
-            session.commit()
+            idle_delay = poll_interval
+
+            for queue_item in queue_items:
+                in_flight[queue_item.id] = asyncio.create_task(
+                    process_queue_item_in_session(
+                        session_factory,
+                        queue_item,
+                        shared_root,
+                        rag_provider,
+                        pipeline,
+                        retry_policy,
+                        db_executor,
+                        reserved_at=reserved_at,
+                    )
+                )
+    finally:
+        # Let reserved jobs finish so none is left in processing on shutdown
+        if in_flight:
+            logger.info("Waiting for %s in-flight jobs to finish", len(in_flight))
+            await asyncio.gather(*in_flight.values(), return_exceptions=True)
+            for queue_item_id, task in list(in_flight.items()):
+                if not task.cancelled() and task.exception() is not None:
+                    await _recover_crashed_job(queue_item_id, task.exception())
+            in_flight.clear()
+        heartbeat_task.cancel()
+        await pipeline.close()
+        if prune_task is not None:
+            prune_task.cancel()
+        if archive_task is not None:
+            archive_task.cancel()
+        if wakeup_listener is not None:
+            wakeup_listener.close()
+        if metrics_server is not None:
+            await metrics_server.close()
+            REGISTRY.remove_collector(_collect_queue_depth)
+            JOBS_IN_FLIGHT.set_function(None)
+        await close_gateways()
+        close_parser_pool()
+        close_embedding_cache()
+        close_image_description_cache()
+        # Cancelled background tasks may still be closing their session on a DB thread
+        await asyncio.gather(
+            *(task for task in (heartbeat_task, prune_task, archive_task) if task is not None),
+            return_exceptions=True,
+        )
+        db_executor.shutdown()
+        # Every connection is back in its pool now
+        dispose_engines()
 
     logger.info("Worker stopped cleanly")
 
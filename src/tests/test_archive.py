@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from rag_ingest.orm import Base
+from rag_ingest.entity import (
+    IngestionLog,
+    IngestionLogHistory,
+    IngestionQueueItem,
+    IngestionQueueItemHistory,
+    QueueStatus,
+)
+from rag_ingest.worker import archive_finished_items
+
+
+@pytest.fixture()
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path/'archive.sqlite'}", future=True)
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine, autoflush=False, future=True)
+
+
+def _seed(session_factory) -> dict[str, list[int]]:
+    now = datetime.now(timezone.utc)
+    ids: dict[str, list[int]] = {"old": [], "recent": [], "queued": []}
+    with session_factory() as session:
+        for index in range(5):
+            status = QueueStatus.failed if index == 0 else QueueStatus.indexed
+            item = IngestionQueueItem(
+                storage_path=f"old{index}.pdf",
+                status=status,
+                ended_at=now - timedelta(days=30),
+                scheduled_at=now - timedelta(days=31),
+                next_attempt_at=now - timedelta(days=31),
+                claimed_by="worker-1",
+                lease_expires_at=now - timedelta(days=30),
+                heartbeat_at=now - timedelta(days=30),
+            )
+            session.add(item)
+            session.flush()
+            session.add_all(
+                [
+                    IngestionLog(ingestion_queue_item_id=item.id, message="reserved"),
+                    IngestionLog(ingestion_queue_item_id=item.id, message="done"),
+                ]
+            )
+            ids["old"].append(item.id)
+        recent = IngestionQueueItem(storage_path="recent.pdf", status=QueueStatus.indexed, ended_at=now)
+        queued = IngestionQueueItem(storage_path="queued.pdf")
+        session.add_all([recent, queued])
+        session.flush()
+        session.add(IngestionLog(ingestion_queue_item_id=recent.id, message="done"))
+        ids["recent"].append(recent.id)
+        ids["queued"].append(queued.id)
+        session.commit()
+    return ids
+
+
+@pytest.mark.asyncio
+async def test_archive_moves_old_finished_items_and_logs_in_batches(session_factory):
+    ids = _seed(session_factory)
+
+    archived = await asyncio.to_thread(archive_finished_items, session_factory, 7 * 24 * 3600, 2)
+
+    assert archived == 5
+    with session_factory() as session:
+        assert sorted(item.id for item in session.query(IngestionQueueItem)) == ids["recent"] + ids["queued"]
+        assert session.query(IngestionLog).count() == 1
+        history = {item.id: item for item in session.query(IngestionQueueItemHistory)}
+        assert sorted(history) == ids["old"]
+        assert history[ids["old"][0]].status == QueueStatus.failed
+        assert history[ids["old"][1]].storage_path == "old1.pdf"
+        assert history[ids["old"][1]].claimed_by == "worker-1"
+        assert history[ids["old"][1]].next_attempt_at is not None
+        assert history[ids["old"][1]].scheduled_at is not None
+        assert history[ids["old"][1]].lease_expires_at is not None
+        assert history[ids["old"][1]].heartbeat_at is not None
+        assert session.query(IngestionLogHistory).count() == 10
+
+
+def test_queue_queries_use_the_composite_indexes(session_factory):
+    queries = {
+        "ix_ingestion_queue_item_status_started_at": (
+            "SELECT id FROM ingestion_queue_item WHERE status = 'processing' "
+            "AND started_at < '2024-01-01' AND lease_expires_at IS NULL"
+        ),
+        "ix_ingestion_queue_item_status_lease": (
+            "SELECT id FROM ingestion_queue_item WHERE status = 'processing' "
+            "AND lease_expires_at IS NOT NULL AND lease_expires_at < '2024-01-01'"
+        ),
+        "ix_ingestion_queue_item_status_created_at": (
+            "SELECT id FROM ingestion_queue_item WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+        ),
+    }
+    with session_factory() as session:
+        connection = session.connection()
+        for index_name, query in queries.items():
+            plan = " ".join(row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {query}"))
+            assert index_name in plan, plan
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import exc, text
+from sqlalchemy.pool import SingletonThreadPool
+
+from rag_ingest.entity import IngestionQueueItem
+from rag_ingest.metrics_server import instrument_engine
+from rag_ingest.orm import create_schema, dispose_engines, get_engine, get_session_maker
+from rag_ingest.orm.db import TimedQueuePool
+from rag_ingest.services.utils.prometheus import DB_POOL_CHECKED_OUT, DB_POOL_CHECKOUT, DB_POOL_OVERFLOW
+
+
+@pytest.fixture()
+def pool_env(monkeypatch):
+    monkeypatch.setenv("DB_POOL_SIZE", "2")
+    monkeypatch.setenv("DB_MAX_OVERFLOW", "1")
+    monkeypatch.setenv("DB_POOL_TIMEOUT", "0.05")
+    monkeypatch.setenv("DB_POOL_RECYCLE", "600")
+
+
+def test_engine_is_shared_per_url(tmp_path, pool_env):
+    url = f"sqlite:///{tmp_path / 'shared.sqlite'}"
+    create_schema(url)
+    session_factory = get_session_maker(url)
+    with session_factory() as session:
+        session.add(IngestionQueueItem(storage_path="a.txt"))
+        session.commit()
+
+    engine = get_engine(url)
+    assert session_factory.kw["bind"] is engine
+    assert get_engine(f"sqlite:///{tmp_path / 'other.sqlite'}") is not engine
+    assert isinstance(engine.pool, TimedQueuePool)
+    assert engine.pool.size() == 2
+    # In-memory SQLite keeps its single shared connection
+    assert isinstance(get_engine("sqlite://").pool, SingletonThreadPool)
+
+
+def test_pool_statistics_and_dispose(tmp_path, pool_env):
+    engine = get_engine(f"sqlite:///{tmp_path / 'pool.sqlite'}")
+    instrument_engine(engine)
+    checkouts = DB_POOL_CHECKOUT.count()
+    connections = [engine.connect() for _ in range(3)]
+    try:
+        assert (DB_POOL_CHECKED_OUT.value(), DB_POOL_OVERFLOW.value()) == (3, 1)
+        # Pool and overflow exhausted: the checkout times out, and its wait is still observed
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+        assert DB_POOL_CHECKOUT.count() == checkouts + 4
+    finally:
+        for connection in connections:
+            connection.close()
+
+    dispose_engines()
+    assert engine.pool.checkedin() == 0
+    # The engine stays usable and its new pool keeps reporting checkouts
+    with engine.connect() as connection:
+        assert connection.execute(text("select 1")).scalar() == 1
+    assert DB_POOL_CHECKOUT.count() == checkouts + 5
+    assert DB_POOL_CHECKED_OUT.value() == 0
+    DB_POOL_CHECKED_OUT.set_function(None)
+    DB_POOL_OVERFLOW.set_function(None)
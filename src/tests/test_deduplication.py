@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from rag_ingest.orm import Base
+from rag_ingest import worker
+from rag_ingest.entity import IndexedContent, IngestionLog, IngestionQueueItem, QueueStatus
+from rag_ingest.services.utils import compute_content_hash
+from rag_ingest.worker import run_worker
+
+
+class StubRagAnything:
+    def __init__(self):
+        self.processed: list[Path] = []
+
+    async def process_document_complete(self, file_path: Path, doc_id: str | None = None):
+        self.processed.append(Path(file_path))
+
+
+class StubRagProvider:
+    def __init__(self):
+        self.rag_anything = StubRagAnything()
+
+
+@pytest.fixture()
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path/'dedup.sqlite'}", future=True)
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine, autoflush=False, future=True)
+
+
+@pytest.mark.parametrize("mmap_threshold", [0, 1 << 30])
+def test_content_hash_matches_sha256(tmp_path, mmap_threshold):
+    payload = b"x" * 3000 + b"tail"
+    source = tmp_path / "blob.bin"
+    source.write_bytes(payload)
+
+    digest = compute_content_hash(source, chunk_size=1024, mmap_threshold=mmap_threshold)
+
+    assert digest == hashlib.sha256(payload).hexdigest()
+
+
+@pytest.mark.asyncio
+async def test_duplicate_upload_skips_ingestion(tmp_path, session_factory):
+    shared_root = tmp_path / "shared"
+    shared_root.mkdir()
+    (shared_root / "first.pdf").write_bytes(b"same content")
+    (shared_root / "copy.pdf").write_bytes(b"same content")
+    (shared_root / "other.pdf").write_bytes(b"other content")
+
+    with session_factory() as session:
+        items = [IngestionQueueItem(storage_path=name) for name in ("first.pdf", "copy.pdf", "other.pdf")]
+        session.add_all(items)
+        session.commit()
+        ids = [item.id for item in items]
+
+    provider = StubRagProvider()
+
+    async def provider_factory(_):
+        return provider
+
+    await run_worker(
+        session_factory=session_factory,
+        shared_root=shared_root,
+        rag_storage_dir=tmp_path / "rag",
+        poll_interval=0.01,
+        exit_on_idle=True,
+        rag_provider_factory=provider_factory,
+    )
+
+    assert [path.name for path in provider.rag_anything.processed] == ["first.pdf", "other.pdf"]
+    with session_factory() as session:
+        copy = session.get(IngestionQueueItem, ids[1])
+        assert copy.status == QueueStatus.indexed
+        assert "duplicate" in copy.rag_message.lower()
+        assert session.query(IndexedContent).count() == 2
+
+
+@pytest.mark.asyncio
+async def test_unreadable_file_marks_item_failed(tmp_path, session_factory, monkeypatch):
+    shared_root = tmp_path / "shared"
+    shared_root.mkdir()
+    (shared_root / "locked.pdf").write_bytes(b"secret")
+    with session_factory() as session:
+        item = IngestionQueueItem(storage_path="locked.pdf")
+        session.add(item)
+        session.commit()
+        item_id = item.id
+
+    def unreadable(path, *args, **kwargs):
+        raise PermissionError(f"Permission denied: {path}")
+
+    monkeypatch.setattr(worker, "compute_content_hash", unreadable)
+    provider = StubRagProvider()
+
+    async def provider_factory(_):
+        return provider
+
+    await run_worker(
+        session_factory=session_factory,
+        shared_root=shared_root,
+        rag_storage_dir=tmp_path / "rag",
+        poll_interval=0.01,
+        exit_on_idle=True,
+        rag_provider_factory=provider_factory,
+    )
+
+    assert provider.rag_anything.processed == []
+    with session_factory() as session:
+        failed = session.get(IngestionQueueItem, item_id)
+        assert failed.status == QueueStatus.failed
+        assert "Permission denied" in failed.rag_message
+        assert session.query(IngestionLog).filter_by(ingestion_queue_item_id=item_id, level="error").count() == 1
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from rag_ingest.services import description_cache
+from rag_ingest.services.description_cache import (
+    ImageDescriptionCache,
+    close_image_description_cache,
+    get_image_description_cache,
+)
+
+
+@pytest.mark.asyncio
+async def test_identical_requests_share_one_call_and_persist(tmp_path):
+    cache = ImageDescriptionCache(tmp_path / "vlm.sqlite")
+    key = cache.make_key("gpt", "Describe", None, "aW1hZ2U=")
+    calls = []
+
+    async def describe():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "a company logo"
+
+    results = await asyncio.gather(*(cache.get_or_compute(key, "gpt", describe) for _ in range(3)))
+    reopened = ImageDescriptionCache(tmp_path / "vlm.sqlite")
+    again = await reopened.get_or_compute(key, "gpt", describe)
+
+    assert results == ["a company logo"] * 3
+    assert again == "a company logo"
+    assert len(calls) == 1
+    assert cache.stats.coalesced == 2
+    assert reopened.stats.hits == 1
+
+
+def test_key_depends_on_model_prompt_and_image():
+    base = ImageDescriptionCache.make_key("gpt", "Describe", "sys", "AAAA")
+
+    assert base == ImageDescriptionCache.make_key("gpt", "Describe", "sys", "AAAA")
+    assert base != ImageDescriptionCache.make_key("other", "Describe", "sys", "AAAA")
+    assert base != ImageDescriptionCache.make_key("gpt", "Describe more", "sys", "AAAA")
+    assert base != ImageDescriptionCache.make_key("gpt", "Describe", "sys", "BBBB")
+
+
+@pytest.mark.asyncio
+async def test_failures_are_not_cached(tmp_path):
+    cache = ImageDescriptionCache(tmp_path / "vlm.sqlite")
+    key = cache.make_key("gpt", "Describe", None, "AAAA")
+
+    async def failing():
+        raise RuntimeError("429")
+
+    with pytest.raises(RuntimeError):
+        await cache.get_or_compute(key, "gpt", failing)
+
+    async def working():
+        return "ok"
+
+    assert await cache.get_or_compute(key, "gpt", working) == "ok"
+
+
+@pytest.mark.asyncio
+async def test_cancelling_the_first_caller_does_not_fail_coalesced_ones(tmp_path):
+    cache = ImageDescriptionCache(tmp_path / "vlm.sqlite")
+    key = cache.make_key("gpt", "Describe", None, "AAAA")
+    calls = []
+
+    async def describe():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "a chart"
+
+    first = asyncio.ensure_future(cache.get_or_compute(key, "gpt", describe))
+    await asyncio.sleep(0.01)
+    second = asyncio.ensure_future(cache.get_or_compute(key, "gpt", describe))
+    await asyncio.sleep(0.01)
+    first.cancel()
+
+    assert await second == "a chart"
+    assert first.cancelled()
+    assert len(calls) == 1
+    assert cache.get(key) == "a chart"
+
+
+def test_process_wide_cache_is_closed_and_reopened(tmp_path, monkeypatch):
+    monkeypatch.setenv("VLM_CACHE_PATH", str(tmp_path / "vlm.sqlite"))
+    monkeypatch.setattr(description_cache, "_cache", None)
+    cache = get_image_description_cache()
+    cache.put("key", "gpt", "a logo")
+
+    close_image_description_cache()
+
+    reopened = get_image_description_cache()
+    assert reopened is not cache
+    assert reopened.get("key") == "a logo"
+    close_image_description_cache()
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from rag_ingest.services.embed_provider import EMBEDDING_BATCH_SIZE, EmbeddingBatcher
+
+
+class RecordingEmbedder:
+    def __init__(self):
+        self.calls: list[list[str]] = []
+
+    async def __call__(self, texts: list[str]) -> np.ndarray:
+        self.calls.append(list(texts))
+        return np.array([[float(len(text)), 0.0] for text in texts])
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_call():
+    embedder = RecordingEmbedder()
+    batcher = EmbeddingBatcher(embedder, max_batch_size=16, max_wait=0.01)
+    batches, texts = EMBEDDING_BATCH_SIZE.count(), EMBEDDING_BATCH_SIZE.sum()
+
+    results = await asyncio.gather(batcher(["a"]), batcher(["bb", "ccc"]), batcher(["dddd"]))
+
+    assert embedder.calls == [["a", "bb", "ccc", "dddd"]]
+    assert [result[:, 0].tolist() for result in results] == [[1.0], [2.0, 3.0], [4.0]]
+    # One batch of four texts, exported on /metrics
+    assert (EMBEDDING_BATCH_SIZE.count() - batches, EMBEDDING_BATCH_SIZE.sum() - texts) == (1, 4)
+
+
+@pytest.mark.asyncio
+async def test_batches_are_capped_at_max_size():
+    embedder = RecordingEmbedder()
+    batcher = EmbeddingBatcher(embedder, max_batch_size=2, max_wait=0.01)
+    batches = EMBEDDING_BATCH_SIZE.count()
+
+    await asyncio.gather(*(batcher([str(index)]) for index in range(5)))
+
+    assert [len(call) for call in embedder.calls] == [2, 2, 1]
+    assert EMBEDDING_BATCH_SIZE.count() == batches + 3
+
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_caller_of_the_batch():
+    async def failing(texts):
+        raise RuntimeError("ollama down")
+
+    batcher = EmbeddingBatcher(failing, max_batch_size=8, max_wait=0.01)
+
+    results = await asyncio.gather(batcher(["a"]), batcher(["b"]), return_exceptions=True)
+
+    assert all(isinstance(result, RuntimeError) for result in results)
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import sqlite3
+
+import numpy as np
+import pytest
+
+from rag_ingest.services import embedding_cache
+from rag_ingest.services.embedding_cache import (
+    EMBEDDING_CACHE_HITS,
+    EMBEDDING_CACHE_MISSES,
+    EmbeddingCache,
+    close_embedding_cache,
+    get_embedding_cache,
+    wrap_with_embedding_cache,
+)
+
+
+class CountingEmbedder:
+    def __init__(self, dim: int):
+        self.dim = dim
+        self.calls: list[list[str]] = []
+
+    async def __call__(self, texts: list[str]) -> np.ndarray:
+        self.calls.append(list(texts))
+        return np.array([[float(len(text))] * self.dim for text in texts])
+
+
+@pytest.mark.asyncio
+async def test_cache_hits_skip_the_embedding_call(tmp_path):
+    cache = EmbeddingCache(tmp_path / "cache.sqlite")
+    embedder = CountingEmbedder(dim=4)
+    hits, misses = EMBEDDING_CACHE_HITS.value(), EMBEDDING_CACHE_MISSES.value()
+    embed = cache.wrap(embedder, "model", 4)
+
+    first = await embed(["a", "bb", "a"])
+    second = await embed(["bb", "ccc"])
+
+    assert embedder.calls == [["a", "bb"], ["ccc"]]
+    assert first.dtype == np.float32 and first.flags["C_CONTIGUOUS"]
+    assert first.shape == (3, 4)
+    np.testing.assert_array_equal(second[0], first[1])
+    assert cache.stats.hits == 1
+    assert cache.stats.misses == 4
+    # Exported on /metrics as well
+    assert (EMBEDDING_CACHE_HITS.value() - hits, EMBEDDING_CACHE_MISSES.value() - misses) == (1, 4)
+
+
+@pytest.mark.asyncio
+async def test_cache_persists_and_is_keyed_by_model(tmp_path):
+    embedder = CountingEmbedder(dim=2)
+    await EmbeddingCache(tmp_path / "cache.sqlite").wrap(embedder, "model-a", 2)(["text"])
+
+    reopened = EmbeddingCache(tmp_path / "cache.sqlite")
+    await reopened.wrap(embedder, "model-a", 2)(["text"])
+    await reopened.wrap(embedder, "model-b", 2)(["text"])
+
+    assert len(embedder.calls) == 2
+    assert reopened.stats.hits == 1
+
+
+@pytest.mark.asyncio
+async def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = EmbeddingCache(tmp_path / "cache.sqlite", max_entries=2)
+    embedder = CountingEmbedder(dim=2)
+    embed = cache.wrap(embedder, "model", 2)
+
+    await embed(["old"])
+    await embed(["mid"])
+    await embed(["old"])
+    await embed(["new"])
+    await embed(["old", "mid"])
+
+    assert cache.stats.evictions >= 1
+    assert embedder.calls[-1] == ["mid"]
+
+
+def test_process_wide_cache_is_closed_and_reopened(tmp_path, monkeypatch):
+    monkeypatch.setenv("EMBEDDING_CACHE_PATH", str(tmp_path / "cache.sqlite"))
+    monkeypatch.setattr(embedding_cache, "_cache", None)
+    cache = get_embedding_cache()
+    assert get_embedding_cache() is cache
+
+    close_embedding_cache()
+
+    with pytest.raises(sqlite3.ProgrammingError):
+        cache.get_many("model", 2, ["hash"])
+    reopened = get_embedding_cache()
+    assert reopened is not cache
+    close_embedding_cache()
+
+
+@pytest.mark.asyncio
+async def test_wrapped_function_survives_closing_the_process_wide_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("EMBEDDING_CACHE_PATH", str(tmp_path / "cache.sqlite"))
+    monkeypatch.setattr(embedding_cache, "_cache", None)
+    embedder = CountingEmbedder(dim=2)
+    embed = wrap_with_embedding_cache(embedder, "model", 2)
+
+    await embed(["text"])
+    # End of a worker run; the provider and its embedding function are reused by the next one
+    close_embedding_cache()
+    await embed(["text", "other"])
+
+    assert embedder.calls == [["text"], ["other"]]
+    assert get_embedding_cache().stats.hits == 1
+    close_embedding_cache()
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import base64
+import io
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+from rag_ingest.services.image_preprocess import ImagePreprocessor
+
+
+def _encode(image, image_format: str, **params) -> str:
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format, **params)
+    return base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+def _decode(payload: str):
+    return Image.open(io.BytesIO(base64.b64decode(payload)))
+
+
+def test_large_png_is_downscaled_and_reencoded():
+    source = Image.effect_noise((2000, 1500), 64).convert("RGBA")
+    payload = _encode(source, "PNG")
+
+    processed, mime = ImagePreprocessor(max_edge=1000, quality=80).prepare(payload)
+
+    assert mime == "image/jpeg"
+    assert len(processed) < len(payload) / 5
+    result = _decode(processed)
+    assert result.format == "JPEG"
+    assert max(result.size) == 1000
+
+
+@pytest.mark.parametrize("image_format", ["JPEG", "PNG", "WEBP"])
+@pytest.mark.parametrize("size", [(1200, 800), (16, 16)])
+def test_metadata_is_stripped(image_format, size):
+    ImageCms = pytest.importorskip("PIL.ImageCms")
+    icc_profile = ImageCms.ImageCmsProfile(ImageCms.createProfile("sRGB")).tobytes()
+    source = Image.effect_noise(size, 64).convert("RGB")
+    exif = Image.Exif()
+    exif[0x010F] = "Scanner Inc."
+    payload = _encode(source, "PNG", exif=exif.tobytes(), icc_profile=icc_profile)
+
+    processed, _ = ImagePreprocessor(max_edge=800, image_format=image_format).prepare(payload)
+
+    result = _decode(processed)
+    assert "icc_profile" not in result.info
+    assert not result.getexif()
+
+
+def test_small_images_keep_their_real_mime_type():
+    payload = _encode(Image.new("RGB", (16, 16), (255, 0, 0)), "PNG")
+
+    processed, mime = ImagePreprocessor().prepare(payload)
+
+    assert mime == "image/png"
+    assert len(processed) <= len(payload)
+    assert _decode(processed).size == (16, 16)
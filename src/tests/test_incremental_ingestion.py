@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import hashlib
+import os
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.dialects import mysql
+from sqlalchemy.orm import sessionmaker
+
+from rag_ingest.orm import Base
+from rag_ingest.entity import IndexedContent, IngestionQueueItem, SourceFileState
+from rag_ingest.services.utils import compute_content_hash, document_id_for
+from rag_ingest.worker import prune_missing_sources, run_worker
+
+
+class StubRagAnything:
+    def __init__(self):
+        self.processed: list[tuple[str, str | None]] = []
+
+    async def process_document_complete(self, file_path: Path, doc_id: str | None = None):
+        self.processed.append((Path(file_path).name, doc_id))
+
+
+class StubRagProvider:
+    def __init__(self):
+        self.rag_anything = StubRagAnything()
+        self.deleted: list[str] = []
+
+    async def delete_document(self, doc_id: str):
+        self.deleted.append(doc_id)
+
+
+@pytest.fixture()
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path/'incremental.sqlite'}", future=True)
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine, autoflush=False, future=True)
+
+
+async def _drain(tmp_path, session_factory, shared_root, provider, names):
+    with session_factory() as session:
+        items = [IngestionQueueItem(storage_path=name) for name in names]
+        session.add_all(items)
+        session.commit()
+        ids = [item.id for item in items]
+
+    async def provider_factory(_):
+        return provider
+
+    await run_worker(
+        session_factory=session_factory,
+        shared_root=shared_root,
+        rag_storage_dir=tmp_path / "rag",
+        poll_interval=0.01,
+        prune_interval=0,
+        exit_on_idle=True,
+        rag_provider_factory=provider_factory,
+    )
+    return ids
+
+
+@pytest.mark.asyncio
+async def test_worker_skips_unchanged_and_replaces_modified_files(tmp_path, session_factory):
+    shared_root = tmp_path / "shared"
+    shared_root.mkdir()
+    report = shared_root / "report.pdf"
+    report.write_bytes(b"first version")
+    first_doc_id = document_id_for(compute_content_hash(report))
+    provider = StubRagProvider()
+
+    await _drain(tmp_path, session_factory, shared_root, provider, ["report.pdf"])
+    assert provider.rag_anything.processed == [("report.pdf", first_doc_id)]
+
+    [unchanged_id] = await _drain(tmp_path, session_factory, shared_root, provider, ["report.pdf"])
+    assert len(provider.rag_anything.processed) == 1
+
+    report.write_bytes(b"second version")
+    os.utime(report, (1, 1))
+    second_doc_id = document_id_for(compute_content_hash(report))
+    await _drain(tmp_path, session_factory, shared_root, provider, ["report.pdf"])
+
+    assert provider.rag_anything.processed[-1] == ("report.pdf", second_doc_id)
+    assert provider.deleted == [first_doc_id]
+    with session_factory() as session:
+        assert "unchanged" in session.get(IngestionQueueItem, unchanged_id).rag_message.lower()
+        assert session.get(SourceFileState, "report.pdf").doc_id == second_doc_id
+        assert [row.content_hash for row in session.query(IndexedContent)] == [second_doc_id[len("doc-"):]]
+
+
+def test_mtime_is_stored_in_double_precision_on_mysql():
+    # MySQL FLOAT rounds a 1.7e9 epoch to a multiple of 128 seconds: the unchanged check would never match
+    assert SourceFileState.__table__.c.mtime.type.compile(dialect=mysql.dialect()) == "DOUBLE"
+
+
+@pytest.mark.asyncio
+async def test_prune_deletes_documents_of_removed_files(tmp_path, session_factory):
+    shared_root = tmp_path / "shared"
+    shared_root.mkdir()
+    for name in ("kept.pdf", "removed.pdf", "copy.pdf"):
+        (shared_root / name).write_bytes(b"shared content" if name != "kept.pdf" else b"kept")
+    provider = StubRagProvider()
+    await _drain(tmp_path, session_factory, shared_root, provider, ["kept.pdf", "removed.pdf", "copy.pdf"])
+
+    # The copy still references the document shared with the removed file
+    (shared_root / "removed.pdf").unlink()
+    assert await prune_missing_sources(session_factory, shared_root, provider) == ["removed.pdf"]
+    assert provider.deleted == []
+
+    (shared_root / "copy.pdf").unlink()
+    assert await prune_missing_sources(session_factory, shared_root, provider) == ["copy.pdf"]
+    assert provider.deleted == [document_id_for(hashlib.sha256(b"shared content").hexdigest())]
+    with session_factory() as session:
+        assert [state.storage_path for state in session.query(SourceFileState)] == ["kept.pdf"]
+        assert session.query(IndexedContent).count() == 1
+
+
+@pytest.mark.asyncio
+async def test_prune_skips_missing_or_empty_shared_storage(tmp_path, session_factory):
+    shared_root = tmp_path / "shared"
+    shared_root.mkdir()
+    (shared_root / "report.pdf").write_bytes(b"report")
+    provider = StubRagProvider()
+    await _drain(tmp_path, session_factory, shared_root, provider, ["report.pdf"])
+
+    # An unmounted share looks empty, or is not there at all
+    (shared_root / "report.pdf").unlink()
+    assert await prune_missing_sources(session_factory, shared_root, provider) == []
+    shared_root.rmdir()
+    assert await prune_missing_sources(session_factory, shared_root, provider) == []
+    assert provider.deleted == []
+    with session_factory() as session:
+        assert session.query(SourceFileState).count() == 1
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import sessionmaker
+
+from rag_ingest.orm import Base
+from rag_ingest.entity import IngestionLog, IngestionQueueItem
+from rag_ingest.repository import IngestionLogRepo
+
+
+@pytest.fixture()
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path/'logs.sqlite'}", future=True)
+    Base.metadata.create_all(engine)
+    return engine
+
+
+@pytest.fixture()
+def session_factory(engine):
+    return sessionmaker(bind=engine, autoflush=False, future=True)
+
+
+@pytest.fixture()
+def queue_item_id(session_factory):
+    with session_factory() as session:
+        item = IngestionQueueItem(storage_path="doc.pdf")
+        session.add(item)
+        session.commit()
+        return item.id
+
+
+def _count_inserts(engine) -> list[str]:
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("INSERT INTO ingestion_log"):
+            statements.append(statement)
+
+    return statements
+
+
+def test_logs_are_written_in_one_insert_on_commit(engine, session_factory, queue_item_id):
+    inserts = _count_inserts(engine)
+
+    with session_factory() as session:
+        repo = IngestionLogRepo(session)
+        for index in range(5):
+            repo.add_ingestion_log(ingestion_queue_item_id=queue_item_id, message=f"line {index}")
+        assert inserts == []
+        session.commit()
+
+    assert len(inserts) == 1
+    with session_factory() as session:
+        messages = session.execute(select(IngestionLog.message)).scalars().all()
+    assert sorted(messages) == [f"line {index}" for index in range(5)]
+
+
+def test_buffer_flushes_when_size_threshold_is_hit(engine, session_factory, queue_item_id):
+    inserts = _count_inserts(engine)
+
+    with session_factory() as session:
+        repo = IngestionLogRepo(session, max_buffer_size=2)
+        for index in range(3):
+            repo.add_ingestion_log(ingestion_queue_item_id=queue_item_id, message=f"line {index}")
+        assert len(inserts) == 1
+        session.commit()
+
+    assert len(inserts) == 2
+
+
+def test_buffer_flushes_when_age_threshold_is_hit(engine, session_factory, queue_item_id):
+    inserts = _count_inserts(engine)
+
+    with session_factory() as session:
+        repo = IngestionLogRepo(session, max_buffer_age=0)
+        repo.add_ingestion_log(ingestion_queue_item_id=queue_item_id, message="late")
+        assert len(inserts) == 1
+        session.commit()
+
+    assert len(inserts) == 1
+
+
+def test_rollback_discards_buffered_logs(session_factory, queue_item_id):
+    with session_factory() as session:
+        repo = IngestionLogRepo(session)
+        repo.add_ingestion_log(ingestion_queue_item_id=queue_item_id, message="dropped")
+        session.rollback()
+        session.commit()
+
+    with session_factory() as session:
+        assert session.execute(select(IngestionLog)).first() is None
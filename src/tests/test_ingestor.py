@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import importlib
+import json
+from pathlib import Path
+
+import pytest
+
+from rag_ingest.ingestor import collect_files, ingest
+from rag_ingest.manifest import IngestManifest
+
+# The package exports an `ingestor` function that shadows the module attribute
+ingestor = importlib.import_module("rag_ingest.ingestor")
+
+
+class StubRagAnything:
+    def __init__(self, delay: float = 0.05, failing: tuple[str, ...] = ()):
+        self.delay = delay
+        self.failing = failing
+        self.processed: list[Path] = []
+        self.active = 0
+        self.max_active = 0
+
+    async def process_document_complete(self, file_path: Path, doc_id: str | None = None):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            if Path(file_path).name in self.failing:
+                raise RuntimeError("parse error")
+            self.processed.append(Path(file_path))
+        finally:
+            self.active -= 1
+
+
+class StubRagProvider:
+    def __init__(self, rag_anything: StubRagAnything):
+        self.rag_anything = rag_anything
+        self.deleted: list[str] = []
+
+    async def delete_document(self, doc_id: str):
+        self.deleted.append(doc_id)
+
+
+def _factory(rag_anything: StubRagAnything, provider: StubRagProvider | None = None):
+    async def factory(_storage_dir: Path):
+        return provider or StubRagProvider(rag_anything)
+    return factory
+
+
+def _make_tree(root: Path) -> None:
+    (root / "docs" / "drafts").mkdir(parents=True)
+    for name in ("a.pdf", "b.pdf", "c.pdf", "notes.txt"):
+        (root / "docs" / name).write_text(name)
+    (root / "docs" / "drafts" / "d.pdf").write_text("d")
+
+
+def test_collect_files_applies_globs(tmp_path):
+    _make_tree(tmp_path)
+
+    files = collect_files(tmp_path, include=["*.pdf"], exclude=["docs/drafts/*"])
+
+    assert [path.name for path in files] == ["a.pdf", "b.pdf", "c.pdf"]
+
+
+@pytest.mark.asyncio
+async def test_directory_ingestion_runs_concurrently(tmp_path):
+    _make_tree(tmp_path / "src")
+    rag_anything = StubRagAnything()
+
+    exit_code = await ingest(
+        [str(tmp_path / "src"), "--storage-dir", str(tmp_path / "rag"), "--include", "*.pdf", "--concurrency", "3"],
+        rag_provider_factory=_factory(rag_anything),
+    )
+
+    assert exit_code == 0
+    assert len(rag_anything.processed) == 4
+    assert rag_anything.max_active == 3
+
+
+@pytest.mark.asyncio
+async def test_manifest_resumes_failed_and_pending_files(tmp_path):
+    _make_tree(tmp_path / "src")
+    argv = [str(tmp_path / "src"), "--storage-dir", str(tmp_path / "rag"), "--concurrency", "2"]
+
+    first = StubRagAnything(delay=0, failing=("b.pdf",))
+    assert await ingest(argv, rag_provider_factory=_factory(first)) == 1
+
+    manifest_path = tmp_path / "rag" / "ingest_manifest.jsonl"
+    entries = [json.loads(line) for line in manifest_path.read_text().splitlines()]
+    failed_path = str((tmp_path / "src" / "docs" / "b.pdf").resolve())
+    assert {entry["path"]: entry["status"] for entry in entries}[failed_path] == "failed"
+
+    second = StubRagAnything(delay=0)
+    assert await ingest(argv, rag_provider_factory=_factory(second)) == 0
+    assert [path.name for path in second.processed] == ["b.pdf"]
+
+
+@pytest.mark.asyncio
+async def test_incremental_run_skips_unchanged_and_replaces_modified(tmp_path):
+    source = tmp_path / "src"
+    _make_tree(source)
+    argv = [str(source), "--storage-dir", str(tmp_path / "rag"), "--include", "*.pdf"]
+
+    first = StubRagAnything(delay=0)
+    assert await ingest(argv, rag_provider_factory=_factory(first)) == 0
+    assert len(first.processed) == 4
+
+    (source / "docs" / "a.pdf").write_text("a, second edition")
+    (source / "docs" / "drafts" / "d.pdf").unlink()
+
+    second = StubRagAnything(delay=0)
+    provider = StubRagProvider(second)
+    assert await ingest(argv, rag_provider_factory=_factory(second, provider)) == 0
+
+    assert [path.name for path in second.processed] == ["a.pdf"]
+    assert sorted(provider.deleted) == sorted(
+        "doc-" + hashlib.sha256(content).hexdigest() for content in (b"a.pdf", b"d")
+    )
+
+
+class FailingDeleteProvider(StubRagProvider):
+    async def delete_document(self, doc_id: str):
+        raise RuntimeError("storage offline")
+
+
+@pytest.mark.asyncio
+async def test_unreadable_files_and_failed_deletions_are_reported(tmp_path, monkeypatch):
+    source = tmp_path / "src"
+    _make_tree(source)
+    argv = [str(source), "--storage-dir", str(tmp_path / "rag"), "--include", "*.pdf"]
+    assert await ingest(argv, rag_provider_factory=_factory(StubRagAnything(delay=0))) == 0
+
+    (source / "docs" / "b.pdf").write_text("b, locked")
+    (source / "docs" / "drafts" / "d.pdf").unlink()
+    original_hash = ingestor.compute_content_hash
+
+    def hash_or_deny(path, *args, **kwargs):
+        if Path(path).name == "b.pdf":
+            raise PermissionError(f"Permission denied: {path}")
+        return original_hash(path, *args, **kwargs)
+
+    monkeypatch.setattr(ingestor, "compute_content_hash", hash_or_deny)
+    second = StubRagAnything(delay=0)
+    provider = FailingDeleteProvider(second)
+    assert await ingest(argv, rag_provider_factory=_factory(second, provider)) == 1
+
+    entries = IngestManifest(tmp_path / "rag" / "ingest_manifest.jsonl").entries
+    locked = entries[str((source / "docs" / "b.pdf").resolve())]
+    assert locked["status"] == "failed" and "Permission denied" in locked["error"]
+    # Its document could not be deleted: the removed file stays tracked for the next run
+    assert str((source / "docs" / "drafts" / "d.pdf").resolve()) in entries
+
+
+@pytest.mark.asyncio
+async def test_empty_source_directory_deletes_nothing(tmp_path):
+    source = tmp_path / "src"
+    _make_tree(source)
+    argv = [str(source), "--storage-dir", str(tmp_path / "rag")]
+    assert await ingest(argv, rag_provider_factory=_factory(StubRagAnything(delay=0))) == 0
+
+    for path in sorted(source.rglob("*"), reverse=True):
+        path.unlink() if path.is_file() else path.rmdir()
+    provider = StubRagProvider(StubRagAnything(delay=0))
+    assert await ingest(argv, rag_provider_factory=_factory(provider.rag_anything, provider)) == 0
+    assert provider.deleted == []
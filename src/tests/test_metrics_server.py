@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import asyncio
+import socket
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from rag_ingest.orm import Base
+from rag_ingest.entity import IngestionQueueItem
+from rag_ingest.metrics_server import MetricsServer
+from rag_ingest.repository import IngestionQueueItemRepo
+from rag_ingest.services.utils.prometheus import JOB_DURATION, JOBS_STARTED, Registry
+from rag_ingest.worker import process_queue_item_in_session, run_worker
+
+
+class ScrapingRagAnything:
+    """Scrapes the worker metrics endpoint while each document is being ingested."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.scrapes: list[str] = []
+
+    async def process_document_complete(self, file_path: Path, doc_id: str | None = None):
+        async with httpx.AsyncClient() as client:
+            response = await client.get(self.url)
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        self.scrapes.append(response.text)
+
+
+class ScrapingRagProvider:
+    def __init__(self, url: str):
+        self.rag_anything = ScrapingRagAnything(url)
+
+
+@pytest.fixture()
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path/'metrics.sqlite'}", future=True)
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine, autoflush=False, future=True)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.mark.asyncio
+async def test_server_renders_registry_in_prometheus_format():
+    registry = Registry()
+    jobs = registry.counter("jobs_total", "Jobs.", ["status"])
+    latency = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1))
+    depth = registry.gauge("depth", "Depth.")
+    registry.add_collector(lambda: depth.set(7))
+    jobs.inc(status="indexed")
+    jobs.inc(2, status='fa"iled')
+    latency.observe(0.05)
+    latency.observe(0.5)
+
+    server = await MetricsServer("127.0.0.1:0", registry).start()
+    try:
+        async with httpx.AsyncClient() as client:
+            response = await client.get(f"http://127.0.0.1:{server.port}/metrics")
+            missing = await client.get(f"http://127.0.0.1:{server.port}/")
+    finally:
+        await server.close()
+
+    assert response.status_code == 200
+    assert missing.status_code == 404
+    lines = response.text.splitlines()
+    assert "# TYPE jobs_total counter" in lines
+    assert 'jobs_total{status="indexed"} 1' in lines
+    assert 'jobs_total{status="fa\\"iled"} 2' in lines
+    assert 'latency_seconds_bucket{le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{le="1"} 2' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 2' in lines
+    assert "latency_seconds_count 2" in lines
+    assert "depth 7" in lines
+
+
+@pytest.mark.asyncio
+async def test_worker_serves_queue_depth_and_job_series(tmp_path, session_factory):
+    shared_root = tmp_path / "shared"
+    shared_root.mkdir()
+    with session_factory() as session:
+        for index in range(3):
+            (shared_root / f"doc{index}.txt").write_text(f"content {index}")
+            session.add(IngestionQueueItem(storage_path=f"doc{index}.txt"))
+        session.commit()
+    port = _free_port()
+    provider = ScrapingRagProvider(f"http://127.0.0.1:{port}/metrics")
+    started_before = JOBS_STARTED.value()
+
+    async def provider_factory(_):
+        return provider
+
+    await run_worker(
+        session_factory=session_factory,
+        shared_root=shared_root,
+        rag_storage_dir=tmp_path / "rag",
+        poll_interval=0.01,
+        prune_interval=0,
+        archive_interval=0,
+        metrics_address=f"127.0.0.1:{port}",
+        exit_on_idle=True,
+        rag_provider_factory=provider_factory,
+    )
+
+    first = provider.rag_anything.scrapes[0].splitlines()
+    assert 'rag_ingest_queue_items{status="processing"} 1' in first
+    assert 'rag_ingest_queue_items{status="queued"} 2' in first
+    assert "rag_ingest_jobs_in_flight 1" in first
+    assert any(line.startswith("rag_ingest_db_round_trip_seconds_count ") for line in first)
+
+    last = provider.rag_anything.scrapes[-1].splitlines()
+    assert 'rag_ingest_queue_items{status="indexed"} 2' in last
+    assert any(line.startswith('rag_ingest_job_duration_seconds_count{status="indexed"}') for line in last)
+    assert JOBS_STARTED.value() - started_before == 3
+
+    # The endpoint is closed with the worker
+    with pytest.raises(OSError):
+        await asyncio.open_connection("127.0.0.1", port)
+
+
+class InstantRagProvider:
+    class rag_anything:
+        @staticmethod
+        async def process_document_complete(file_path, doc_id=None):
+            pass
+
+
+@pytest.mark.asyncio
+async def test_job_duration_is_measured_from_reservation(tmp_path, session_factory):
+    shared_root = tmp_path / "shared"
+    shared_root.mkdir()
+    (shared_root / "doc.txt").write_text("content")
+    with session_factory() as session:
+        session.expire_on_commit = False
+        session.add(IngestionQueueItem(storage_path="doc.txt"))
+        session.flush()
+        [item] = IngestionQueueItemRepo(session).reserve_next_batch(1, "worker", lease_seconds=30)
+        session.commit()
+    count, total = JOB_DURATION.count(status="indexed"), JOB_DURATION.sum(status="indexed")
+
+    # Reserved a while ago, e.g. prefetched while another job was extracted
+    await process_queue_item_in_session(
+        session_factory, item, shared_root, InstantRagProvider(), reserved_at=time.perf_counter() - 30
+    )
+
+    assert JOB_DURATION.count(status="indexed") == count + 1
+    assert JOB_DURATION.sum(status="indexed") - total >= 30
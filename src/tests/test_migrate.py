@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from sqlalchemy import inspect, text
+from sqlalchemy.orm import sessionmaker
+
+from rag_ingest.entity import QueueStatus
+from rag_ingest.migrate import upgrade_schema
+from rag_ingest.orm import Base, get_engine
+from rag_ingest.repository import IngestionQueueItemRepo
+
+# The queue tables as deployed before leases, retries and scheduling
+BASELINE_SCHEMA = [
+    """CREATE TABLE document_node (
+        id INTEGER PRIMARY KEY,
+        external_id VARCHAR(255) UNIQUE,
+        title VARCHAR(255),
+        storage_path VARCHAR(1024) NOT NULL,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL,
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL
+    )""",
+    """CREATE TABLE ingestion_queue_item (
+        id INTEGER PRIMARY KEY,
+        document_node_id INTEGER REFERENCES document_node (id),
+        storage_path VARCHAR(1024) NOT NULL,
+        status VARCHAR(15) NOT NULL,
+        rag_message TEXT,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL,
+        started_at DATETIME,
+        ended_at DATETIME
+    )""",
+    """CREATE TABLE ingestion_log (
+        id INTEGER PRIMARY KEY,
+        ingestion_queue_item_id INTEGER NOT NULL REFERENCES ingestion_queue_item (id),
+        level VARCHAR(50) NOT NULL,
+        message TEXT NOT NULL,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL,
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL
+    )""",
+    "INSERT INTO ingestion_queue_item (storage_path, status) VALUES ('old.pdf', 'queued')",
+]
+
+# The archive table as first shipped, without the scheduling, retry and lease columns
+BASELINE_HISTORY_TABLE = """CREATE TABLE ingestion_queue_item_history (
+    id INTEGER PRIMARY KEY,
+    document_node_id INTEGER,
+    storage_path VARCHAR(1024) NOT NULL,
+    status VARCHAR(15) NOT NULL,
+    rag_message TEXT,
+    priority INTEGER NOT NULL,
+    estimated_cost BIGINT,
+    attempt_count INTEGER DEFAULT '0' NOT NULL,
+    claimed_by VARCHAR(255),
+    created_at DATETIME NOT NULL,
+    started_at DATETIME,
+    ended_at DATETIME,
+    archived_at DATETIME DEFAULT (CURRENT_TIMESTAMP) NOT NULL
+)"""
+
+
+def test_upgrade_adds_missing_columns_and_indexes_idempotently(tmp_path):
+    url = f"sqlite:///{tmp_path / 'deployed.sqlite'}"
+    engine = get_engine(url)
+    with engine.begin() as connection:
+        for statement in BASELINE_SCHEMA:
+            connection.execute(text(statement))
+
+    statements = upgrade_schema(url)
+
+    assert not any("document_node" in statement for statement in statements)
+    assert any("ADD COLUMN lease_expires_at" in statement for statement in statements)
+    assert any("ix_ingestion_queue_item_run_order" in statement for statement in statements)
+    inspector = inspect(engine)
+    assert {"source_file_state", "ingestion_queue_item_history"} <= set(inspector.get_table_names())
+    # Rows queued before the migration are reserved with the new query
+    with sessionmaker(bind=engine)() as session:
+        [item] = IngestionQueueItemRepo(session).reserve_next_batch(
+            1, "worker-1", started_at=datetime.now(timezone.utc), lease_seconds=30
+        )
+        assert (item.storage_path, item.status, item.priority) == ("old.pdf", QueueStatus.processing, 0)
+    assert upgrade_schema(url) == []
+
+
+
+def test_upgrade_replaces_the_former_schedule_index(tmp_path):
+    url = f"sqlite:///{tmp_path / 'scheduled.sqlite'}"
+    engine = get_engine(url)
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(text("DROP INDEX ix_ingestion_queue_item_run_order"))
+        connection.execute(
+            text(
+                "CREATE INDEX ix_ingestion_queue_item_schedule ON ingestion_queue_item "
+                "(status, priority DESC, scheduled_at, id, next_attempt_at)"
+            )
+        )
+
+    assert upgrade_schema(url) == [
+        "DROP INDEX ix_ingestion_queue_item_schedule",
+        "CREATE INDEX ix_ingestion_queue_item_run_order ON ingestion_queue_item "
+        "(status, priority DESC, coalesce(scheduled_at, created_at), id, next_attempt_at, scheduled_at, created_at)",
+    ]
+    assert upgrade_schema(url) == []
+
+
+def test_upgrade_adds_the_queue_columns_to_the_archive(tmp_path):
+    url = f"sqlite:///{tmp_path / 'archive.sqlite'}"
+    engine = get_engine(url)
+    with engine.begin() as connection:
+        connection.execute(text(BASELINE_HISTORY_TABLE))
+
+    upgrade_schema(url)
+
+    columns = {column["name"] for column in inspect(engine).get_columns("ingestion_queue_item_history")}
+    assert {"scheduled_at", "next_attempt_at", "lease_expires_at", "heartbeat_at"} <= columns
+    assert upgrade_schema(url) == []
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import asyncio
+import io
+from functools import partial
+from pathlib import Path
+
+import pytest
+from lightrag.utils import priority_limit_async_func_call
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from rag_ingest.orm import Base
+from rag_ingest.entity import IngestionQueueItem
+from rag_ingest.repository import ModelCallRecordRepo
+from rag_ingest.services import llm_provider
+from rag_ingest.services.utils import (
+    JobMetrics,
+    account_model_call,
+    current_job_metrics,
+    mark_cache_miss,
+    pass_job_metrics,
+)
+from rag_ingest.services.utils import model_accounting
+from rag_ingest.stats import model_report, print_model_report
+from rag_ingest.worker import run_worker
+
+
+class AccountedRagAnything:
+    """Fake making one LLM call per page, plus a cached embedding call, like the real providers."""
+
+    async def process_document_complete(self, file_path: Path, doc_id: str | None = None):
+        pages = Path(file_path).read_text().split("\f")
+
+        async def call_llm(page: str):
+            with account_model_call("llm", "fake-llm", len(page) // 4 + 1) as call:
+                await asyncio.sleep(0.01)
+                call.add_usage({"prompt_tokens": len(page), "completion_tokens": 10})
+
+        await asyncio.gather(*(call_llm(page) for page in pages))
+        with account_model_call("embedding", "fake-embed", 5, cache_hit=True):
+            pass
+
+
+class AccountedRagProvider:
+    def __init__(self):
+        self.rag_anything = AccountedRagAnything()
+
+
+@pytest.fixture()
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path/'accounting.sqlite'}", future=True)
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine, autoflush=False, future=True, expire_on_commit=False)
+
+
+def test_model_call_uses_reported_usage_and_prices(monkeypatch):
+    monkeypatch.setattr(model_accounting, "MODEL_PRICES", {"priced": (1.0, 4.0)})
+    metrics = JobMetrics()
+    token = current_job_metrics.set(metrics)
+    try:
+        with account_model_call("llm", "priced", 100) as call:
+            call.set_completion("x" * 40)
+        with account_model_call("llm", "priced", 100) as call:
+            call.add_usage({"prompt_tokens": 2_000_000, "completion_tokens": 1_000_000})
+        with account_model_call("embedding", "unpriced", 8, cache_hit=True):
+            mark_cache_miss(12)
+        with pytest.raises(TimeoutError):
+            with account_model_call("vlm", "priced", 3, cache_hit=True):
+                raise TimeoutError
+    finally:
+        current_job_metrics.reset(token)
+
+    estimated, reported, embedding, failed = metrics.model_calls
+    assert (estimated["completion_tokens"], estimated["tokens_estimated"]) == (11, True)
+    assert (reported["prompt_tokens"], reported["tokens_estimated"]) == (2_000_000, False)
+    assert reported["cost"] == pytest.approx(6.0)
+    assert (embedding["cache_hit"], embedding["prompt_tokens"], embedding["cost"]) == (False, 12, None)
+    assert (failed["cache_hit"], failed["cost"], failed["error"]) == (True, 0.0, "TimeoutError")
+
+
+def test_calls_outside_a_job_are_not_recorded():
+    with account_model_call("llm", "model", 10):
+        mark_cache_miss()
+    assert current_job_metrics.get() is None
+
+
+@pytest.mark.asyncio
+async def test_calls_queued_by_lightrag_are_charged_to_the_calling_job(monkeypatch):
+    async def complete(model, prompt, token_tracker=None, **kwargs):
+        await asyncio.sleep(0.01)
+        token_tracker.add_usage({"prompt_tokens": len(prompt), "completion_tokens": 3})
+        return "answer"
+
+    monkeypatch.setattr(llm_provider, "openai_complete_if_cache", complete)
+    llm_queue = priority_limit_async_func_call(1, queue_name="LLM func")(
+        partial(llm_provider.llm_model_func, hashing_kv=None)
+    )
+    # Same wrapping as LightRAG, plus the one RAGProvider applies around it
+    llm = pass_job_metrics(llm_queue)
+
+    async def job(prompt: str) -> JobMetrics:
+        metrics = JobMetrics()
+        current_job_metrics.set(metrics)
+        await asyncio.gather(llm(prompt), llm(prompt))
+        return metrics
+
+    try:
+        # One task per job, like the worker; the first one starts the queue workers
+        jobs = [await asyncio.create_task(job("x" * (index + 1))) for index in range(4)]
+    finally:
+        await llm_queue.shutdown()
+
+    assert [[call["prompt_tokens"] for call in metrics.model_calls] for metrics in jobs] == [
+        [1, 1], [2, 2], [3, 3], [4, 4]
+    ]
+    assert current_job_metrics.get() is None
+
+
+@pytest.mark.asyncio
+async def test_worker_records_model_calls_per_item(tmp_path, session_factory):
+    shared_root = tmp_path / "shared"
+    shared_root.mkdir()
+    (shared_root / "short.txt").write_text("one page")
+    (shared_root / "long.pdf").write_text("\f".join(f"page {index}" for index in range(4)))
+    with session_factory() as session:
+        session.add_all([IngestionQueueItem(storage_path="short.txt"), IngestionQueueItem(storage_path="long.pdf")])
+        session.commit()
+    provider = AccountedRagProvider()
+
+    async def provider_factory(_):
+        return provider
+
+    await run_worker(
+        session_factory=session_factory,
+        shared_root=shared_root,
+        rag_storage_dir=tmp_path / "rag",
+        poll_interval=0.01,
+        max_concurrency=2,
+        prune_interval=0,
+        archive_interval=0,
+        exit_on_idle=True,
+        rag_provider_factory=provider_factory,
+    )
+
+    with session_factory() as session:
+        item = session.query(IngestionQueueItem).filter_by(storage_path="long.pdf").one()
+        calls = ModelCallRecordRepo(session).find_by_queue_item(item.id)
+
+    assert [call.kind for call in calls].count("llm") == 4
+    assert all(call.attempt == 1 and call.latency_seconds >= 0 for call in calls)
+    llm = [call for call in calls if call.kind == "llm"]
+    assert all(not call.tokens_estimated and call.completion_tokens == 10 for call in llm)
+    assert [call.cache_hit for call in calls if call.kind == "embedding"] == [True]
+
+    report = model_report(session_factory, top=1)
+    assert [row["storage_path"] for row in report["documents"]] == ["long.pdf"]
+    assert report["documents"][0]["calls"] == 5
+    assert report["documents"][0]["cache_hits"] == 1
+    assert [row["extension"] for row in report["extensions"]] == [".pdf", ".txt"]
+    assert report["extensions"][1]["prompt_tokens"] == len("one page") + 5
+
+    out = io.StringIO()
+    print_model_report(report, out)
+    assert "long.pdf" in out.getvalue()
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from rag_ingest.services.model_client import ModelGateway, TokenBucket, estimate_tokens
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_queues_callers_beyond_the_budget():
+    bucket = TokenBucket(per_minute=600)
+    bucket.tokens = 0
+
+    started = time.monotonic()
+    await bucket.acquire(1)
+    await bucket.acquire(1)
+
+    assert time.monotonic() - started >= 0.15
+
+
+@pytest.mark.asyncio
+async def test_gateway_reuses_one_client_per_endpoint():
+    gateway = ModelGateway("llm")
+
+    first = gateway.http_client("http://localhost:1/v1")
+    await first.aclose()
+    second = gateway.http_client("http://localhost:1/v1")
+    other = gateway.http_client("http://localhost:2/v1")
+
+    assert first is second
+    assert other is not first
+    assert not first.is_closed
+
+    await gateway.aclose()
+    assert first.is_closed
+
+
+def test_estimate_tokens_charges_images_flat():
+    message = {"role": "user", "content": [{"type": "image_url", "image_url": {"url": "x" * 100_000}}]}
+
+    assert estimate_tokens("abcd" * 10) == 11
+    assert estimate_tokens([message]) < 2000
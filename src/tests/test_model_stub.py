@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import httpx
+import numpy as np
+import pytest
+
+from rag_ingest.model_stub import COMPLETION_DELIMITER, TUPLE_DELIMITER, ModelStubServer, StubSettings
+from rag_ingest.services import llm_provider
+from rag_ingest.services.embed_provider import embedding_func
+from rag_ingest.services.model_client import close_gateways
+from rag_ingest.services.utils import JobMetrics, current_job_metrics
+
+EXTRACTION_PROMPT = f"""Use `{TUPLE_DELIMITER}` between fields.
+<Input Text>
+```
+Ingestion workers reserve queue items. Ingestion workers renew leases while parsing documents.
+```
+<Output>
+"""
+
+
+@pytest.mark.asyncio
+async def test_stub_serves_openai_and_ollama_shapes():
+    server = await ModelStubServer(settings=StubSettings(latency_ms=0, embedding_latency_ms=0, embedding_dim=8)).start()
+    try:
+        async with httpx.AsyncClient(base_url=server.base_url) as client:
+            messages = [{"role": "user", "content": EXTRACTION_PROMPT}]
+            chat = (await client.post("/v1/chat/completions", json={"model": "stub-llm", "messages": messages})).json()
+            openai_vectors = (await client.post("/v1/embeddings", json={"model": "e", "input": ["a", "b"]})).json()
+            ollama_vectors = (await client.post("/api/embed", json={"model": "e", "input": ["a"]})).json()
+            models = (await client.get("/v1/models")).json()
+    finally:
+        await server.close()
+
+    content = chat["choices"][0]["message"]["content"]
+    lines = content.splitlines()
+    assert lines[-1] == COMPLETION_DELIMITER
+    assert lines[0].split(TUPLE_DELIMITER)[:2] == ["entity", "Ingestion"]
+    assert any(line.startswith(f"relation{TUPLE_DELIMITER}") for line in lines)
+    assert chat["usage"]["completion_tokens"] > 0
+
+    assert [len(row["embedding"]) for row in openai_vectors["data"]] == [8, 8]
+    # Deterministic per text, whatever the API shape
+    assert ollama_vectors["embeddings"][0] == openai_vectors["data"][0]["embedding"]
+    assert np.linalg.norm(ollama_vectors["embeddings"][0]) == pytest.approx(1, abs=1e-5)
+    assert {model["id"] for model in models["data"]} == {"stub-llm", "e"}
+
+
+@pytest.mark.asyncio
+async def test_stub_injects_errors_and_rate_limits():
+    failing = await ModelStubServer(settings=StubSettings(embedding_latency_ms=0, error_rate_500=1.0)).start()
+    limited = await ModelStubServer(settings=StubSettings(embedding_latency_ms=0, requests_per_minute=2)).start()
+    try:
+        async with httpx.AsyncClient() as client:
+            failed = await client.post(f"{failing.base_url}/api/embed", json={"input": ["a"]})
+            statuses = [
+                (await client.post(f"{limited.base_url}/api/embed", json={"input": ["a"]})).status_code
+                for _ in range(3)
+            ]
+            rejected = await client.post(f"{limited.base_url}/api/embed", json={"input": ["a"]})
+            stats = (await client.get(f"{limited.base_url}/stats")).json()
+    finally:
+        await failing.close()
+        await limited.close()
+
+    assert failed.status_code == 500
+    assert statuses == [200, 200, 429]
+    assert int(rejected.headers["Retry-After"]) >= 1
+    assert stats["statuses"] == {"200": 2, "429": 2}
+
+
+@pytest.mark.asyncio
+async def test_providers_run_against_the_stub(monkeypatch):
+    server = await ModelStubServer(settings=StubSettings(latency_ms=5, embedding_latency_ms=0, embedding_dim=16)).start()
+    for name, value in server.environment().items():
+        monkeypatch.setenv(name, value)
+    monkeypatch.setattr(llm_provider, "LLM_MODEL", "stub-llm")
+    monkeypatch.setattr(llm_provider, "OPENAI_API_KEY", "stub")
+    monkeypatch.setenv("EMBEDDING_CACHE_ENABLED", "false")
+    metrics = JobMetrics()
+    token = current_job_metrics.set(metrics)
+    try:
+        answer = await llm_provider.llm_model_func(EXTRACTION_PROMPT, system_prompt="Extract entities.")
+        # 16 dimensions: the Ollama binding must not enforce LightRAG's 1024 default
+        vectors = await embedding_func()(["queue", "lease"])
+    finally:
+        current_job_metrics.reset(token)
+        await close_gateways()
+        await server.close()
+
+    assert answer.endswith(COMPLETION_DELIMITER)
+    assert vectors.shape == (2, 16)
+    # The usage returned by the stub reaches the model call accounting
+    llm_call, embedding_call = metrics.model_calls
+    assert llm_call["model"] == "stub-llm" and not llm_call["tokens_estimated"]
+    assert embedding_call["model"] == "stub-embedding" and not embedding_call["cache_hit"]
+    assert server.requests["POST /v1/chat/completions"] == 1
+    assert server.requests["POST /api/embed"] == 1
+
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from rag_ingest.services.parser_pool import ParserPool
+
+
+class FakeParser:
+    """Parser recording how many files each instance handled, to check it is reused."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def parse_pdf(self, pdf_path: Path, output_dir: str | None = None, method: str = "auto"):
+        self.calls += 1
+        return [
+            {"type": "text", "text": Path(pdf_path).name, "page_idx": 0},
+            {"type": "meta", "pid": os.getpid(), "instance": id(self), "calls": self.calls},
+        ]
+
+    def check_installation(self) -> bool:
+        return True
+
+
+def test_pool_parses_in_warm_processes(tmp_path):
+    pool = ParserPool(f"{FakeParser.__module__}:FakeParser", max_workers=2)
+    try:
+        parser = pool.parser()
+        with ThreadPoolExecutor(max_workers=4) as threads:
+            results = list(
+                threads.map(
+                    lambda index: parser.parse_pdf(pdf_path=tmp_path / f"doc{index}.pdf", output_dir=str(tmp_path)),
+                    range(8),
+                )
+            )
+        assert parser.check_installation() is True
+    finally:
+        pool.close()
+
+    assert [content[0]["text"] for content in results] == [f"doc{index}.pdf" for index in range(8)]
+    metas = [content[1] for content in results]
+    assert os.getpid() not in {meta["pid"] for meta in metas}
+    # One parser instance per process, reused across files
+    instances = {(meta["pid"], meta["instance"]) for meta in metas}
+    assert len(instances) <= 2
+    assert max(meta["calls"] for meta in metas) > 1
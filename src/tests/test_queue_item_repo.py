@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from rag_ingest.orm import Base
+from rag_ingest.entity import IngestionQueueItem, QueueStatus
+from rag_ingest.repository import IngestionQueueItemRepo
+
+
+@pytest.fixture()
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path/'repo.sqlite'}", future=True)
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine, autoflush=False, future=True, expire_on_commit=False)
+
+
+def _add_queued(session_factory, count: int) -> list[int]:
+    now = datetime.now(timezone.utc)
+    with session_factory() as session:
+        items = [
+            IngestionQueueItem(
+                storage_path=f"doc{index}.pdf",
+                created_at=now - timedelta(minutes=count - index),
+            )
+            for index in range(count)
+        ]
+        session.add_all(items)
+        session.commit()
+        return [item.id for item in items]
+
+
+def test_reserve_next_batch_claims_oldest_rows(session_factory):
+    ids = _add_queued(session_factory, 5)
+
+    with session_factory() as session:
+        claimed = IngestionQueueItemRepo(session).reserve_next_batch(3, "worker-a")
+        session.commit()
+
+    assert [item.id for item in claimed] == ids[:3]
+    assert all(item.status == QueueStatus.processing for item in claimed)
+    assert all(item.claimed_by == "worker-a" for item in claimed)
+    assert all(item.started_at is not None for item in claimed)
+
+
+def test_reserve_next_batch_never_hands_out_a_row_twice(session_factory):
+    _add_queued(session_factory, 4)
+
+    with session_factory() as session:
+        first = IngestionQueueItemRepo(session).reserve_next_batch(3, "worker-a")
+        session.commit()
+    with session_factory() as session:
+        second = IngestionQueueItemRepo(session).reserve_next_batch(3, "worker-b")
+        session.commit()
+    with session_factory() as session:
+        third = IngestionQueueItemRepo(session).reserve_next_batch(3, "worker-c")
+        session.commit()
+
+    assert len(first) == 3
+    assert len(second) == 1
+    assert third == []
+    assert not {item.id for item in first} & {item.id for item in second}
+
+
+def test_expired_leases_are_reclaimed(session_factory):
+    _add_queued(session_factory, 2)
+    past = datetime.now(timezone.utc) - timedelta(seconds=60)
+
+    with session_factory() as session:
+        repo = IngestionQueueItemRepo(session)
+        dead = repo.reserve_next_batch(1, "dead-worker", started_at=past, lease_seconds=5)
+        alive = repo.reserve_next_batch(1, "live-worker", lease_seconds=30)
+        session.commit()
+
+    with session_factory() as session:
+        reset_ids = IngestionQueueItemRepo(session).reset_expired_leases()
+        session.commit()
+
+    assert reset_ids == [dead[0].id]
+    with session_factory() as session:
+        reclaimed = session.get(IngestionQueueItem, dead[0].id)
+        assert reclaimed.status == QueueStatus.queued
+        assert reclaimed.claimed_by is None
+        assert reclaimed.lease_expires_at is None
+        assert session.get(IngestionQueueItem, alive[0].id).status == QueueStatus.processing
+
+
+def test_renew_leases_only_extends_owned_items(session_factory):
+    _add_queued(session_factory, 2)
+    past = datetime.now(timezone.utc) - timedelta(seconds=60)
+
+    with session_factory() as session:
+        repo = IngestionQueueItemRepo(session)
+        mine = repo.reserve_next_batch(1, "worker-a", started_at=past, lease_seconds=5)
+        theirs = repo.reserve_next_batch(1, "worker-b", started_at=past, lease_seconds=5)
+        session.commit()
+
+    with session_factory() as session:
+        repo = IngestionQueueItemRepo(session)
+        renewed = repo.renew_leases([mine[0].id, theirs[0].id], "worker-a", lease_seconds=30)
+        reset_ids = repo.reset_expired_leases()
+        session.commit()
+
+    assert renewed == [mine[0].id]
+    assert reset_ids == [theirs[0].id]
+
+
+def test_terminal_updates_skip_items_reclaimed_by_another_worker(session_factory):
+    _add_queued(session_factory, 2)
+
+    with session_factory() as session:
+        repo = IngestionQueueItemRepo(session)
+        lost, kept = repo.reserve_next_batch(2, "worker-a", lease_seconds=30)
+        session.commit()
+
+    with session_factory() as session:
+        # worker-b reclaimed the first item after the lease of worker-a expired
+        session.get(IngestionQueueItem, lost.id).claimed_by = "worker-b"
+        session.commit()
+
+    with session_factory() as session:
+        repo = IngestionQueueItemRepo(session)
+        assert repo.mark_indexed(repo.find_one_by_id(lost.id), claimed_by="worker-a") is None
+        assert repo.mark_failed(repo.find_one_by_id(lost.id), claimed_by="worker-a") is None
+        assert repo.mark_retry(repo.find_one_by_id(lost.id), datetime.now(timezone.utc), claimed_by="worker-a") is None
+        assert repo.mark_indexed(repo.find_one_by_id(kept.id), claimed_by="worker-a") is not None
+        session.commit()
+
+    with session_factory() as session:
+        reclaimed = session.get(IngestionQueueItem, lost.id)
+        assert (reclaimed.status, reclaimed.claimed_by) == (QueueStatus.processing, "worker-b")
+        assert session.get(IngestionQueueItem, kept.id).status == QueueStatus.indexed
+
+
+def _add_scheduled(session, storage_path, created_at, cost, priority=0):
+    item = IngestionQueueItem(storage_path=storage_path, created_at=created_at, priority=priority)
+    session.add(item)
+    session.flush()
+    IngestionQueueItemRepo(session).schedule_item(item, cost, defer_per_mb=5, max_defer=900)
+    return item
+
+
+def test_reservation_prefers_priority_then_shortest_job(session_factory):
+    now = datetime.now(timezone.utc)
+    with session_factory() as session:
+        _add_scheduled(session, "huge.pdf", now - timedelta(seconds=60), 200 << 20)
+        _add_scheduled(session, "small.pdf", now - timedelta(seconds=30), 100 << 10)
+        _add_scheduled(session, "medium.pdf", now - timedelta(seconds=50), 2 << 20)
+        _add_scheduled(session, "urgent.pdf", now, 50 << 20, priority=10)
+        session.commit()
+
+        claimed = IngestionQueueItemRepo(session).reserve_next_batch(4, "worker-a")
+
+    assert [item.storage_path for item in claimed] == ["urgent.pdf", "medium.pdf", "small.pdf", "huge.pdf"]
+
+
+def test_aging_lets_large_jobs_overtake_newer_small_ones(session_factory):
+    now = datetime.now(timezone.utc)
+    with session_factory() as session:
+        # Waited longer than the 900s deferral cap
+        _add_scheduled(session, "huge.pdf", now - timedelta(seconds=1000), 10 << 30)
+        _add_scheduled(session, "small.pdf", now - timedelta(seconds=10), 1 << 10)
+        session.commit()
+
+        claimed = IngestionQueueItemRepo(session).reserve_next_batch(1, "worker-a")
+
+    assert [item.storage_path for item in claimed] == ["huge.pdf"]
+
+
+def test_unscheduled_items_keep_their_place_behind_older_scheduled_ones(session_factory):
+    now = datetime.now(timezone.utc)
+    with session_factory() as session:
+        _add_scheduled(session, "old.pdf", now - timedelta(seconds=60), 1 << 10)
+        # Enqueued since the last scheduling pass: no scheduled_at yet
+        session.add(IngestionQueueItem(storage_path="new.pdf", created_at=now))
+        session.commit()
+
+        claimed = IngestionQueueItemRepo(session).reserve_next_batch(1, "worker-a")
+
+    assert [item.storage_path for item in claimed] == ["old.pdf"]
+
+
+def test_reservation_query_only_reads_the_schedule_index(session_factory):
+    statements = []
+    with session_factory() as session:
+        session.add(IngestionQueueItem(storage_path="a.pdf"))
+        session.commit()
+        connection = session.connection()
+        event.listen(
+            connection,
+            "before_cursor_execute",
+            lambda conn, cursor, statement, parameters, context, executemany: statements.append(
+                (statement, parameters)
+            ),
+        )
+        IngestionQueueItemRepo(session).reserve_next_batch(4, "worker-a")
+        # The candidate SELECT exactly as generated, ahead of the claiming UPDATE
+        statement, parameters = statements[0]
+        plan = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+
+    assert "next_attempt_at" in statement and "LIMIT" in statement
+    details = " ".join(row[-1] for row in plan)
+    assert "COVERING INDEX ix_ingestion_queue_item_run_order" in details
+    assert "TEMP B-TREE" not in details
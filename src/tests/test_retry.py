@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import httpx
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from rag_ingest.orm import Base
+from rag_ingest.entity import IngestionQueueItem, QueueStatus
+from rag_ingest.repository import IngestionQueueItemRepo
+from rag_ingest.services.utils import RetryPolicy, is_transient_error, retry_delay
+from rag_ingest.worker import run_worker
+
+
+class RateLimitError(Exception):
+    """Stand-in for the SDK exception of the same name."""
+
+
+class StatusError(Exception):
+    def __init__(self, status_code: int):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class FlakyRagAnything:
+    """Fails files named `flaky*` with a connection timeout for their first `failures` calls."""
+
+    def __init__(self, failures: int, error: Exception):
+        self.failures = failures
+        self.error = error
+        self.calls: dict[str, int] = {}
+
+    async def process_document_complete(self, file_path: Path, doc_id: str | None = None):
+        name = Path(file_path).name
+        self.calls[name] = self.calls.get(name, 0) + 1
+        await asyncio.sleep(0)
+        if name.startswith("flaky") and self.calls[name] <= self.failures:
+            raise self.error
+
+
+class FlakyRagProvider:
+    def __init__(self, failures: int, error: Exception):
+        self.rag_anything = FlakyRagAnything(failures, error)
+
+
+@pytest.fixture()
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path/'retry.sqlite'}", future=True)
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine, autoflush=False, future=True, expire_on_commit=False)
+
+
+def _enqueue(session_factory, shared_root: Path, names: list[str]) -> None:
+    with session_factory() as session:
+        for name in names:
+            (shared_root / name).write_text(name)
+            session.add(IngestionQueueItem(storage_path=name))
+        session.commit()
+
+
+async def _drain(tmp_path, session_factory, shared_root, provider, policy, rounds: int = 20):
+    async def provider_factory(_):
+        return provider
+
+    # exit_on_idle returns while retries are pending, so run the worker until they are due
+    for _ in range(rounds):
+        await run_worker(
+            session_factory=session_factory,
+            shared_root=shared_root,
+            rag_storage_dir=tmp_path / "rag",
+            poll_interval=0.01,
+            max_concurrency=2,
+            retry_policy=policy,
+            prune_interval=0,
+            archive_interval=0,
+            exit_on_idle=True,
+            rag_provider_factory=provider_factory,
+        )
+        with session_factory() as session:
+            if not session.query(IngestionQueueItem).filter_by(status=QueueStatus.queued).count():
+                return
+        await asyncio.sleep(0.02)
+
+
+def _items(session_factory) -> dict[str, IngestionQueueItem]:
+    with session_factory() as session:
+        return {item.storage_path: item for item in session.query(IngestionQueueItem)}
+
+
+def test_classifier_separates_transient_from_permanent_errors():
+    request = httpx.Request("POST", "http://localhost:11434/api/embed")
+    assert is_transient_error(httpx.ConnectError("refused", request=request))
+    assert is_transient_error(TimeoutError())
+    assert is_transient_error(RateLimitError("slow down"))
+    assert is_transient_error(StatusError(503))
+    assert not is_transient_error(StatusError(400))
+    assert not is_transient_error(ValueError("corrupted PDF"))
+
+    try:
+        try:
+            raise StatusError(429)
+        except StatusError as exc:
+            raise RuntimeError("LLM func failed") from exc
+    except RuntimeError as wrapped:
+        assert is_transient_error(wrapped)
+
+
+def test_retry_delay_grows_exponentially_with_jitter_up_to_the_cap():
+    for attempt, ceiling in [(1, 10), (2, 20), (3, 40), (6, 100), (20, 100)]:
+        delays = [retry_delay(attempt, base_delay=10, max_delay=100) for _ in range(50)]
+        assert all(ceiling / 2 <= delay <= ceiling for delay in delays)
+    assert len({retry_delay(3, 10, 100) for _ in range(10)}) > 1
+
+
+def test_reservation_skips_items_not_due_and_counts_attempts(session_factory):
+    now = datetime.now(timezone.utc)
+    with session_factory() as session:
+        session.add_all(
+            [
+                IngestionQueueItem(storage_path="later.pdf", next_attempt_at=now + timedelta(minutes=5)),
+                IngestionQueueItem(storage_path="due.pdf", next_attempt_at=now - timedelta(seconds=1)),
+                IngestionQueueItem(storage_path="new.pdf"),
+            ]
+        )
+        session.commit()
+
+    with session_factory() as session:
+        claimed = IngestionQueueItemRepo(session).reserve_next_batch(5, "worker-a")
+        session.commit()
+
+    assert sorted(item.storage_path for item in claimed) == ["due.pdf", "new.pdf"]
+    assert {item.attempt_count for item in claimed} == {1}
+
+
+@pytest.mark.asyncio
+async def test_transient_failures_are_retried_while_healthy_items_proceed(tmp_path, session_factory):
+    shared_root = tmp_path / "shared"
+    shared_root.mkdir()
+    _enqueue(session_factory, shared_root, ["flaky.txt", "ok1.txt", "ok2.txt"])
+    request = httpx.Request("POST", "http://localhost:11434/api/chat")
+    provider = FlakyRagProvider(failures=2, error=httpx.ConnectTimeout("timed out", request=request))
+
+    await _drain(tmp_path, session_factory, shared_root, provider, RetryPolicy(3, base_delay=0.01, max_delay=0.02))
+
+    items = _items(session_factory)
+    assert {item.status for item in items.values()} == {QueueStatus.indexed}
+    assert items["flaky.txt"].attempt_count == 3
+    assert items["ok1.txt"].attempt_count == 1
+    assert provider.rag_anything.calls == {"flaky.txt": 3, "ok1.txt": 1, "ok2.txt": 1}
+
+
+@pytest.mark.asyncio
+async def test_item_fails_once_attempts_are_exhausted_or_error_is_permanent(tmp_path, session_factory):
+    shared_root = tmp_path / "shared"
+    shared_root.mkdir()
+    _enqueue(session_factory, shared_root, ["flaky.txt"])
+    provider = FlakyRagProvider(failures=10, error=StatusError(429))
+
+    await _drain(tmp_path, session_factory, shared_root, provider, RetryPolicy(2, base_delay=0.01, max_delay=0.02))
+
+    flaky = _items(session_factory)["flaky.txt"]
+    assert flaky.status == QueueStatus.failed
+    assert flaky.attempt_count == 2
+
+    _enqueue(session_factory, shared_root, ["flaky-corrupted.txt"])
+    provider = FlakyRagProvider(failures=10, error=ValueError("corrupted"))
+
+    await _drain(tmp_path, session_factory, shared_root, provider, RetryPolicy(5, base_delay=0.01, max_delay=0.02))
+
+    corrupted = _items(session_factory)["flaky-corrupted.txt"]
+    assert corrupted.status == QueueStatus.failed
+    assert corrupted.attempt_count == 1
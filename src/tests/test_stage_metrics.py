@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import asyncio
+import io
+from dataclasses import replace
+from functools import partial
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from lightrag.utils import priority_limit_async_func_call
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from rag_ingest.orm import Base
+from rag_ingest.entity import IngestionQueueItem, QueueStatus
+from rag_ingest.repository import IngestionStageMetricRepo
+from rag_ingest.services import embed_provider, llm_provider
+from rag_ingest.services.rag_provider import bind_model_calls_to_jobs
+from rag_ingest.services.utils import track_stage
+from rag_ingest.stats import print_report, stage_report
+from rag_ingest.worker import run_worker
+
+
+class TimedRagAnything:
+    """Staged fake whose extraction makes two model calls, timed like `llm_model_func` does."""
+
+    async def parse_document(self, file_path: str):
+        await asyncio.sleep(0.02)
+        return [{"type": "text", "text": Path(file_path).read_text(), "page_idx": 0}], "doc"
+
+    async def insert_content_list(self, content_list, file_path: str, doc_id: str | None = None):
+        async def call_llm(prompt: str):
+            with track_stage("llm", bytes_processed=len(prompt)):
+                await asyncio.sleep(0.03)
+
+        await asyncio.gather(call_llm("extract entities"), call_llm("extract relations"))
+
+
+class TimedRagProvider:
+    def __init__(self):
+        self.rag_anything = TimedRagAnything()
+
+
+class QueuedModelsRagAnything:
+    """Fake calling the real model functions through LightRAG's priority queues, like extraction does."""
+
+    def __init__(self, lightrag):
+        self.lightrag = lightrag
+
+    async def process_document_complete(self, file_path: Path, doc_id: str | None = None):
+        await self.lightrag.llm_model_func(Path(file_path).read_text())
+        await self.lightrag.embedding_func(["chunk one", "chunk two"])
+
+
+@pytest.fixture()
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path/'metrics.sqlite'}", future=True)
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine, autoflush=False, future=True, expire_on_commit=False)
+
+
+@pytest.mark.asyncio
+async def test_worker_records_stage_timings_per_item(tmp_path, session_factory):
+    shared_root = tmp_path / "shared"
+    shared_root.mkdir()
+    with session_factory() as session:
+        for index in range(3):
+            (shared_root / f"doc{index}.txt").write_text("x" * (100 * (index + 1)))
+            session.add(IngestionQueueItem(storage_path=f"doc{index}.txt"))
+        session.commit()
+    provider = TimedRagProvider()
+
+    async def provider_factory(_):
+        return provider
+
+    await run_worker(
+        session_factory=session_factory,
+        shared_root=shared_root,
+        rag_storage_dir=tmp_path / "rag",
+        poll_interval=0.01,
+        max_concurrency=2,
+        prune_interval=0,
+        archive_interval=0,
+        exit_on_idle=True,
+        rag_provider_factory=provider_factory,
+    )
+
+    with session_factory() as session:
+        item = session.query(IngestionQueueItem).filter_by(storage_path="doc1.txt").one()
+        assert item.status == QueueStatus.indexed
+        stages = {row.stage: row for row in IngestionStageMetricRepo(session).find_by_queue_item(item.id)}
+
+    assert set(stages) == {"hash", "pipeline_wait", "parse", "insert", "llm"}
+    assert stages["hash"].bytes_processed == 200
+    assert stages["parse"].bytes_processed == 200
+    assert stages["insert"].bytes_processed == 200
+    assert stages["parse"].duration_seconds >= 0.02
+    assert stages["llm"].call_count == 2
+    assert stages["llm"].bytes_processed == len("extract entities") + len("extract relations")
+    # Concurrent model calls add up beyond the wall time of the insert stage
+    assert stages["llm"].duration_seconds > stages["insert"].duration_seconds
+    assert {row.attempt for row in stages.values()} == {1}
+
+    rows = {row["stage"]: row for row in stage_report(session_factory)}
+    assert rows["parse"]["jobs"] == 3
+    assert rows["llm"]["calls"] == 6
+    assert rows["parse"]["bytes_processed"] == 600
+    assert 0 < rows["insert"]["share"] < 1
+
+    out = io.StringIO()
+    print_report(list(rows.values()), out)
+    assert "parse" in out.getvalue()
+
+
+@pytest.mark.asyncio
+async def test_model_stages_are_timed_per_item_through_lightrag_queues(tmp_path, session_factory, monkeypatch):
+    async def complete(model, prompt, **kwargs):
+        await asyncio.sleep(0.01)
+        return "entities"
+
+    async def embed(texts, **kwargs):
+        return np.zeros((len(texts), 2))
+
+    monkeypatch.setattr(llm_provider, "openai_complete_if_cache", complete)
+    monkeypatch.setattr(embed_provider, "_ollama_embed", embed)
+    monkeypatch.setenv("EMBEDDING_DIM", "2")
+    monkeypatch.setenv("EMBEDDING_CACHE_ENABLED", "false")
+    monkeypatch.setenv("EMBEDDING_BATCH_MAX_WAIT_MS", "0")
+    # Wrapped the way LightRAG.__post_init__ does: calls run in the queues' worker tasks
+    embedding = embed_provider.embedding_func()
+    lightrag = SimpleNamespace(
+        llm_model_func=priority_limit_async_func_call(2, queue_name="LLM func")(
+            partial(llm_provider.llm_model_func, hashing_kv=None)
+        ),
+        embedding_func=replace(
+            embedding, func=priority_limit_async_func_call(2, queue_name="Embedding func")(embedding.func)
+        ),
+    )
+    llm_queue, embedding_queue = lightrag.llm_model_func, lightrag.embedding_func.func
+    bind_model_calls_to_jobs(lightrag)
+
+    shared_root = tmp_path / "shared"
+    shared_root.mkdir()
+    with session_factory() as session:
+        for index in range(3):
+            (shared_root / f"doc{index}.txt").write_text(f"document {index}")
+            session.add(IngestionQueueItem(storage_path=f"doc{index}.txt"))
+        session.commit()
+    provider = SimpleNamespace(rag_anything=QueuedModelsRagAnything(lightrag))
+
+    async def provider_factory(_):
+        return provider
+
+    try:
+        await run_worker(
+            session_factory=session_factory,
+            shared_root=shared_root,
+            rag_storage_dir=tmp_path / "rag",
+            poll_interval=0.01,
+            prune_interval=0,
+            archive_interval=0,
+            exit_on_idle=True,
+            rag_provider_factory=provider_factory,
+        )
+    finally:
+        await llm_queue.shutdown()
+        await embedding_queue.shutdown()
+
+    with session_factory() as session:
+        items = session.query(IngestionQueueItem).order_by(IngestionQueueItem.id).all()
+        stages = [
+            {row.stage: row for row in IngestionStageMetricRepo(session).find_by_queue_item(item.id)}
+            for item in items
+        ]
+
+    # Every job, not only the one that started the queue workers, gets its own model calls
+    assert [(item_stages["llm"].call_count, item_stages["embedding"].call_count) for item_stages in stages] == [
+        (1, 1)
+    ] * 3
+    assert [item_stages["llm"].bytes_processed for item_stages in stages] == [len("document 0")] * 3
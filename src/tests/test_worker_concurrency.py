@@ -0,0 +1,382 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from rag_ingest import worker
+from rag_ingest.orm import Base
+from rag_ingest.entity import IngestionLog, IngestionQueueItem, QueueStatus
+from rag_ingest.repository import IngestionQueueItemRepo
+from rag_ingest.wakeup import notify_workers
+from rag_ingest.worker import run_worker
+
+
+class SlowRagAnything:
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.processed: list[Path] = []
+        self.running = 0
+        self.max_running = 0
+
+    async def process_document_complete(self, file_path: Path, doc_id: str | None = None):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(self.delay)
+        self.running -= 1
+        self.processed.append(Path(file_path))
+
+
+class SlowRagProvider:
+    def __init__(self):
+        self.rag_anything = SlowRagAnything()
+
+
+@pytest.fixture()
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path/'worker.sqlite'}", future=True)
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine, autoflush=False, future=True)
+
+
+def _enqueue(session_factory, shared_root: Path, count: int) -> list[int]:
+    ids = []
+    with session_factory() as session:
+        for index in range(count):
+            (shared_root / f"doc{index}.txt").write_text(f"content {index}")
+            item = IngestionQueueItem(storage_path=f"doc{index}.txt")
+            session.add(item)
+            session.flush()
+            ids.append(item.id)
+        session.commit()
+    return ids
+
+
+async def _run(tmp_path, session_factory, shared_root, max_concurrency):
+    provider = SlowRagProvider()
+
+    async def provider_factory(_):
+        return provider
+
+    await run_worker(
+        session_factory=session_factory,
+        shared_root=shared_root,
+        rag_storage_dir=tmp_path / "rag",
+        poll_interval=0.01,
+        max_concurrency=max_concurrency,
+        exit_on_idle=True,
+        rag_provider_factory=provider_factory,
+    )
+    return provider
+
+
+@pytest.mark.asyncio
+async def test_worker_keeps_several_jobs_in_flight(tmp_path, session_factory):
+    shared_root = tmp_path / "shared"
+    shared_root.mkdir()
+    ids = _enqueue(session_factory, shared_root, 6)
+
+    provider = await _run(tmp_path, session_factory, shared_root, max_concurrency=3)
+
+    assert provider.rag_anything.max_running == 3
+    assert len(provider.rag_anything.processed) == 6
+    with session_factory() as session:
+        for item_id in ids:
+            assert session.get(IngestionQueueItem, item_id).status == QueueStatus.indexed
+
+
+@pytest.mark.asyncio
+async def test_worker_defaults_to_one_job_at_a_time(tmp_path, session_factory):
+    shared_root = tmp_path / "shared"
+    shared_root.mkdir()
+    _enqueue(session_factory, shared_root, 3)
+
+    provider = await _run(tmp_path, session_factory, shared_root, max_concurrency=1)
+
+    assert provider.rag_anything.max_running == 1
+    assert len(provider.rag_anything.processed) == 3
+
+
+@pytest.mark.asyncio
+async def test_worker_runs_small_files_before_large_ones(tmp_path, session_factory):
+    shared_root = tmp_path / "shared"
+    shared_root.mkdir()
+    (shared_root / "large.txt").write_bytes(b"x" * (4 << 20))
+    (shared_root / "small.txt").write_text("small")
+    with session_factory() as session:
+        session.add_all([IngestionQueueItem(storage_path="large.txt"), IngestionQueueItem(storage_path="small.txt")])
+        session.commit()
+
+    provider = await _run(tmp_path, session_factory, shared_root, max_concurrency=1)
+
+    assert [path.name for path in provider.rag_anything.processed] == ["small.txt", "large.txt"]
+    with session_factory() as session:
+        costs = {item.storage_path: item.estimated_cost for item in session.query(IngestionQueueItem)}
+    assert costs == {"large.txt": 4 << 20, "small.txt": 5}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_worker_exits_when_foreign_job_is_processing(tmp_path, session_factory):
+    shared_root = tmp_path / "shared"
+    shared_root.mkdir()
+    _enqueue(session_factory, shared_root, 2)
+    with session_factory() as session:
+        session.add(IngestionQueueItem(storage_path="other.txt", status=QueueStatus.processing))
+        session.commit()
+
+    provider = await _run(tmp_path, session_factory, shared_root, max_concurrency=4)
+
+    assert provider.rag_anything.processed == []
+
+
+@pytest.mark.asyncio
+async def test_non_exclusive_workers_share_the_queue(tmp_path, session_factory):
+    shared_root = tmp_path / "shared"
+    shared_root.mkdir()
+    ids = _enqueue(session_factory, shared_root, 8)
+    provider = SlowRagProvider()
+
+    async def provider_factory(_):
+        return provider
+
+    await asyncio.gather(
+        *(
+            run_worker(
+                session_factory=session_factory,
+                shared_root=shared_root,
+                rag_storage_dir=tmp_path / "rag",
+                poll_interval=0.01,
+                max_concurrency=2,
+                worker_id=f"worker-{index}",
+                exclusive=False,
+                exit_on_idle=True,
+                rag_provider_factory=provider_factory,
+            )
+            for index in range(2)
+        )
+    )
+
+    processed = [path.name for path in provider.rag_anything.processed]
+    assert sorted(processed) == sorted(f"doc{index}.txt" for index in range(8))
+    with session_factory() as session:
+        owners = {session.get(IngestionQueueItem, item_id).claimed_by for item_id in ids}
+    assert owners <= {"worker-0", "worker-1"}
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_keeps_long_jobs_leased(tmp_path, session_factory):
+    shared_root = tmp_path / "shared"
+    shared_root.mkdir()
+    ids = _enqueue(session_factory, shared_root, 1)
+    provider = SlowRagProvider()
+    provider.rag_anything.delay = 0.5
+
+    async def provider_factory(_):
+        return provider
+
+    async def competing_reclaims():
+        reclaimed = []
+        for _ in range(10):
+            await asyncio.sleep(0.05)
+            with session_factory() as session:
+                reclaimed += IngestionQueueItemRepo(session).reset_expired_leases()
+                session.commit()
+        return reclaimed
+
+    _, reclaimed = await asyncio.gather(
+        run_worker(
+            session_factory=session_factory,
+            shared_root=shared_root,
+            rag_storage_dir=tmp_path / "rag",
+            poll_interval=0.01,
+            lease_seconds=0.2,
+            heartbeat_interval=0.05,
+            exit_on_idle=True,
+            rag_provider_factory=provider_factory,
+        ),
+        competing_reclaims(),
+    )
+
+    assert reclaimed == []
+    with session_factory() as session:
+        assert session.get(IngestionQueueItem, ids[0]).status == QueueStatus.indexed
+
+
+@pytest.mark.asyncio
+async def test_job_is_cancelled_when_its_lease_is_taken_over(tmp_path, session_factory):
+    shared_root = tmp_path / "shared"
+    shared_root.mkdir()
+    ids = _enqueue(session_factory, shared_root, 1)
+    provider = SlowRagProvider()
+    provider.rag_anything.delay = 1
+
+    async def provider_factory(_):
+        return provider
+
+    async def take_over():
+        await asyncio.sleep(0.1)
+        with session_factory() as session:
+            session.get(IngestionQueueItem, ids[0]).claimed_by = "other-worker"
+            session.commit()
+
+    started = time.perf_counter()
+    await asyncio.gather(
+        run_worker(
+            session_factory=session_factory,
+            shared_root=shared_root,
+            rag_storage_dir=tmp_path / "rag",
+            poll_interval=0.01,
+            lease_seconds=30,
+            heartbeat_interval=0.05,
+            exit_on_idle=True,
+            rag_provider_factory=provider_factory,
+        ),
+        take_over(),
+    )
+
+    assert time.perf_counter() - started < 1
+    assert provider.rag_anything.processed == []
+    with session_factory() as session:
+        item = session.get(IngestionQueueItem, ids[0])
+        assert (item.status, item.claimed_by) == (QueueStatus.processing, "other-worker")
+
+
+@pytest.mark.asyncio
+async def test_job_finishing_after_losing_its_lease_leaves_the_item_to_its_owner(tmp_path, session_factory):
+    shared_root = tmp_path / "shared"
+    shared_root.mkdir()
+    ids = _enqueue(session_factory, shared_root, 1)
+    provider = SlowRagProvider()
+    provider.rag_anything.delay = 0.3
+
+    async def provider_factory(_):
+        return provider
+
+    async def take_over():
+        await asyncio.sleep(0.1)
+        with session_factory() as session:
+            session.get(IngestionQueueItem, ids[0]).claimed_by = "other-worker"
+            session.commit()
+
+    await asyncio.gather(
+        run_worker(
+            session_factory=session_factory,
+            shared_root=shared_root,
+            rag_storage_dir=tmp_path / "rag",
+            poll_interval=0.01,
+            lease_seconds=30,
+            heartbeat_interval=10,
+            exit_on_idle=True,
+            rag_provider_factory=provider_factory,
+        ),
+        take_over(),
+    )
+
+    assert len(provider.rag_anything.processed) == 1
+    with session_factory() as session:
+        item = session.get(IngestionQueueItem, ids[0])
+        assert (item.status, item.claimed_by) == (QueueStatus.processing, "other-worker")
+        messages = [log.message for log in session.query(IngestionLog).filter_by(ingestion_queue_item_id=ids[0])]
+    assert not any(message.startswith("Successfully ingested") for message in messages)
+
+
+@pytest.mark.asyncio
+async def test_wakeup_ping_interrupts_idle_sleep(tmp_path, session_factory):
+    shared_root = tmp_path / "shared"
+    shared_root.mkdir()
+    wakeup_address = f"unix:{tmp_path / 'wake.sock'}"
+    provider = SlowRagProvider()
+
+    async def provider_factory(_):
+        return provider
+
+    worker = asyncio.create_task(
+        run_worker(
+            session_factory=session_factory,
+            shared_root=shared_root,
+            rag_storage_dir=tmp_path / "rag",
+            poll_interval=30,
+            wakeup_address=wakeup_address,
+            rag_provider_factory=provider_factory,
+        )
+    )
+    try:
+        await asyncio.sleep(0.2)
+        _enqueue(session_factory, shared_root, 1)
+        notify_workers(wakeup_address)
+
+        for _ in range(50):
+            if provider.rag_anything.processed:
+                break
+            await asyncio.sleep(0.05)
+        assert [path.name for path in provider.rag_anything.processed] == ["doc0.txt"]
+    finally:
+        worker.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await worker
+
+
+@pytest.mark.asyncio
+async def test_slow_database_does_not_block_the_event_loop(tmp_path, session_factory):
+    shared_root = tmp_path / "shared"
+    shared_root.mkdir()
+    ids = _enqueue(session_factory, shared_root, 2)
+    engine = session_factory.kw["bind"]
+
+    def slow_statement(*_):
+        time.sleep(0.05)
+
+    event.listen(engine, "before_cursor_execute", slow_statement)
+    lags = []
+
+    async def measure_loop_lag():
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(0.005)
+            lags.append(time.perf_counter() - started - 0.005)
+
+    ticker = asyncio.create_task(measure_loop_lag())
+    try:
+        await _run(tmp_path, session_factory, shared_root, max_concurrency=2)
+    finally:
+        ticker.cancel()
+        event.remove(engine, "before_cursor_execute", slow_statement)
+
+    # Every statement blocks its thread for 50ms, never the loop
+    assert max(lags) < 0.04
+    with session_factory() as session:
+        assert {session.get(IngestionQueueItem, item_id).status for item_id in ids} == {QueueStatus.indexed}
+
+
+@pytest.mark.asyncio
+async def test_crashed_job_is_failed_or_requeued(tmp_path, session_factory, monkeypatch):
+    shared_root = tmp_path / "shared"
+    shared_root.mkdir()
+    broken_id, flaky_id = _enqueue(session_factory, shared_root, 2)
+
+    async def crashing_process_queue_item(ingestion_log_repo, ingestion_queue_item_repo, queue_item, *args, **kwargs):
+        # Raised out of process_queue_item, past its own failure handling
+        if queue_item.id == broken_id:
+            raise RuntimeError("bookkeeping bug")
+        raise ConnectionError("database went away")
+
+    monkeypatch.setattr(worker, "process_queue_item", crashing_process_queue_item)
+    await _run(tmp_path, session_factory, shared_root, max_concurrency=2)
+
+    with session_factory() as session:
+        broken = session.get(IngestionQueueItem, broken_id)
+        flaky = session.get(IngestionQueueItem, flaky_id)
+        assert (broken.status, broken.lease_expires_at) == (QueueStatus.failed, None)
+        assert "bookkeeping bug" in broken.rag_message
+        assert (flaky.status, flaky.claimed_by) == (QueueStatus.queued, None)
+        assert flaky.next_attempt_at is not None
+        levels = {
+            item_id: [log.level for log in session.query(IngestionLog).filter_by(ingestion_queue_item_id=item_id)]
+            for item_id in (broken_id, flaky_id)
+        }
+    assert levels[broken_id][-1] == "error"
+    assert levels[flaky_id][-1] == "warning"
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from rag_ingest.orm import Base
+from rag_ingest.entity import IngestionQueueItem, QueueStatus
+from rag_ingest.worker import DocumentPipeline, run_worker
+
+
+class StagedRagAnything:
+    def __init__(self, parse_delay: float = 0.05, extract_delay: float = 0.05, failing: tuple[str, ...] = ()):
+        self.parse_delay = parse_delay
+        self.extract_delay = extract_delay
+        self.failing = failing
+        self.events: list[tuple[str, str, str]] = []
+        self.extracting = 0
+        self.max_extracting = 0
+
+    async def parse_document(self, file_path: str):
+        name = Path(file_path).name
+        self.events.append(("parse", "start", name))
+        await asyncio.sleep(self.parse_delay)
+        self.events.append(("parse", "end", name))
+        if name in self.failing:
+            raise RuntimeError("unreadable document")
+        return [{"type": "text", "text": name, "page_idx": 0}], "content-doc-id"
+
+    async def insert_content_list(self, content_list, file_path: str, doc_id: str | None = None):
+        name = Path(file_path).name
+        self.extracting += 1
+        self.max_extracting = max(self.max_extracting, self.extracting)
+        self.events.append(("extract", "start", name))
+        await asyncio.sleep(self.extract_delay)
+        self.events.append(("extract", "end", name))
+        self.extracting -= 1
+
+
+class StagedRagProvider:
+    def __init__(self, rag_anything: StagedRagAnything):
+        self.rag_anything = rag_anything
+
+
+@pytest.fixture()
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path/'pipeline.sqlite'}", future=True)
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine, autoflush=False, future=True)
+
+
+@pytest.mark.asyncio
+async def test_pipeline_parses_next_document_during_extraction():
+    rag_anything = StagedRagAnything(parse_delay=0.05, extract_delay=0.05)
+    pipeline = DocumentPipeline(StagedRagProvider(rag_anything)).start()
+
+    started = time.monotonic()
+    await asyncio.gather(*(pipeline.process(Path(f"doc{index}.pdf")) for index in range(4)))
+    elapsed = time.monotonic() - started
+    await pipeline.close()
+
+    # Sequential stages would need 4 * (parse + extract) = 0.4s
+    assert elapsed < 0.35
+    assert rag_anything.events.index(("parse", "start", "doc1.pdf")) < rag_anything.events.index(
+        ("extract", "end", "doc0.pdf")
+    )
+    assert rag_anything.max_extracting == 1
+
+
+@pytest.mark.asyncio
+async def test_pipeline_reports_stage_errors_to_the_caller():
+    rag_anything = StagedRagAnything(parse_delay=0, extract_delay=0, failing=("bad.pdf",))
+    pipeline = DocumentPipeline(StagedRagProvider(rag_anything)).start()
+
+    results = await asyncio.gather(
+        pipeline.process(Path("bad.pdf")), pipeline.process(Path("good.pdf")), return_exceptions=True
+    )
+    await pipeline.close()
+
+    assert isinstance(results[0], RuntimeError)
+    assert results[1] is None
+
+
+@pytest.mark.asyncio
+async def test_worker_overlaps_parsing_with_extraction(tmp_path, session_factory):
+    shared_root = tmp_path / "shared"
+    shared_root.mkdir()
+    with session_factory() as session:
+        for index in range(4):
+            (shared_root / f"doc{index}.pdf").write_text(f"content {index}")
+            session.add(IngestionQueueItem(storage_path=f"doc{index}.pdf"))
+        session.commit()
+
+    rag_anything = StagedRagAnything(parse_delay=0.05, extract_delay=0.05)
+
+    async def provider_factory(_):
+        return StagedRagProvider(rag_anything)
+
+    await run_worker(
+        session_factory=session_factory,
+        shared_root=shared_root,
+        rag_storage_dir=tmp_path / "rag",
+        poll_interval=0.01,
+        max_concurrency=1,
+        prefetch=1,
+        prune_interval=0,
+        exit_on_idle=True,
+        rag_provider_factory=provider_factory,
+    )
+
+    assert rag_anything.max_extracting == 1
+    assert rag_anything.events.index(("parse", "start", "doc1.pdf")) < rag_anything.events.index(
+        ("extract", "end", "doc0.pdf")
+    )
+    with session_factory() as session:
+        assert {item.status for item in session.query(IngestionQueueItem)} == {QueueStatus.indexed}
+
+
+@pytest.mark.asyncio
+async def test_worker_reserves_one_job_at_a_time_by_default(tmp_path, session_factory):
+    shared_root = tmp_path / "shared"
+    shared_root.mkdir()
+    with session_factory() as session:
+        for index in range(3):
+            (shared_root / f"doc{index}.pdf").write_text(f"content {index}")
+            session.add(IngestionQueueItem(storage_path=f"doc{index}.pdf"))
+        session.commit()
+
+    reserved = []
+
+    class CountingRagAnything(StagedRagAnything):
+        async def parse_document(self, file_path: str):
+            with session_factory() as session:
+                reserved.append(
+                    session.query(IngestionQueueItem).filter_by(status=QueueStatus.processing).count()
+                )
+            return await super().parse_document(file_path)
+
+    rag_anything = CountingRagAnything(parse_delay=0.02, extract_delay=0.02)
+
+    async def provider_factory(_):
+        return StagedRagProvider(rag_anything)
+
+    await run_worker(
+        session_factory=session_factory,
+        shared_root=shared_root,
+        rag_storage_dir=tmp_path / "rag",
+        poll_interval=0.01,
+        max_concurrency=1,
+        prune_interval=0,
+        exit_on_idle=True,
+        rag_provider_factory=provider_factory,
+    )
+
+    assert reserved == [1, 1, 1]